@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+import asyncio
+import time
+
+os.environ["LOCKCELL_CONFIG"] = str(Path(__file__).parent / "config.yaml")
+
+import lockcell
+import cloudpickle
+
+
+from lockcell import AsyncLockcell, TestConfig
+
+cloudpickle.register_pickle_by_value(lockcell)
+
+
+async def run_job(name: str, config: TestConfig):
+    async with AsyncLockcell(
+        endpoint="172.29.94.180:5001", config=config, environnement={"pip": ["numpy"]}
+    ) as lock:
+        await lock.run_rddmin()
+        start = time.time()
+        async for failing_set in lock.results():
+            print(f"[{name}] Update at {(time.time() - start):.2f}s ---> {failing_set}")
+        print(f"[{name}] Full : ", await lock.get_result())
+
+
+async def main():
+    configs = {}
+    for seed in range(4):
+        config = TestConfig(N=2**7)
+        config.set_mode("Analyse")
+        config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), non_overlapping=True, seed=seed)
+        configs[f"job {seed}"] = config
+
+    # A single client process drives all the jobs concurrently
+    await asyncio.gather(*(run_job(name, config) for name, config in configs.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
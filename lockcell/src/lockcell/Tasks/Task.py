@@ -5,27 +5,109 @@ Email    : erwan.tchale@gmail.com
 
 """
 
+import time
+from copy import copy
 from datetime import timedelta
 
+import cloudpickle
+
 from armonik.worker import TaskHandler
-from pymonik import task, MultiResultHandle, TaskOptions
+from pymonik import task, MultiResultHandle, ResultHandle, TaskOptions
 
 from typing import List, Tuple, Optional, Union
 from ..config.BaseConfig import BaseConfig
-from .utils import AminusB, split_list, thrower, TaskTag
-from ..constants import LOCKCELL_TAG
+from .utils import (
+    complement,
+    concat,
+    load_config,
+    merge_failing_sets,
+    known_outcome,
+    split_list,
+    publish,
+    published_prefix,
+    resolve,
+    TaskTag,
+)
+from .Results import FakeResult
+from ..config.priority import PRIORITY_LEVELS
+from ..constants import LOCKCELL_BACKUP_TAG, LOCKCELL_TAG
 
 
 ### NTask
 
-BASE_PRIORITY = 1
+# The tests and aggregators have a priority between BASE_PRIORITY and TOP_PRIORITY - 1, following the
+# priority policy of the configuration (see BaseConfig.set_priority_policy)
+BASE_PRIORITY = 2
+# The speculative tests (and the RDDMin iterations started ahead, see PipelinedRDDMin) only use the
+# capacity left by the other tasks, so that the aggregators that decide whether they are needed run first
+SPECULATIVE_PRIORITY = 1
+# The tasks that hand a result to the client (next RDDMin iteration) run before anything else
+TOP_PRIORITY = BASE_PRIORITY + PRIORITY_LEVELS
+# Time after which a task is stopped (and retried) by the cluster, unless the straggler policy of the
+# configuration derives it from the measured durations of the tests
+DEFAULT_MAX_DURATION = timedelta(seconds=300)
+
+
+def task_priority(config: BaseConfig, delta: list) -> int:
+    """
+    Returns the priority of a task working on 'delta', following the priority policy of 'config'
+    """
+    if config.run_ahead:
+        return SPECULATIVE_PRIORITY
+    return BASE_PRIORITY + config.get_priority_level(len(delta))
+
+
+def _task_options(
+    priority: int,
+    tag: str = TaskTag.CLASSIC.value,
+    config: Optional[BaseConfig] = None,
+    tests: int = 1,
+) -> TaskOptions:
+    """
+    Builds the options of a submitted task, with the deadlines of the straggler policy of 'config'
+    for a task running 'tests' tests (see BaseConfig.set_straggler_policy)
+    """
+    options = TaskOptions(
+        max_duration=DEFAULT_MAX_DURATION,
+        priority=priority,
+        max_retries=3,
+        partition_id="pymonik",
+        options={LOCKCELL_TAG: tag},
+    )
+    if config is None:
+        return options
+    timeout = config.get_test_timeout()
+    if timeout is not None:
+        options.max_duration = timedelta(seconds=timeout * max(tests, 1))
+    backup_policy = config.get_backup_policy()
+    if backup_policy is not None:
+        options.options[LOCKCELL_BACKUP_TAG] = backup_policy
+    return options
+
+
+def _planned_tests(config: BaseConfig, unit: List[tuple]) -> int:
+    """
+    Bounds the number of tests run by the task submitted for 'unit' (a list of nTask arguments): one
+    test per entry whose result isn't known, plus about 2 * len(delta) for an entry whose failing
+    delta may be minimized inside the task (see _collapse)
+    """
+    tests = 0
+    for args in unit:
+        delta, me = args[0], args[3]
+        Recurse = args[4] if len(args) > 4 else True
+        Result = args[5] if len(args) > 5 else None
+        if Result is None:
+            tests += 1
+        if Recurse and me is None and 1 < len(delta) <= config.get_collapse_size():
+            tests += 2 * len(delta)
+    return tests
 
 
 @task(
     priority=BASE_PRIORITY,
     require_context=True,
     task_options=TaskOptions(
-        max_duration=timedelta(300),
+        max_duration=DEFAULT_MAX_DURATION,
         priority=BASE_PRIORITY,
         max_retries=3,
         partition_id="pymonik",
@@ -72,6 +154,7 @@ def nTask(
 
     """
     handler: TaskHandler = ctx.task_handler
+    config = load_config(handler, config)
     options = handler.task_options
 
     ### PrintGraph ###
@@ -82,11 +165,14 @@ def nTask(
         me.setType(f"{n}Task")
 
     # Si le resultat est déjà connu on ne teste pas
-    test = None
-    if Result is None:
-        test = config.test_(delta)
-    else:
-        test = Result
+    test = Result
+    if test is None:
+        test = known_outcome(handler, config.known_outcomes, delta)
+    if test is None:
+        start = time.perf_counter()
+        test = _run_test(handler, config, delta)
+        config.record_test_cost(time.perf_counter() - start)
+        _record_outcomes(handler, config, [(delta, test)])
 
     if test:  # Test le delta passé en param
         ### PrintGraph ###
@@ -106,21 +192,10 @@ def nTask(
         ### PrintGraph ###
         if gPrint:
             me.sout(me, [[delta], False])
-        tag = TaskTag.THROWN.value
-        if LOCKCELL_TAG in options.options:
-            if options.options[LOCKCELL_TAG] == TaskTag.ROOT.value:
-                tag = TaskTag.THROWN.value
-        return thrower.invoke(
-            [delta],
-            delegate=True,
-            task_options=TaskOptions(
-                max_duration=timedelta(300),
-                priority=7,
-                max_retries=3,
-                partition_id="pymonik",
-                options={LOCKCELL_TAG: tag},
-            ),
-        )
+        return _throw(handler, [delta], config)
+
+    if not gPrint and len(delta) <= config.get_collapse_size():
+        return _collapse(handler, delta, n, config, oneSub)
 
     # Sinon on split en n (= granularity)
     if isinstance(n, int):
@@ -135,7 +210,7 @@ def nTask(
     ### PrintGraph ###
     if gPrint:
         GrOut = Node()
-    result = nTask.map_invoke(subdivArg)  # type: ignore
+    result = _map_tests(subdivArg)  # type: ignore
 
     ### PrintGraph ###
     if gPrint:
@@ -153,12 +228,350 @@ def nTask(
         me.sout(GrOut, None)
     if isinstance(n, list):
         n = len(n)
+    speculated = _speculate(subdiv, config, gPrint)
 
     return nAGG.invoke(
-        subdiv, result, n, config, GrOut, oneSub, delegate=True, task_options=options
+        subdiv, result, n, config, GrOut, oneSub, speculated, delegate=True, task_options=options
+    )  # type: ignore
+
+
+def _run_test(handler: TaskHandler, config: BaseConfig, delta: list) -> bool:
+    """
+    Runs the test of 'config' on 'delta', resolved against the shared search space of the job if any
+    """
+    return config.test_(resolve(handler, config.shared_space, delta))
+
+
+def _record_outcomes(handler: TaskHandler, config: BaseConfig, outcomes: List[Tuple[list, bool]]):
+    """
+    Publishes the outcomes of the tests run by a task with the OUTCOME tag when the job is journaled
+    """
+    if config.record_outcomes and outcomes:
+        publish(handler, TaskTag.OUTCOME, outcomes, config.namespace)
+
+
+def _collapse(
+    handler: TaskHandler,
+    delta: list,
+    n: Union[int, List[list]],
+    config: BaseConfig,
+    oneSub: List[int],
+):
+    """
+    Minimizes the failing 'delta' inside this task: the tasks of its subtree run on a local session
+    of this worker (see BaseConfig.set_collapse_size) rather than being submitted one by one, and
+    the failing sets they throw are published again to the client
+
+    Returns:
+        Tuple[List[list], bool]: The answer of the `nTask` on 'delta'
+    """
+    from ..backends import LocalPymonik
+
+    # The tasks of the subtree find the shared search space and outcomes in the cache of this worker
+    resolve(handler, config.shared_space, [])
+    known_outcome(handler, config.known_outcomes, [])
+    inner = copy(config).set_collapse_size(0).set_speculative(False).set_parallelism(None)
+    session = LocalPymonik(max_workers=config.collapse_workers, use_threads=True).create()
+    try:
+        answer = nTask.invoke(  # type: ignore
+            delta, n, inner, None, True, False, oneSub, pymonik=session
+        )
+        failing_sets, test = answer.wait().get()
+        published = {tag: [] for tag in (TaskTag.THROWN, TaskTag.OUTCOME)}
+        for result in session.created_results():
+            for tag, data in published.items():
+                if result.name.startswith(published_prefix(tag, config.namespace)):
+                    data.extend(
+                        cloudpickle.loads(
+                            session._results_client.download_result_data(result.result_id, "")
+                        )
+                    )
+    finally:
+        session.close()
+    for tag, data in published.items():
+        if data:
+            publish(handler, tag, data, config.namespace)
+    return failing_sets, test
+
+
+#########################################################################################################
+### NBatch
+#########################################################################################################
+
+
+def _map_tests(args: List[tuple], speculative: bool = False):
+    """
+    Submits a nTask for each tuple of arguments in 'args', packing them into nBatch tasks when the
+    configuration asks for it (see BaseConfig.get_batch_size). The graph printing isn't supported by
+    the batched tasks, so nothing is packed when a node is given.
+
+    Each task gets the priority of its delta (the highest one for a batch), or SPECULATIVE_PRIORITY
+    for the speculative tests, and a deadline covering the tests it may run (see _planned_tests).
+
+    Returns:
+        MultiResultHandle: The answers, to read with '_unbatch' (a batch produces a list of answers)
+    """
+    if not args:
+        return MultiResultHandle([])
+    config: BaseConfig = args[0][2]
+    size = config.get_batch_size()
+    if size <= 1 or any(arg[3] is not None for arg in args):
+        to_submit, units = nTask, [[arg] for arg in args]
+    else:
+        to_submit = nBatch
+        units = [args[start : start + size] for start in range(0, len(args), size)]
+
+    # Submits the tasks by priority, then puts the answers back in order
+    by_priority: dict[int, List[int]] = {}
+    for idx, unit in enumerate(units):
+        priority = SPECULATIVE_PRIORITY
+        if not speculative:
+            priority = max(task_priority(config, arg[0]) for arg in unit)
+        by_priority.setdefault(priority, []).append(idx)
+
+    answers: List[Optional[ResultHandle]] = [None] * len(units)
+    for priority, idxs in by_priority.items():
+        submitted = to_submit.map_invoke(  # type: ignore
+            [units[idx][0] if to_submit is nTask else (units[idx],) for idx in idxs],
+            task_options=_task_options(
+                priority,
+                config=config,
+                tests=max(_planned_tests(config, units[idx]) for idx in idxs),
+            ),
+        )
+        for idx, answer in zip(idxs, submitted):
+            answers[idx] = answer
+    return MultiResultHandle(answers)  # type: ignore
+
+
+def _unbatch(answers: list) -> list:
+    """
+    Flattens the answers of tasks submitted by '_map_tests', a batch returns a list of answers
+    while a nTask returns a single answer (a tuple)
+    """
+    res = []
+    for answer in answers:
+        if isinstance(answer, list):
+            res.extend(answer)
+        else:
+            res.append(answer)
+    return res
+
+
+def _speculate(subdiv: List[list], config: BaseConfig, gPrint: bool):
+    """
+    In speculative mode, submits the non recursive tests of the complements of the subsets of
+    'subdiv', to run in the same wave as the tests of the subsets (see BaseConfig.should_speculate)
+
+    The answers are returned as FakeResults so that they are not data dependencies of the nAGG : it
+    can then cancel them if a subset fails, or wait for them with '_resolve' otherwise
+
+    Returns:
+        List[FakeResult] | None: The pending answers, to pass to the nAGG, None when not speculating
+    """
+    if gPrint or not config.should_speculate(len(subdiv)):
+        return None
+    answers = _map_tests(
+        [(complement(subdiv, idx), 2, config, None, False) for idx in range(len(subdiv))],
+        speculative=True,
+    )
+    return [FakeResult(answer.result_id, answer.session_id) for answer in answers]
+
+
+def _is_pending(speculated: Optional[list]) -> bool:
+    """
+    Asserts if 'speculated' holds the pending answers of '_speculate' rather than the answers themselves
+    """
+    return bool(speculated) and isinstance(speculated[0], FakeResult)  # type: ignore
+
+
+def _resolve(pending: List[FakeResult]) -> MultiResultHandle:
+    """
+    Turns the pending answers of '_speculate' back into handles, passing them to a task makes it wait for them
+    """
+    return MultiResultHandle(
+        [ResultHandle(fake.result_id, fake.session_id, None) for fake in pending]  # type: ignore
+    )
+
+
+def _cancel(handler: TaskHandler, pending: List[FakeResult], nb_tests: int, config: BaseConfig):
+    """
+    Asks the client to cancel the tasks computing the pending answers of '_speculate', by publishing
+    with the CANCEL tag the estimated duration (in seconds) of the tests of each answer, by result id
+    """
+    cost = (config.test_cost or 0) * nb_tests / len(pending)
+    publish(handler, TaskTag.CANCEL, {fake.result_id: cost for fake in pending}, config.namespace)
+
+
+def _throw(handler: TaskHandler, failing_sets: List[list], config: BaseConfig):
+    """
+    Publishes the 1 minimal failing sets found by a task to the client with the THROWN tag, so that
+    they are reported before the end of the job
+
+    Returns:
+        Tuple[List[list], bool]: The answer of the task
+    """
+    publish(handler, TaskTag.THROWN, failing_sets, config.namespace)
+    return failing_sets, False
+
+
+@task(
+    priority=BASE_PRIORITY,
+    require_context=True,
+    task_options=TaskOptions(
+        max_duration=DEFAULT_MAX_DURATION,
+        priority=BASE_PRIORITY,
+        max_retries=3,
+        partition_id="pymonik",
+        options={LOCKCELL_TAG: TaskTag.CLASSIC.value},
+    ),
+)
+def nBatch(ctx, batch: List[tuple], tests: Optional[List[bool]] = None):
+    """
+    Runs the tests of several `nTask`s in a single task, to pay the overhead of a task only once for
+    cheap tests. For the failing subsets that must be recursed on, it submits what their `nTask`
+    would have submitted and gathers the answers back with a `nBatchJoin`.
+
+    Args:
+        batch (List[tuple]): The arguments of each `nTask` (delta, n, config, me, Recurse, Result, oneSub).
+        tests (Optional[List[bool]], optional): The results of the tests of the `nTask`s without a known
+            `Result`, in order, when they were already run by a `nTest`. Defaults to None.
+
+    Returns:
+        List[Tuple[Union[List[list], str, None], bool]]: The answer of each `nTask`, in order.
+
+        This task may delegate to a `nBatchJoin`, returning the same structure.
+    """
+    handler: TaskHandler = ctx.task_handler
+    options = handler.task_options
+
+    answers: List[Optional[tuple]] = []
+    recursions = []
+    positions = []
+    tested = iter(tests) if tests is not None else None
+    outcomes: dict[int, List[Tuple[list, bool]]] = {}
+    # The entries share their configuration, and the cost of the tests measured on it
+    configs = {}
+    for position, args in enumerate(batch):
+        delta, n = args[0], args[1]
+        if id(args[2]) not in configs:
+            configs[id(args[2])] = load_config(handler, args[2])
+        config = configs[id(args[2])]
+        Recurse = args[4] if len(args) > 4 else True
+        Result = args[5] if len(args) > 5 else None
+        oneSub = args[6] if len(args) > 6 else []
+
+        test = Result
+        if test is None and tested is not None:
+            test = next(tested)
+        elif test is None:
+            test = known_outcome(handler, config.known_outcomes, delta)
+            if test is None:
+                start = time.perf_counter()
+                test = _run_test(handler, config, delta)
+                config.record_test_cost(time.perf_counter() - start)
+                outcomes.setdefault(id(args[2]), []).append((delta, test))
+
+        if test:
+            answers.append((None, True))
+        elif not Recurse:
+            answers.append(("Input", False))
+        elif len(delta) == 1:
+            answers.append(_throw(handler, [delta], config))
+        elif len(delta) <= config.get_collapse_size():
+            answers.append(_collapse(handler, delta, n, config, oneSub))
+        else:
+            answers.append(None)
+            recursions.append(_recurse(delta, n, config, oneSub))
+            positions.append(position)
+
+    for key, tested in outcomes.items():
+        _record_outcomes(handler, configs[key], tested)
+    if not recursions:
+        return answers
+
+    return nBatchJoin.invoke(
+        answers, MultiResultHandle(recursions), positions, delegate=True, task_options=options
     )  # type: ignore
 
 
+@task(
+    priority=BASE_PRIORITY,
+    require_context=True,
+    task_options=TaskOptions(
+        max_duration=DEFAULT_MAX_DURATION,
+        priority=BASE_PRIORITY,
+        max_retries=3,
+        partition_id="pymonik",
+        options={LOCKCELL_TAG: TaskTag.CLASSIC.value},
+    ),
+)
+def nTest(ctx, config: BaseConfig, deltas: List[list]) -> List[bool]:
+    """
+    Runs the tests of 'deltas' and nothing else. When the aggregators run next to the client (see
+    `backends.CoordinatorPymonik`), it is the only task submitted to the cluster: the `nTask`s and
+    `nBatch`s are split into a `nTest` and a local continuation given its results.
+
+    Args:
+        deltas (List[list]): The deltas to test.
+
+    Returns:
+        List[bool]: The result of the test of each delta, in order.
+    """
+    config = load_config(ctx.task_handler, config)
+    return [_run_test(ctx.task_handler, config, delta) for delta in deltas]
+
+
+def _recurse(delta: list, n: Union[int, List[list]], config: BaseConfig, oneSub: List[int]):
+    """
+    Submits the recursion of a `nTask` on a failing `delta` of more than one element (same as the end
+    of `nTask`, without the graph printing nor the delegation)
+
+    Returns:
+        ResultHandle: The answer of the recursion
+    """
+    subdiv = split_list(delta, n) if isinstance(n, int) else n
+    result = _map_tests([(subset, 2, config, None) for subset in subdiv])
+    speculated = _speculate(subdiv, config, False)
+    return nAGG.invoke(
+        subdiv,
+        result,
+        len(subdiv),
+        config,
+        None,
+        oneSub,
+        speculated,
+        task_options=_task_options(task_priority(config, delta), config=config),
+    )  # type: ignore
+
+
+@task(
+    priority=BASE_PRIORITY,
+    task_options=TaskOptions(
+        max_duration=DEFAULT_MAX_DURATION,
+        priority=BASE_PRIORITY,
+        max_retries=3,
+        partition_id="pymonik",
+        options={LOCKCELL_TAG: TaskTag.CLASSIC.value},
+    ),
+)
+def nBatchJoin(answers: List[Optional[tuple]], recursed: List[tuple], positions: List[int]):
+    """
+    Puts the answers of the `nTask`s submitted by a `nBatch` back in their place.
+
+    Args:
+        answers (List[Optional[tuple]]): The answers of the batch, None for the recursed subsets.
+        recursed (List[tuple]): The answers of the recursed subsets.
+        positions (List[int]): The position in `answers` of each recursed subset.
+
+    Returns:
+        List[Tuple[Union[List[list], str, None], bool]]: The answer of each `nTask` of the batch.
+    """
+    for position, answer in zip(positions, recursed):
+        answers[position] = answer
+    return answers
+
+
 #########################################################################################################
 ### NAGG
 #########################################################################################################
@@ -168,7 +581,7 @@ def nTask(
     priority=BASE_PRIORITY,
     require_context=True,
     task_options=TaskOptions(
-        max_duration=timedelta(300),
+        max_duration=DEFAULT_MAX_DURATION,
         priority=BASE_PRIORITY,
         max_retries=3,
         partition_id="pymonik",
@@ -183,6 +596,7 @@ def nAGG(
     config: BaseConfig,
     me,
     oneSub: List[int] = [],
+    speculated: Optional[List[Union[FakeResult, Tuple[Union[str, None], bool]]]] = None,
 ):
     """
     nAGG is a task that analyzes the results of multiple `nTask` executions. If some tasks failed,
@@ -201,6 +615,10 @@ def nAGG(
             cannot be split further (typically because they are of size one). This is used to
             preserve the binary tree structure. Can be updated in this task #TODO, forwarded for consistency.
             Defaults to an empty list.
+        speculated (Optional[List[Union[FakeResult, Tuple[Optional[str], bool]]]], optional): In
+            speculative mode, the answers of the non recursive `nTask`s run on the complements of
+            the subsets of `subdiv` in the same wave as `answers`. They are first pending (see
+            `_speculate`) : cancelled if a subset failed, waited for otherwise. Defaults to None.
 
     Returns:
         Tuple[List[list], bool]: A pair where:
@@ -212,7 +630,9 @@ def nAGG(
     """
 
     handler: TaskHandler = ctx.task_handler
+    config = load_config(handler, config)
     options = handler.task_options
+    answers = _unbatch(answers)  # Results of batched tasks are lists of answers
 
     ### PrintGraph ###
     gPrint = me is not None
@@ -227,21 +647,11 @@ def nAGG(
             test = True
             break
 
-    def merge(tabofrep):  # Merge sans doublon
-        dic = {}
-        res = []
-        for rep in tabofrep:
-            if rep[0] is None:
-                continue
-            for val in rep[0]:
-                key = val.__str__()
-                if key not in dic:
-                    dic[key] = val
-                    res.append(val)
-        return res
-
     if test:  # Si l'un des sets à fail, on retourne directe l'union des set de subset
-        rep = merge(answers)
+        if _is_pending(speculated):
+            # The tests of the complements are pointless, the subtree is already decided
+            _cancel(handler, speculated, len(subdiv), config)  # type: ignore
+        rep = merge_failing_sets(answers)
 
         ### PrintGraph ###
         if gPrint:
@@ -251,44 +661,30 @@ def nAGG(
     if (
         n == 2
     ):  # Optimisation : Si la granularité vaut 2, on ne test pas les complémentaires et on augmente directement la granularité
-        omega = sum(subdiv, [])
+        omega = concat(subdiv)
         if len(omega) <= n:
             ### PrintGraph ###
             if gPrint:
                 me.sout(me, [[omega], False])
-            tag = TaskTag.THROWN.value
-            if LOCKCELL_TAG in options.options:
-                if options.options[LOCKCELL_TAG] == TaskTag.ROOT.value:
-                    tag = TaskTag.THROWN.value
-            return thrower.invoke(
-                [omega],
-                delegate=True,
-                task_options=TaskOptions(
-                    max_duration=timedelta(300),
-                    priority=7,
-                    max_retries=3,
-                    partition_id="pymonik",
-                    options={LOCKCELL_TAG: tag},
-                ),
-            )
+            return _throw(handler, [omega], config)
 
         newdivision = []  # Pour le 2nAGG
         newdivisionArg = []  # Pour les nTask
 
         # TODO: Add the updating of oneSub, it doesn't happen often (granularity = 2) but for 3 sized delta it is important
-        k = min(2 * n, len(omega))
+        # Splits each subset in two, or more while the cluster wouldn't be filled
+        growth = config.get_growth_factor(n)
         for delta in subdiv:  # Mise en forme des lis
             if len(delta) >= 2:
-                temp = split_list(delta, 2)
-                newdivisionArg.append((temp[0], 2, config, Node() if gPrint else None))
-                newdivisionArg.append((temp[1], 2, config, Node() if gPrint else None))
-                newdivision.append(temp[0])
-                newdivision.append(temp[1])
+                for temp in split_list(delta, min(growth, len(delta))):
+                    newdivisionArg.append((temp, 2, config, Node() if gPrint else None))
+                    newdivision.append(temp)
             else:
                 newdivisionArg.append((delta, 2, config, Node() if gPrint else None))
                 newdivision.append(delta)
+        k = len(newdivision)
 
-        result = nTask.map_invoke(newdivisionArg)  # type: ignore
+        result = _map_tests(newdivisionArg)  # type: ignore
         GrOut = None
 
         ### PrintGraph ###
@@ -299,8 +695,19 @@ def nAGG(
                 GrOut.sup(*i[3].out)
             me.sout(GrOut, None)
 
+        # The subsets of a wider split have no conjugate
+        oneSub = list(range(len(newdivision))) if growth > 2 else []
+        speculated = _speculate(newdivision, config, gPrint)
         return nAGG.invoke(
-            newdivision, result, k, config, GrOut, delegate=True, task_options=options
+            newdivision,
+            result,
+            k,
+            config,
+            GrOut,
+            oneSub,
+            speculated,
+            delegate=True,
+            task_options=options,
         )  # type: ignore
 
     next = nAGG2
@@ -315,13 +722,41 @@ def nAGG(
         recursion = False
         next = nAnalyser
 
-    omega = sum(subdiv, [])
     k = max(2, n - 1)
+
+    if _is_pending(speculated):
+        # No subset failed, so the answers of the complements are needed : waits for them
+        return nAGG.invoke(
+            subdiv,
+            answers,
+            n,
+            config,
+            None,
+            oneSub,
+            _resolve(speculated),  # type: ignore
+            delegate=True,
+            task_options=options,
+        )  # type: ignore
+
+    if speculated is not None:
+        # The complements were tested in the same wave as the subsets, only the failing ones are
+        # recursed on (with their result already known)
+        result = _unbatch(speculated)
+        if recursion:
+            failing = [idx for idx, answer in enumerate(result) if not answer[1]]
+            if failing:
+                result = _map_tests(
+                    [(complement(subdiv, idx), k, config, None, True, False) for idx in failing]
+                )
+        return next.invoke(
+            subdiv, result, n, config, None, oneSub, delegate=True, task_options=options
+        )  # type: ignore
+
     nablas = [
-        (AminusB(omega, delta), k, config, Node() if gPrint else None, recursion)
-        for delta in subdiv
+        (complement(subdiv, idx), k, config, Node() if gPrint else None, recursion)
+        for idx in range(len(subdiv))
     ]
-    result = nTask.map_invoke(nablas)  # type: ignore
+    result = _map_tests(nablas)  # type: ignore
     GrOut = None
 
     ### PrintGraph ###
@@ -351,7 +786,7 @@ def nAGG(
     priority=BASE_PRIORITY,
     require_context=True,
     task_options=TaskOptions(
-        max_duration=timedelta(300),
+        max_duration=DEFAULT_MAX_DURATION,
         priority=BASE_PRIORITY,
         max_retries=3,
         partition_id="pymonik",
@@ -395,7 +830,9 @@ def nAGG2(
         This task may delegate to a `nAGG`, or return directly, following the same result structure.
     """
     handler: TaskHandler = ctx.task_handler
+    config = load_config(handler, config)
     options = handler.task_options
+    answers = _unbatch(answers)
 
     ### PrintGraph ###
     gPrint = me is not None
@@ -410,21 +847,8 @@ def nAGG2(
             test = True
             break
 
-    def merge(tabofrep):  # Merge sans doublon
-        dic = {}
-        res = []
-        for rep in tabofrep:
-            if rep[0] is None:
-                continue
-            for val in rep[0]:
-                key = val.__str__()
-                if key not in dic:
-                    dic[key] = val
-                    res.append(val)
-        return res
-
     if test:  # Si l'un des complémentaire à fail, on retourne directe l'union des set de subset
-        rep = merge(answers)
+        rep = merge_failing_sets(answers)
 
         ### PrintGraph ###
         if gPrint:
@@ -433,26 +857,12 @@ def nAGG2(
 
     # Sinon on augmente la granularité
 
-    omega = sum(subdiv, [])
+    omega = concat(subdiv)
     if len(omega) <= n:  # Si granularité max on retourne le delta courant (omega)
         ### PrintGraph ###
         if gPrint:
             me.sout(me, [[omega], False])
-        tag = TaskTag.THROWN.value
-        if LOCKCELL_TAG in options.options:
-            if options.options[LOCKCELL_TAG] == TaskTag.ROOT.value:
-                tag = TaskTag.THROWN.value
-        return thrower.invoke(
-            [omega],
-            delegate=True,
-            task_options=TaskOptions(
-                max_duration=timedelta(300),
-                priority=7,
-                max_retries=3,
-                partition_id="pymonik",
-                options={LOCKCELL_TAG: tag},
-            ),
-        )
+        return _throw(handler, [omega], config)
 
     newdivision = []  # Pour le 2nAGG
     newdivisionArg = []  # Pour les nTask
@@ -468,7 +878,7 @@ def nAGG2(
         else:
             newdivisionArg.append((delta, 2, config, Node() if gPrint else None))
             newdivision.append(delta)
-    result = nTask.map_invoke(newdivisionArg)  # type: ignore
+    result = _map_tests(newdivisionArg)  # type: ignore
     GrOut = None
 
     ### PrintGraph ###
@@ -479,7 +889,10 @@ def nAGG2(
             GrOut.sup(*i[3].out)
         me.sout(GrOut, None)
 
-    return nAGG.invoke(newdivision, result, k, config, GrOut, delegate=True, task_options=options)  # type: ignore
+    speculated = _speculate(newdivision, config, gPrint)
+    return nAGG.invoke(
+        newdivision, result, k, config, GrOut, [], speculated, delegate=True, task_options=options
+    )  # type: ignore
 
 
 #########################################################################################################
@@ -491,7 +904,7 @@ def nAGG2(
     priority=BASE_PRIORITY,
     require_context=True,
     task_options=TaskOptions(
-        max_duration=timedelta(300),
+        max_duration=DEFAULT_MAX_DURATION,
         priority=BASE_PRIORITY,
         max_retries=3,
         partition_id="pymonik",
@@ -537,7 +950,9 @@ def nAnalyser(
         This task may delegate to a `nAGG` or a `nAnalyserDown`, or return directly, using the same result structure.
     """
     handler: TaskHandler = ctx.task_handler
+    config = load_config(handler, config)
     options = handler.task_options
+    answers = _unbatch(answers)
 
     ### PrintGraph ###
     gPrint = me is not None
@@ -555,38 +970,24 @@ def nAnalyser(
             idxs.append(idx)
         idx += 1
 
-    omega = sum(subdiv, [])  # Utile pour faire tous les complémentaires etc
+    omega = concat(subdiv)  # Utile pour faire tous les complémentaires etc
 
     if test:  ##### Si l'un des complémentaire a fail, on analyse
         # Est-on au niveau de découpage le plus fin
         granularityMax = len(omega) == n
         if granularityMax and (len(idxs) == 1):  # TODO: cf. preuve
-            rep = [AminusB(omega, subdiv[idxs[0]])]
+            rep = [complement(subdiv, idxs[0])]
             ### PrintGraph ###
             if gPrint:
                 me.addLabel("One fail")
                 me.addLabel("Granularity Max !")
                 me.sout(me, [rep, False])
-            tag = TaskTag.THROWN.value
-            if LOCKCELL_TAG in options.options:
-                if options.options[LOCKCELL_TAG] == TaskTag.ROOT.value:
-                    tag = TaskTag.THROWN.value
-            return thrower.invoke(
-                rep,
-                delegate=True,
-                task_options=TaskOptions(
-                    max_duration=timedelta(300),
-                    priority=7,
-                    max_retries=3,
-                    partition_id="pymonik",
-                    options={LOCKCELL_TAG: tag},
-                ),
-            )
+            return _throw(handler, rep, config)
 
         if len(idxs) == 1:  # Si un seul fail on recurse dessus
             # On prépare les arguments
             idx = idxs[0]
-            nabla = AminusB(omega, subdiv[idx])
+            nabla = complement(subdiv, idx)
 
             GrOut = None
             ### PrintGraph ###
@@ -643,8 +1044,7 @@ def nAnalyser(
                     if not vals[idx]:
                         for j in range(idx + 1, n):
                             if not vals[j]:
-                                intersection = AminusB(omega, subdiv[idx])
-                                intersection = AminusB(intersection, subdiv[j])
+                                intersection = complement(subdiv, idx, j)
                                 Args.append(
                                     (intersection, 2, config, Node() if gPrint else None, False)
                                 )
@@ -653,8 +1053,7 @@ def nAnalyser(
                 if not vals[idx]:
                     for j in range(idx + 2, n):
                         if not vals[j]:
-                            intersection = AminusB(omega, subdiv[idx])
-                            intersection = AminusB(intersection, subdiv[j])
+                            intersection = complement(subdiv, idx, j)
                             Args.append(
                                 (intersection, 2, config, Node() if gPrint else None, False)
                             )
@@ -662,8 +1061,7 @@ def nAnalyser(
                 if not vals[idx]:
                     for j in range(idx + 1, n):
                         if not vals[j]:
-                            intersection = AminusB(omega, subdiv[idx])
-                            intersection = AminusB(intersection, subdiv[j])
+                            intersection = complement(subdiv, idx, j)
                             Args.append(
                                 (intersection, 2, config, Node() if gPrint else None, False)
                             )
@@ -685,7 +1083,7 @@ def nAnalyser(
                     conjugate[idx + 1] = idx + 1 if not vals[idx + 1] else None  # type: ignore
                 idx += 2
 
-            Nanswers = nTask.map_invoke(Args)
+            Nanswers = _map_tests(Args)
             GrOut = None
 
             ### PrintGraph ###
@@ -713,7 +1111,7 @@ def nAnalyser(
                 k = min(n - 1, len(omega) - len(subdiv[idx]))
                 Args.append(
                     (
-                        AminusB(omega, subdiv[idx]),
+                        complement(subdiv, idx),
                         k,
                         config,
                         Node(emphas="orange") if gPrint else None,
@@ -721,7 +1119,7 @@ def nAnalyser(
                         False,
                     )
                 )
-            answers = nTask.map_invoke(Args)
+            answers = _map_tests(Args)
 
             GrOut = None
 
@@ -744,21 +1142,7 @@ def nAnalyser(
         if gPrint:
             me.addLabel("Granularity Max !")
             me.sout(me, [[omega], False])
-        tag = TaskTag.THROWN.value
-        if LOCKCELL_TAG in options.options:
-            if options.options[LOCKCELL_TAG] == TaskTag.ROOT.value:
-                tag = TaskTag.THROWN.value
-        return thrower.invoke(
-            [omega],
-            delegate=True,
-            task_options=TaskOptions(
-                max_duration=timedelta(300),
-                priority=7,
-                max_retries=3,
-                partition_id="pymonik",
-                options={LOCKCELL_TAG: tag},
-            ),
-        )
+        return _throw(handler, [omega], config)
 
     ### PrintGraph ###
     if gPrint:
@@ -767,23 +1151,26 @@ def nAnalyser(
     newdivision = []  # Pour le 2nAGG
     newdivisionArg = []  # Pour les nTask
 
-    k = min(2 * n, len(omega))
+    # Splits each subset in two, or more while the cluster wouldn't be filled (then the subsets
+    # have no conjugate)
+    growth = config.get_growth_factor(n)
     oneSub = []
     idx = 0
     for delta in subdiv:  # Mise en forme des lis
         if len(delta) >= 2:
-            temp = split_list(delta, 2)
-            newdivisionArg.append((temp[0], 2, config, Node() if gPrint else None))
-            newdivisionArg.append((temp[1], 2, config, Node() if gPrint else None))
-            newdivision.append(temp[0])
-            newdivision.append(temp[1])
-            idx += 2
+            for temp in split_list(delta, min(growth, len(delta))):
+                newdivisionArg.append((temp, 2, config, Node() if gPrint else None))
+                newdivision.append(temp)
+                if growth > 2:
+                    oneSub.append(idx)
+                idx += 1
         else:
             newdivisionArg.append((delta, 2, config, Node() if gPrint else None))
             newdivision.append(delta)
             oneSub.append(idx)
             idx += 1
-    result = nTask.map_invoke(newdivisionArg)  # type: ignore
+    k = len(newdivision)
+    result = _map_tests(newdivisionArg)  # type: ignore
     GrOut = None
 
     ### PrintGraph ###
@@ -794,8 +1181,17 @@ def nAnalyser(
             GrOut.sup(*i[3].out)
         me.sout(GrOut, None)
 
+    speculated = _speculate(newdivision, config, gPrint)
     return nAGG.invoke(
-        newdivision, result, k, config, GrOut, oneSub, delegate=True, task_options=options
+        newdivision,
+        result,
+        k,
+        config,
+        GrOut,
+        oneSub,
+        speculated,
+        delegate=True,
+        task_options=options,
     )  # type: ignore
 
 
@@ -808,7 +1204,7 @@ def nAnalyser(
     priority=BASE_PRIORITY,
     require_context=True,
     task_options=TaskOptions(
-        max_duration=timedelta(300),
+        max_duration=DEFAULT_MAX_DURATION,
         priority=BASE_PRIORITY,
         max_retries=3,
         partition_id="pymonik",
@@ -856,7 +1252,9 @@ def nAnalyserDown(
         This task may delegate to a `Corrector` or a `nAGG`, or return directly, using the same result structure.
     """
     handler: TaskHandler = ctx.task_handler
+    config = load_config(handler, config)
     options = handler.task_options
+    answers = _unbatch(answers)
 
     ### PrintGraph ###
     gPrint = me is not None
@@ -968,14 +1366,10 @@ def nAnalyserDown(
             return False, None, None
         return True, idx1, idx2
 
-    omega = sum(subdiv, [])
-
     ### If only one failing subset (deg = 1) #########################################################################
     if isnull(extractSquareMatrix(matrix, lst)):
         # Launching calculus on the full intersection
-        newDelta = omega
-        for idx in lst:
-            newDelta = AminusB(newDelta, subdiv[idx])
+        newDelta = complement(subdiv, *lst)
 
         Gr1 = Node() if gPrint else None
         newdivision = []
@@ -1003,8 +1397,7 @@ def nAnalyserDown(
                     True,
                     None,
                     oneSub,
-                    delegate=True,
-                    task_options=options,
+                    task_options=_task_options(task_priority(config, newDelta), config=config),
                 )
             ]
         )
@@ -1040,14 +1433,10 @@ def nAnalyserDown(
             if not matrix[idx2][idx]:
                 tab2.append(idx)
 
-        NewNabla1 = omega
-        for idx in tab1:
-            NewNabla1 = AminusB(NewNabla1, subdiv[idx])
+        NewNabla1 = complement(subdiv, *tab1)
         Gr1 = Node() if gPrint else None
 
-        NewNabla2 = omega
-        for idx in tab2:
-            NewNabla2 = AminusB(NewNabla2, subdiv[idx])
+        NewNabla2 = complement(subdiv, *tab2)
         Gr2 = Node() if gPrint else None
 
         newdivision1 = []
@@ -1085,7 +1474,7 @@ def nAnalyserDown(
             (NewNabla1, newdivision1, config, Gr1, True, None, oneSub1),
             (NewNabla2, newdivision2, config, Gr2, True, None, oneSub2),
         ]
-        res = nTask.map_invoke(Args)
+        res = _map_tests(Args)
         GrOut = None
 
         ### PrintGraph ###
@@ -1115,10 +1504,18 @@ def nAnalyserDown(
         results = []
         fakesons = []
         for idx in range(n):  # Correspond à une n-1 Task
-            nabla = AminusB(omega, subdiv[idx])
+            nabla = complement(subdiv, idx)
             if idx not in lst:  # Si c'est un tache qui ne fail pas, on la génère simplement
                 results.append(
-                    nTask.invoke(nabla, n - 1, config, Node(emphas="orange"), False, True)
+                    nTask.invoke(
+                        nabla,
+                        n - 1,
+                        config,
+                        Node(emphas="orange"),
+                        False,
+                        True,
+                        task_options=_task_options(task_priority(config, nabla), config=config),
+                    )
                 )
                 continue
 
@@ -1128,7 +1525,7 @@ def nAnalyserDown(
             for i in range(n):
                 if i == idx:
                     continue
-                nablaPrime = AminusB(nabla, subdiv[i])
+                nablaPrime = complement(subdiv, idx, i)
                 newSubdiv.append(subdiv[i])
                 rep = matrix[idx][i]
                 ### PrintGraph ###
@@ -1145,7 +1542,7 @@ def nAnalyserDown(
                     (nablaPrime, newdivision, config, graphs[-1] if gPrint else None, True, rep)
                 )  # Mise en forme pour le passage en paramètre
 
-            result = nTask.map_invoke(subdivArg)  # type: ignore
+            result = _map_tests(subdivArg)  # type: ignore
 
             fakeMother = None
 
@@ -1170,7 +1567,16 @@ def nAnalyserDown(
                     GrOut1.sup(*out.out)
                 fakeMother.sout(GrOut1, None)
 
-            results.append(nAGG.invoke(newSubdiv, result, n, config, GrOut1))
+            results.append(
+                nAGG.invoke(
+                    newSubdiv,
+                    result,
+                    n,
+                    config,
+                    GrOut1,
+                    task_options=_task_options(task_priority(config, nabla), config=config),
+                )
+            )
 
         ## On a récupéré les données des n-1 task et on lance donc un n aggregateur pour sortir la réponse
         GrOut = None
@@ -1197,7 +1603,7 @@ def nAnalyserDown(
 @task(
     priority=BASE_PRIORITY,
     task_options=TaskOptions(
-        max_duration=timedelta(300),
+        max_duration=DEFAULT_MAX_DURATION,
         priority=BASE_PRIORITY,
         max_retries=3,
         partition_id="pymonik",
@@ -1241,6 +1647,8 @@ def Corrector(
             - the second element is a boolean indicating whether the combined subset is failing.
     """
 
+    answers = _unbatch(answers)
+
     ### PrintGraph ###
     gPrint = me is not None
     if gPrint:
@@ -1254,22 +1662,8 @@ def Corrector(
                 me.sout(me, answers[0])
             return answers[0]
     if mode == 2:
-
-        def merge(tabofrep):  # Merge sans doublon
-            dic = {}
-            res = []
-            for rep in tabofrep:
-                if rep[0] is None:
-                    continue
-                for val in rep[0]:
-                    key = val.__str__()
-                    if key not in dic:
-                        dic[key] = val
-                        res.append(val)
-            return res
-
         if not answers[0][1] and not answers[1][1]:
-            rep = merge(answers)
+            rep = merge_failing_sets(answers)
             ### PrintGraph ###
             if gPrint:
                 me.addLabel("Double")
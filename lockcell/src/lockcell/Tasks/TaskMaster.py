@@ -4,13 +4,13 @@ from armonik.worker import TaskHandler
 from ..constants import LOCKCELL_TAG
 from ..config.BaseConfig import BaseConfig
 from .Results import FakeRDDMinResult, FakeResult, TaskResult, RDDMinResult, fake_result
-from .utils import AminusB, TaskTag
-from .Task import nTask
+from .utils import AminusB, TaskTag, concat, load_config, tag_value
+from .Task import nTask, TOP_PRIORITY, task_priority
 
 NO_RETURN = FakeResult(0, 0)  # type: ignore
 
 
-@task(require_context=True, priority=7)
+@task(require_context=True, priority=TOP_PRIORITY)
 def running_rddmin_task(ctx, search_space: list, config: BaseConfig, previous_result: tuple = None):  # type: ignore
     """
     Allow to make the RDDMin run entirely on ArmoniK
@@ -25,6 +25,7 @@ def running_rddmin_task(ctx, search_space: list, config: BaseConfig, previous_re
     Returns:
         FakeRDDMinResult : to result as said in the description, wrapped in a FakeRDDMinResult to work with cloudpickle
     """
+    config = load_config(ctx.task_handler, config)
     if previous_result:
         # TODO: to delete as soon as TaskResult will be implemented in Task.py
         previous_result: TaskResult = TaskResult(*previous_result)
@@ -33,15 +34,18 @@ def running_rddmin_task(ctx, search_space: list, config: BaseConfig, previous_re
             return FakeRDDMinResult(NO_RETURN, None)
 
         # Does the union of the lists contained in failing_subset_list
-        all = sum(previous_result.failing_subset_list, [])
+        all = concat(previous_result.failing_subset_list)
         search_space = AminusB(search_space, all)
 
     task_handler: TaskHandler = ctx.task_handler
     options = task_handler.task_options
-    options.priority = 1
-    options.options[LOCKCELL_TAG] = TaskTag.ROOT.value
-    result = nTask.invoke(search_space, 2, config, None, task_options=options)  # type: ignore
-    options.options[LOCKCELL_TAG] = TaskTag.RDDMIN_CHAIN.value
-    options.priority = 7
+    options.priority = task_priority(config, search_space)
+    options.options[LOCKCELL_TAG] = tag_value(TaskTag.ROOT, config.namespace)
+    # The root subsets have no conjugate when the search space isn't split in two
+    n = config.get_root_granularity(len(search_space))
+    oneSub = list(range(n)) if n > 2 else []
+    result = nTask.invoke(search_space, n, config, None, True, None, oneSub, task_options=options)  # type: ignore
+    options.options[LOCKCELL_TAG] = tag_value(TaskTag.RDDMIN_CHAIN, config.namespace)
+    options.priority = TOP_PRIORITY
     next = running_rddmin_task.invoke(search_space, config, result, task_options=options)  # type: ignore
     return fake_result(RDDMinResult(result, next))
@@ -1,6 +1,15 @@
+import sys
+import types
+import uuid
+from dataclasses import dataclass
 from enum import Enum
+from itertools import chain
+from typing import Iterable, List, Optional
 
-from pymonik import task
+import cloudpickle
+
+from ..config.BaseConfig import BaseConfig, SharedConfig
+from ..constants import LOCKCELL_TAG, WORKER_CACHE_MODULE
 
 
 def split_list(tab: list, n: int):
@@ -37,16 +46,66 @@ def AminusB(A: list, B: list):
     Returns:
         list: A new list containing all items from `A` that are not in `B`.
     """
-    s2 = {}
-    for delta in B:
-        s2[delta] = 1
+    if not B:
+        return list(A)
+    excluded = set(B)
+    return [delta for delta in A if delta not in excluded]
+
+
+def concat(subsets: Iterable[list]) -> list:
+    """
+    Concatenate a list of lists into a single list, in linear time (unlike `sum(subsets, [])`,
+    which copies the partial result at every step).
+
+    Args:
+        subsets (Iterable[list]): The lists to concatenate.
+
+    Returns:
+        list: The elements of every list of `subsets`, in order.
+    """
+    return list(chain.from_iterable(subsets))
 
-    c = []
-    for delta in A:
-        if delta not in s2:
-            c.append(delta)
 
-    return c
+def complement(subdiv: List[list], *excluded: int) -> list:
+    """
+    Return the concatenation of the subsets of `subdiv` except the ones at the indices `excluded`.
+
+    `subdiv` being a partition of `concat(subdiv)`, this is `AminusB(concat(subdiv), subdiv[i])`
+    for a single index, computed by slicing the partition instead of hashing every element.
+
+    Args:
+        subdiv (List[list]): The partition of the delta.
+        *excluded (int): The indices of the subsets to leave out.
+
+    Returns:
+        list: The elements of the other subsets, in order.
+    """
+    skipped = set(excluded)
+    return concat(subset for idx, subset in enumerate(subdiv) if idx not in skipped)
+
+
+def merge_failing_sets(answers: Iterable[tuple]) -> List[list]:
+    """
+    Merge the failing sets of a list of answers `(failing sets, test result)`, without duplicates
+    (the answers of sibling tasks often hold the same failing sets).
+
+    Args:
+        answers (Iterable[tuple]): The answers, their failing sets can be None.
+
+    Returns:
+        List[list]: The distinct failing sets, in order of appearance.
+    """
+    seen = set()
+    merged = []
+    for answer in answers:
+        if answer[0] is None:
+            continue
+        for failing_set in answer[0]:
+            key = tuple(failing_set)
+            if key not in seen:
+                seen.add(key)
+                merged.append(failing_set)
+    return merged
 
 
 class TaskTag(Enum):
@@ -55,17 +114,151 @@ class TaskTag(Enum):
     ROOT = "root"
     END_ROOT = "end_root"
     RDDMIN_CHAIN = "rddmin_chain"
+    CANCEL = "cancel"
+    OUTCOME = "outcome"
+
+
+def outcome_key(delta: list) -> frozenset:
+    """
+    Returns the key of the outcome of the test of 'delta' (see BaseConfig.known_outcomes), the
+    same subset can be built in different orders by the tasks
+    """
+    return frozenset(delta)
+
+
+def tag_value(tag: TaskTag, namespace: Optional[str] = None) -> str:
+    """
+    Returns the value of the LOCKCELL_TAG option of the tasks tagged with 'tag' by the job of
+    'namespace' (the jobs sharing a session have their own namespace, see 'BaseConfig.set_namespace')
+    """
+    if namespace is None:
+        return tag.value
+    return f"{namespace}__{tag.value}"
+
+
+def published_prefix(tag: TaskTag, namespace: Optional[str] = None) -> str:
+    """
+    Returns the prefix of the name of the results published with 'tag' by the job of 'namespace'
+    """
+    return f"{LOCKCELL_TAG}__{tag_value(tag, namespace)}__"
 
 
-@task
-def thrower(data: list[list]):
+def publish(task_handler, tag: TaskTag, data, namespace: Optional[str] = None) -> None:
     """
-    Does nothing except throwing a result, used with task_option to tag this task a retrieve it from the client
+    Publishes 'data' to the client from a running task, as a new result of the session whose name
+    is prefixed by 'published_prefix(tag, namespace)' (the client looks for these results, like for
+    a tagged task)
 
     Args:
-        data (list[list]): The result
+        task_handler (TaskHandler): The handler of the running task
+        tag (TaskTag): The tag of the publication
+        data (Any): The data to publish
+        namespace (Optional[str]): The namespace of the job of the task. Defaults to None.
+    """
+    task_handler.create_results(
+        {f"{published_prefix(tag, namespace)}{uuid.uuid4()}": cloudpickle.dumps(data)}
+    )
 
-    Returns:
-        tuple[list[list], bool]: The result
+
+def worker_cache(name: str) -> dict:
+    """
+    Returns the dict 'name' kept by this process across its tasks. The modules of Lockcell are sent
+    to the workers by value (see lockcell/__init__.py), so their globals are unpickled again with
+    every task: the dicts are kept in a module registered in sys.modules instead
+    """
+    module = sys.modules.setdefault(WORKER_CACHE_MODULE, types.ModuleType(WORKER_CACHE_MODULE))
+    return module.__dict__.setdefault(name, {})
+
+
+@dataclass(frozen=True)
+class SharedSpace:
+    """
+    Reference to the search space of a job uploaded once in the session (see
+    BaseConfig.set_share_search_space): the tasks work on the indices of its elements, that are only
+    resolved to run a test
+
+    Attributes:
+        result_id (str): The result holding the list of the elements of the search space
+    """
+
+    result_id: str
+
+
+def resolve(task_handler, shared_space: Optional[SharedSpace], delta: list) -> list:
+    """
+    Returns the elements of 'delta', a list of indices in 'shared_space' (or 'delta' itself when the
+    search space isn't shared). The search space is downloaded once by each worker
+
+    Args:
+        task_handler (TaskHandler): The handler of the running task
+        shared_space (Optional[SharedSpace]): The shared search space of the job
+        delta (list): The delta to resolve
+    """
+    if shared_space is None:
+        return delta
+    spaces = worker_cache("spaces")
+    elements = spaces.get(shared_space.result_id)
+    if elements is None:
+        elements = cloudpickle.loads(task_handler.get_resource_data(shared_space.result_id))
+        spaces[shared_space.result_id] = elements
+    return [elements[idx] for idx in delta]
+
+
+@dataclass(frozen=True)
+class KnownOutcomes:
+    """
+    Reference to the outcomes of the tests recorded by a previous run of the job (see journal.py),
+    uploaded once in the session: the tasks answer these tests without running them
+
+    Attributes:
+        result_id (str): The result holding the dict of the outcomes, by outcome_key
+    """
+
+    result_id: str
+
+
+def known_outcome(
+    task_handler, known_outcomes: Optional[KnownOutcomes], delta: list
+) -> Optional[bool]:
+    """
+    Returns the recorded outcome of the test of 'delta', None if it has to be run. The outcomes are
+    downloaded once by each worker
+
+    Args:
+        task_handler (TaskHandler): The handler of the running task
+        known_outcomes (Optional[KnownOutcomes]): The recorded outcomes of the job
+        delta (list): The delta to test
+    """
+    if known_outcomes is None:
+        return None
+    cache = worker_cache("outcomes")
+    outcomes = cache.get(known_outcomes.result_id)
+    if outcomes is None:
+        outcomes = cloudpickle.loads(task_handler.get_resource_data(known_outcomes.result_id))
+        cache[known_outcomes.result_id] = outcomes
+    return outcomes.get(outcome_key(delta))
+
+
+def load_config(task_handler, config) -> BaseConfig:
+    """
+    Returns the configuration referenced by 'config' (or 'config' itself when it isn't shared). The
+    configuration is downloaded and unpickled once by each worker, every task gets its own shallow
+    copy of it carrying the durations of the tests measured so far
+
+    Args:
+        task_handler (TaskHandler): The handler of the running task
+        config (BaseConfig | SharedConfig): The configuration given to the task
     """
-    return data, False
+    if not isinstance(config, SharedConfig):
+        return config
+    configs = worker_cache("configs")
+    base = configs.get(config.result_id)
+    if base is None:
+        base = cloudpickle.loads(task_handler.get_resource_data(config.result_id))
+        configs[config.result_id] = base
+    loaded = object.__new__(type(base))
+    loaded.__dict__.update(base.__dict__)
+    loaded.shared_config = config.result_id
+    loaded.test_cost = config.test_cost
+    loaded.test_durations = list(config.test_durations)
+    return loaded
@@ -116,8 +116,7 @@ class ConfigVerrou(BaseConfig):
 
     def __copy__(self) -> "ConfigVerrou":
         res = ConfigVerrou(self.workdir, self.runPath, self.CmpPath)
-        res.nbRun = self.nbRun
-        res.mode = self.mode
+        self._copy_settings(res)
         return res
 
     def test_(self, subspace: list) -> bool:
@@ -1,48 +1,44 @@
-import cloudpickle
-
-# Modules to pass to the tasks
-
-from .config import BaseConfig as BaseConfigModule
-from .config import TestConfig as TestConfigModule
-from .Tasks import utils
-from .Tasks import Results
-from .Tasks import Task
-from .Tasks import TaskMaster
 from .constants import LOCKCELL_TAG
 
-from . import VerrouConf
-
 # Modules to expose to the user
 from .graphViz import MultiViz
-from .core import Lockcell
+from .core import Lockcell, Backend
+from .async_core import AsyncLockcell
+from .manager import JobManager, SharePolicy
 from .VerrouConf import ConfigVerrou
 from .constants import USER_SCRIPTS_PATH, USER_WORKING_DIR, TASK_WORKING_DIR
 from .config.BaseConfig import BaseConfig
 from .config.TestConfig import TestConfig
+from .config.priority import PriorityPolicy
 from .utils import Status
+from .bundle import CodeBundle, build_code_bundle, set_code_bundle
+from .journal import Journal
 
-# Register modules for cloudpickle by value (transmitting the task's essential code to PymoniK)
-
-cloudpickle.register_pickle_by_value(BaseConfigModule)
-cloudpickle.register_pickle_by_value(utils)
-cloudpickle.register_pickle_by_value(TestConfigModule)
-cloudpickle.register_pickle_by_value(VerrouConf)
-cloudpickle.register_pickle_by_value(Results)
-cloudpickle.register_pickle_by_value(Task)
-cloudpickle.register_pickle_by_value(TaskMaster)
+# Register modules for cloudpickle by value (transmitting the task's essential code to PymoniK),
+# unless the workers import them from a code bundle (see bundle.py)
 
+set_code_bundle(None)
 
 # Exposing key classes/functions at package level
 __all__ = [
     "MultiViz",
     "Lockcell",
+    "AsyncLockcell",
+    "JobManager",
+    "SharePolicy",
+    "Backend",
     "BaseConfig",
     "TestConfig",
+    "PriorityPolicy",
     "ConfigVerrou",
     "USER_SCRIPTS_PATH",
     "USER_WORKING_DIR",
     "TASK_WORKING_DIR",
     "Status",
+    "CodeBundle",
+    "build_code_bundle",
+    "set_code_bundle",
+    "Journal",
     "LOCKCELL_TAG",
 ]
 
@@ -0,0 +1,191 @@
+import asyncio
+from typing import AsyncIterator
+
+from .core import Lockcell, Job
+
+
+class AsyncLockcell(Lockcell):
+    """
+    Asyncio interface of Lockcell, the jobs are driven from an event loop instead of a polling thread.
+
+    Every request to ArmoniK is made in a worker thread, so that a single client process can drive
+    many concurrent jobs, each failing set being yielded by 'results()' as soon as it is found:
+
+        async with AsyncLockcell(endpoint, config=config) as lock:
+            await lock.run_rddmin()
+            async for failing_set in lock.results():
+                ...
+    """
+
+    def __init__(self, *args, poll_interval: float = 0.1, **kwargs) -> None:
+        """
+        Takes the same arguments as Lockcell
+
+        Args:
+            poll_interval (float, optional): Time in seconds between two updates when nothing new
+                was found. Defaults to 0.1.
+        """
+        super().__init__(*args, **kwargs)
+        self.poll_interval: float = poll_interval
+
+    ### User functions
+
+    async def run(self):  # type: ignore[override]
+        """
+        Launch a run
+
+        Raises:
+            RuntimeError: If the session is not open
+            RuntimeError: If there is no job to run
+        """
+        await asyncio.to_thread(super().run)
+
+    async def resume(self, journal: str):  # type: ignore[override]
+        """
+        Resumes the job recorded in the journal at 'journal' (see Lockcell.resume)
+        """
+        self._set_resumed(journal)
+        await self.run()
+
+    async def run_rddmin(self):  # type: ignore[override]
+        """
+        Shortcut to run a rddmin
+        """
+        self.set_job(Job.RDDMIN)
+        await self.run()
+
+    async def run_pipelined_rddmin(self):  # type: ignore[override]
+        """
+        Shortcut to run a rddmin whose iterations start before the end of the previous one
+        """
+        self.set_job(Job.PIPELINED_RDDMIN)
+        await self.run()
+
+    async def run_ddmin(self):  # type: ignore[override]
+        """
+        Shortcut to run a ddmin
+        """
+        self.set_job(Job.DDMin)
+        await self.run()
+
+    async def wait(self):  # type: ignore[override]
+        """
+        Wait until the end of the calculation, without blocking the event loop
+
+        Raises:
+            RuntimeError: If there is no job to wait to
+        """
+        if self._handler is None:
+            raise RuntimeError("Cannot wait for the job : no job is running")
+        while not self._handler.is_done:
+            if not await self.update():
+                await asyncio.sleep(self.poll_interval)
+
+    async def update(self) -> bool:  # type: ignore[override]
+        """
+        Check for updates in calculus in Armonik
+
+        Raises:
+            RuntimeError: If there is no running job
+
+        Returns:
+            bool: If it found new updates
+        """
+        if self._handler is None:
+            raise RuntimeError("Cannot update the job : no job is running")
+        return await self._handler.update_async()
+
+    async def get_update(self) -> list[list]:  # type: ignore[override]
+        """
+        Retrieve the update that were already found (to call after 'update()')
+
+        Raises:
+            RuntimeError: If there is no job running
+
+        Returns:
+            list[list]: The new updates ([] if no updates)
+        """
+        if self._handler is None:
+            raise RuntimeError("Cannot get the update of the job : no job is running")
+        return self._to_elements(await self._handler.get_update_async())
+
+    async def get_result(self) -> list[list]:  # type: ignore[override]
+        """
+        Check for updates in armoniK, if the computation if completed after that, returns it
+
+        Raises:
+            RuntimeError: If there is no job running
+            RuntimeError: If the computation isn't ready
+
+        Returns:
+            list[list]: The result of the total computation
+        """
+        if self._handler is None:
+            raise RuntimeError("Cannot retrieve a result from a job if there is not job")
+        if not self._handler.is_done:
+            await self.update()
+            if not self._handler.is_done:
+                raise RuntimeError("Tried to retrieve the result when is wasn't ready")
+        return self._to_elements(self._handler.get_result())
+
+    async def results(self) -> AsyncIterator[list]:
+        """
+        Iterates over the failing sets of the running job as soon as they are found, ends with the job
+
+        Raises:
+            RuntimeError: If there is no job running
+
+        Yields:
+            list: A failing set
+        """
+        if self._handler is None:
+            raise RuntimeError("Cannot iterate over the results of a job if there is not job")
+        while True:
+            found = await self.update()
+            for update in await self.get_update():
+                for failing_set in _as_failing_sets(update):
+                    yield failing_set
+            if self._handler.is_done:
+                return
+            if not found:
+                await asyncio.sleep(self.poll_interval)
+
+    # To handle PymoniK session
+
+    async def open(self):  # type: ignore[override]
+        """
+        Open the PymoniK session
+        """
+        await asyncio.to_thread(super().open)
+
+    async def close(self):  # type: ignore[override]
+        """
+        Close the PymoniK session
+        """
+        await asyncio.to_thread(super().close)
+
+    def __del__(self):
+        # The coroutine cannot be awaited from the destructor
+        if hasattr(self, "_session"):
+            Lockcell.close(self)
+
+    # For usage with context : async with
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def _as_failing_sets(update: list) -> list[list]:
+    """
+    The handlers buffer either a single failing set or the list of failing sets of a whole
+    iteration, normalizes both to a list of failing sets
+    """
+    if not update:
+        return []
+    if isinstance(update[0], list):
+        return update
+    return [update]
@@ -0,0 +1,4 @@
+from .local import LocalPymonik, LocalTasksFinder, LocalResultsFinder
+from .coordinator import CoordinatorPymonik
+
+__all__ = ["LocalPymonik", "LocalTasksFinder", "LocalResultsFinder", "CoordinatorPymonik"]
@@ -0,0 +1,305 @@
+"""
+Inline aggregation for Lockcell.
+
+On a cluster, every hop of the split tree pays a round trip through the scheduler, and most of the
+tasks on the critical path (`nAGG`, `nAGG2`, `nAnalyser`, `nBatchJoin`, the `nTask`s resubmitted
+with a known result...) only combine the answers of their dependencies in a few milliseconds.
+
+`CoordinatorPymonik` runs the whole task graph next to the client, on a small local process pool (it
+is a `LocalPymonik`), and only sends the tests to the cluster: every `nTask` or `nBatch` that runs
+tests is split into a `nTest` submitted to the remote session, and a local continuation given its
+results. The aggregators run as soon as the tests they depend on are done, without a scheduling hop.
+"""
+
+import logging
+import operator
+import threading
+import time
+import traceback
+import uuid
+
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cloudpickle as pickle
+
+from armonik.common import Result, ResultStatus, TaskDefinition, TaskOptions
+from pymonik import Pymonik, ResultHandle
+from pymonik.utils import LazyArgs
+
+from ..Tasks.Task import nBatch, nTask, nTest
+from ..config.BaseConfig import BaseConfig
+from ..Tasks.utils import TaskTag, load_config, published_prefix
+from .local import LocalPymonik, _LocalTask, _read, _write
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _RemoteOutcome:
+    """
+    Results of a `nTest` downloaded by the watcher, handed to the scheduler.
+    """
+
+    local_id: str
+    data: Optional[bytes] = None
+    error: Optional[str] = None
+    # The failing sets found by a `nTask` run whole on the remote session, to publish again
+    thrown: Optional[Tuple[str, bytes]] = None
+
+
+class CoordinatorPymonik(LocalPymonik):
+    """
+    PymoniK client running the aggregators on a local process pool and the tests on a remote session.
+
+    The tasks are scheduled like on `LocalPymonik`, except that the tasks running tests are split
+    before being scheduled: their tests are submitted to `remote` as a single `nTest`, and the task
+    itself becomes a local continuation that depends on a placeholder result, filled with the results
+    of the tests once the `nTest` is done. Cancelling a continuation cancels its `nTest` when the
+    remote session is local.
+    """
+
+    # Time in seconds between two checks of the remote tests when none ended
+    REMOTE_POLL_INTERVAL = 0.02
+    # Maximum number of results asked to the remote session in a single request
+    REMOTE_BATCH_SIZE = 100
+    # Default size of the local process pool of the aggregators
+    COORDINATOR_WORKERS = 2
+
+    def __init__(self, remote: Pymonik, max_workers: Optional[int] = None):
+        """
+        Args:
+            remote (Pymonik): The session running the tests (an ArmoniK or a local session).
+            max_workers (Optional[int]): Size of the local process pool of the aggregators.
+                Defaults to COORDINATOR_WORKERS.
+        """
+        super().__init__(
+            endpoint=remote._endpoint,
+            partition=remote._partition,
+            max_workers=max_workers or self.COORDINATOR_WORKERS,
+            task_options=remote.task_options,
+        )
+        self.remote: Pymonik = remote
+        self._watcher: Optional[threading.Thread] = None
+        # The local results filled by the tasks running on the remote session, with the function
+        # turning the remote result into the local one and the prefix of the failing sets to publish
+        # again (see '_forward'), by remote result id
+        self._remote_tests: Dict[str, Tuple[str, Callable[[Any], Any], Optional[str]]] = {}
+        # Remote result ids, by placeholder
+        self._placeholders: Dict[str, str] = {}
+        self.remote_tests: int = 0
+
+    ### Session
+
+    def create(self, task_handler=None, expected_output=None) -> "CoordinatorPymonik":
+        if self._connected:
+            return self
+        self.remote = self.remote.create()
+        super().create()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, name="lockcell-coordinator-watcher", daemon=True
+        )
+        self._watcher.start()
+        return self
+
+    def close(self):
+        if not self._connected:
+            return
+        super().close()
+        if self._watcher is not None:
+            self._watcher.join()
+        self.remote.close()
+
+    def put(self, obj, name: Optional[str] = None) -> ResultHandle:
+        """
+        Uploads an object to the remote session, where the tests can read it, and keeps a copy under
+        the same id for the local tasks
+        """
+        handle = self.remote.put(obj, name)
+        with self._lock:
+            _write(self._data_folder, handle.result_id, pickle.dumps(obj))
+            self._available.add(handle.result_id)
+        return ResultHandle(handle.result_id, self._session_id, self)  # type: ignore
+
+    def get_resource_data(self, result_id: str) -> bytes:
+        """
+        Reads a result of the local session, like the handler of a task (see 'Tasks.utils.load_config')
+        """
+        return _read(self._data_folder, result_id)
+
+    ### Scheduler (under self._lock)
+
+    def _add_task(
+        self,
+        definition: TaskDefinition,
+        options: TaskOptions,
+        parent_id: Optional[str],
+        job: str = "",
+        root_id: Optional[str] = None,
+    ):
+        split = self._split_tests(definition, options)
+        if split is not None:
+            super()._add_task(split, options, parent_id, job, root_id)
+
+    def _split_tests(
+        self, definition: TaskDefinition, options: TaskOptions
+    ) -> Optional[TaskDefinition]:
+        """
+        Submits the tests of the task to the remote session, and returns the definition of its local
+        continuation (the definition itself if the task doesn't run tests). A `nTask` on a delta
+        small enough to be minimized inside a single task is submitted whole, without continuation
+        """
+        payload = pickle.loads(_read(self._data_folder, definition.payload_id))
+        args = list(pickle.loads(payload["args"].pickled_args))
+
+        if payload["func_name"] == nTask.func_name:
+            # (delta, n, config, me, Recurse, Result, oneSub), with the defaults of Recurse and Result
+            args += [True, None][len(args) - 4 :]
+            if args[5] is not None:
+                return definition
+            config, deltas = load_config(self, args[2]), [args[0]]
+            if args[4] and args[3] is None and 1 < len(args[0]) <= config.get_collapse_size():
+                self._forward(definition, args, config, options)
+                return None
+            position, transform = 5, operator.itemgetter(0)
+        elif payload["func_name"] == nBatch.func_name:
+            batch = args[0]
+            deltas = [entry[0] for entry in batch if len(entry) <= 5 or entry[5] is None]
+            if not deltas or len(args) > 1:
+                return definition
+            config = batch[0][2]
+            args.append(None)
+            position, transform = 1, list
+        else:
+            return definition
+
+        handle = nTest.invoke(  # type: ignore
+            config, deltas, pymonik=self.remote, task_options=options
+        )
+        placeholder = str(uuid.uuid4())
+        self._remote_tests[handle.result_id] = (placeholder, transform, None)
+        self._placeholders[placeholder] = handle.result_id
+        self.remote_tests += 1
+
+        args[position] = f"__result_handle__{placeholder}"
+        payload["args"] = LazyArgs(args)
+        payload_id = str(uuid.uuid4())
+        _write(self._data_folder, payload_id, pickle.dumps(payload))
+        self._available.add(payload_id)
+        return TaskDefinition(
+            payload_id=payload_id,
+            expected_output_ids=list(definition.expected_output_ids),
+            data_dependencies=list(definition.data_dependencies) + [placeholder],
+            options=options,
+        )
+
+    def _forward(
+        self, definition: TaskDefinition, args: list, config: BaseConfig, options: TaskOptions
+    ):
+        """
+        Submits the `nTask` of 'definition' to the remote session, its answer is the result of the task.
+        The failing sets it throws are published in the remote session, they are published again from
+        its answer so that the client still finds them
+        """
+        handle = nTask.invoke(*args, pymonik=self.remote, task_options=options)  # type: ignore
+        self._remote_tests[handle.result_id] = (
+            definition.expected_output_ids[0],
+            lambda answer: answer,
+            published_prefix(TaskTag.THROWN, config.namespace),
+        )
+        self.remote_tests += 1
+
+    def _cancel_where(self, predicate) -> List[_LocalTask]:
+        cancelled = super()._cancel_where(predicate)
+        remote_ids = [
+            self._placeholders[dependency]
+            for task in cancelled
+            for dependency in task.definition.data_dependencies
+            if dependency in self._placeholders
+        ]
+        if remote_ids and isinstance(self.remote, LocalPymonik):
+            self.remote.cancel_results(remote_ids)
+        return cancelled
+
+    def _on_event(self, event: Any):
+        if not isinstance(event, _RemoteOutcome):
+            return super()._on_event(event)
+        self._placeholders.pop(event.local_id, None)
+        if event.error is not None:
+            self._abort_result(event.local_id, event.error)
+            return
+        if event.thrown is not None:
+            name, data = event.thrown
+            result = Result(session_id=self._session_id, name=name, result_id=str(uuid.uuid4()))
+            _write(self._data_folder, result.result_id, data)
+            self._created.append(result)
+            self._make_available(result.result_id)
+        _write(self._data_folder, event.local_id, event.data)  # type: ignore
+        self._make_available(event.local_id)
+
+    ### Remote tests
+
+    def _watch_loop(self):
+        """
+        Downloads the results of the remote tests as they end, and hands them to the scheduler
+        """
+        while self._connected:
+            with self._lock:
+                pending = list(self._remote_tests)
+            try:
+                ended = self._remote_ended(pending) if pending else {}
+            except Exception as e:
+                logger.error(f"Remote tests watcher error : {e}\n{traceback.format_exc()}")
+                ended = {}
+
+            for remote_id, error in ended.items():
+                with self._lock:
+                    local_id, transform, thrown_prefix = self._remote_tests.pop(remote_id)
+                outcome = _RemoteOutcome(local_id, error=error)
+                if error is None:
+                    try:
+                        value = pickle.loads(
+                            self.remote._results_client.download_result_data(  # type: ignore
+                                remote_id, self.remote._session_id
+                            )
+                        )
+                        outcome.data = pickle.dumps(transform(value))
+                        if thrown_prefix is not None and value[0]:
+                            name = f"{thrown_prefix}{uuid.uuid4()}"
+                            outcome.thrown = (name, pickle.dumps(value[0]))
+                    except Exception as e:
+                        outcome.error = f"Could not download the tests {remote_id} : {e}"
+                self._events.put(outcome)
+
+            if not ended:
+                time.sleep(self.REMOTE_POLL_INTERVAL)
+
+    def _remote_ended(self, remote_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns the remote tests among 'remote_ids' that ended, with the reason of their abortion (None
+        when they are completed)
+        """
+        ended: Dict[str, Optional[str]] = {}
+        if isinstance(self.remote, LocalPymonik):
+            for remote_id in remote_ids:
+                try:
+                    if self.remote.is_available(remote_id):
+                        ended[remote_id] = None
+                except RuntimeError as e:
+                    ended[remote_id] = str(e)
+            return ended
+
+        for start in range(0, len(remote_ids), self.REMOTE_BATCH_SIZE):
+            batch = remote_ids[start : start + self.REMOTE_BATCH_SIZE]
+            result_filter = reduce(operator.or_, (Result.result_id == r for r in batch))
+            _, results = self.remote._results_client.list_results(  # type: ignore
+                result_filter, page_size=len(batch)
+            )
+            for result in results:
+                if result.status == ResultStatus.COMPLETED:
+                    ended[result.result_id] = None
+                elif result.status == ResultStatus.ABORTED:
+                    ended[result.result_id] = f"The tests {result.result_id} were aborted"
+        return ended
@@ -0,0 +1,841 @@
+"""
+Local execution backend for Lockcell.
+
+`LocalPymonik` is a drop-in replacement of the PymoniK client that runs the task graph on a
+`concurrent.futures` process pool instead of an ArmoniK cluster. It emulates the parts of ArmoniK
+the tasks rely on (results, data dependencies, delegation, subtasking and task options), so that the
+tasks of `Tasks/Task.py` and `Tasks/TaskMaster.py` run unchanged.
+
+Like on ArmoniK, results are stored in a data folder shared by the workers, and the subtasks submitted
+by a task are only scheduled once this task is completed.
+
+When several jobs share the session (see `JobManager`), the workers can be shared between them: a
+task belongs to the job named by its `LOCKCELL_JOB_TAG` option, or else to the job of the task that
+submitted it, and the jobs given a share are served in weighted round-robin.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import cloudpickle as pickle
+
+from armonik.common import Result, Task, TaskDefinition, TaskOptions, TaskStatus
+from pymonik import Pymonik, PymonikContext, ResultHandle, MultiResultHandle
+
+from ..config.BaseConfig import percentile
+from ..constants import LOCKCELL_BACKUP_TAG, LOCKCELL_TAG, LOCKCELL_JOB_TAG
+
+
+logger = logging.getLogger(__name__)
+
+FUNCTION_PREFIX = "__function__"
+
+
+### Worker side ######################################################################################
+
+
+class LocalTaskHandler:
+    """
+    Minimal equivalent of `armonik.worker.TaskHandler` for the local backend.
+
+    Results created or sent by the task are written in the shared data folder, submitted tasks are
+    recorded and handed back to the scheduler when the task ends.
+    """
+
+    def __init__(
+        self,
+        data_folder: str,
+        session_id: str,
+        task_id: str,
+        task_options: TaskOptions,
+        payload_id: str,
+        data_dependencies: List[str],
+        expected_results: List[str],
+    ):
+        self.data_folder = data_folder
+        self.session_id = session_id
+        self.task_id = task_id
+        self.token = task_id
+        self.task_options = task_options
+        self.payload_id = payload_id
+        self.expected_results = expected_results
+        self.data_dependencies = _LazyData(data_folder, data_dependencies)
+
+        self.created: Dict[str, str] = {}  # result_id -> name
+        self.sent: List[str] = []
+        self.submitted: List[TaskDefinition] = []
+
+    @property
+    def payload(self) -> bytes:
+        return _read(self.data_folder, self.payload_id)
+
+    def create_results_metadata(self, result_names: List[str], batch_size: int = 100):
+        return {name: self._new_result(name) for name in result_names}
+
+    def create_results(self, results_data: Dict[str, bytes], batch_size: int = 1):
+        results = {}
+        for name, data in results_data.items():
+            result = self._new_result(name)
+            _write(self.data_folder, result.result_id, data)
+            self.created[result.result_id] = name
+            results[name] = result
+        return results
+
+    def submit_tasks(
+        self,
+        tasks: List[TaskDefinition],
+        default_task_options: Optional[TaskOptions] = None,
+        batch_size: Optional[int] = 100,
+    ):
+        for t in tasks:
+            # Options are frozen at submission, like when they are sent to the ArmoniK agent
+            options = deepcopy(t.options if t.options else default_task_options)
+            self.submitted.append(
+                TaskDefinition(
+                    payload_id=t.payload_id,
+                    expected_output_ids=list(t.expected_output_ids),
+                    data_dependencies=list(t.data_dependencies),
+                    options=options,
+                )
+            )
+        return []
+
+    def send_results(self, results_data: Dict[str, bytes]) -> None:
+        for result_id, data in results_data.items():
+            _write(self.data_folder, result_id, data)
+            self.sent.append(result_id)
+
+    def get_resource_data(self, result_id: str) -> bytes:
+        return _read(self.data_folder, result_id)
+
+    def _new_result(self, name: str) -> Result:
+        return Result(session_id=self.session_id, name=name, result_id=str(uuid.uuid4()))
+
+
+class _LazyData(dict):
+    """
+    Dict of data dependencies, read from the data folder on first access.
+    """
+
+    def __init__(self, data_folder: str, ids: List[str]):
+        super().__init__()
+        self._data_folder = data_folder
+        self._ids = set(ids)
+
+    def __missing__(self, key: str) -> bytes:
+        if key not in self._ids:
+            raise KeyError(key)
+        value = _read(self._data_folder, key)
+        self[key] = value
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._ids
+
+
+@dataclass
+class _TaskOutcome:
+    """
+    What a local task hands back to the scheduler when it ends.
+    """
+
+    created: Dict[str, str]
+    sent: List[str]
+    submitted: List[TaskDefinition]
+    duration: float
+
+
+# Functions already unpickled by this worker process, by function result id
+_FUNCTIONS: Dict[str, Any] = {}
+
+
+def _run_local_task(
+    data_folder: str,
+    session_id: str,
+    task_id: str,
+    task_options: TaskOptions,
+    payload_id: str,
+    data_dependencies: List[str],
+    expected_results: List[str],
+    known_functions: Dict[str, Result],
+    environment: Dict[str, Any],
+    own_process: bool = True,
+) -> _TaskOutcome:
+    """
+    Execute one task in a worker process, mirroring `pymonik.run_pymonik_worker`.
+
+    The environment variables are only set when the task runs in its own process ('own_process'):
+    the tasks running on a thread pool share the environment of the process, they would leak into
+    each other.
+    """
+    start = time.perf_counter()
+    handler = LocalTaskHandler(
+        data_folder,
+        session_id,
+        task_id,
+        task_options,
+        payload_id,
+        data_dependencies,
+        expected_results,
+    )
+    if own_process:
+        for key, value in environment.get("env_variables", {}).items():
+            os.environ[key] = value
+
+    payload = pickle.loads(handler.payload)
+    func_id = payload["func_id"]
+
+    # Not using LazyArgs.get_args() since it prints on every task
+    args = []
+    for arg in pickle.loads(payload["args"].pickled_args):
+        if isinstance(arg, str) and arg == "__no_input__":
+            continue
+        elif isinstance(arg, str) and arg.startswith("__result_handle__"):
+            result_id = arg[len("__result_handle__") :]
+            args.append(pickle.loads(handler.data_dependencies[result_id]))
+        elif isinstance(arg, str) and arg.startswith("__multi_result_handle__"):
+            result_ids = arg[len("__multi_result_handle__") :].split(",")
+            args.append([pickle.loads(handler.data_dependencies[r]) for r in result_ids])
+        else:
+            args.append(arg)
+
+    if func_id not in _FUNCTIONS:
+        _FUNCTIONS[func_id] = pickle.loads(handler.data_dependencies[func_id])
+    func = _FUNCTIONS[func_id]
+
+    if payload["require_context"]:
+        args = [PymonikContext(handler, logger)] + args  # type: ignore
+
+    worker = Pymonik(is_worker=True, environment=environment)
+    worker.create(task_handler=handler, expected_output=expected_results[0])  # type: ignore
+    # Avoids uploading again the functions that are already registered in the session
+    worker.remote_functions.update(known_functions)
+    with worker:
+        result = func(*args)
+
+    if not isinstance(result, (ResultHandle, MultiResultHandle)):
+        handler.send_results({expected_results[0]: pickle.dumps(result)})
+
+    return _TaskOutcome(
+        handler.created, handler.sent, handler.submitted, time.perf_counter() - start
+    )
+
+
+def _read(data_folder: str, result_id: str) -> bytes:
+    with open(os.path.join(data_folder, result_id), "rb") as f:
+        return f.read()
+
+
+def _write(data_folder: str, result_id: str, data: bytes | bytearray):
+    path = os.path.join(data_folder, result_id)
+    # Write then rename, so that a reader never sees a partially written result
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+### Client side ######################################################################################
+
+
+@dataclass
+class _LocalTask:
+    task_id: str
+    definition: TaskDefinition
+    options: TaskOptions
+    parent_id: Optional[str]
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    retries: int = 0
+    missing: int = 0
+    job: str = ""
+    root_id: str = ""
+    # Time at which the first running copy of the task started, and its backup copy if any
+    started: Optional[float] = None
+    backup: Optional[Future] = None
+    copies: int = 0
+    done: bool = False
+
+    def to_task(self, session_id: str, status: TaskStatus) -> Task:
+        return Task(
+            id=self.task_id,
+            session_id=session_id,
+            created_by=self.parent_id,
+            data_dependencies=self.definition.data_dependencies,
+            expected_output_ids=self.definition.expected_output_ids,
+            status=status,
+            options=self.options,
+            created_at=self.created_at,
+            ended_at=datetime.now(timezone.utc),
+            payload_id=self.definition.payload_id,
+        )
+
+
+_WAKE = object()
+
+
+class _LocalResultsClient:
+    """
+    Replaces the `ArmoniKResults` client used by `ResultHandle.get()`.
+    """
+
+    def __init__(self, session: "LocalPymonik"):
+        self._session = session
+
+    def download_result_data(self, result_id: str, session_id: str) -> bytes:
+        return _read(self._session._data_folder, result_id)
+
+
+class LocalPymonik(Pymonik):
+    """
+    PymoniK client executing the tasks on a local process pool.
+
+    Tasks are dispatched by priority as soon as all their data dependencies are available, with at most
+    `max_workers` tasks running at the same time. Failing tasks are retried `max_retries` times, then their
+    results are aborted (and so are the tasks depending on them).
+    The jobs given a share with `set_share` have their own queue, the next task is taken from the queue
+    of the job that was served the least relatively to its share.
+    When a worker is idle, the tasks with a backup policy (see `BaseConfig.set_straggler_policy`) that
+    run for much longer than the other tasks of their job get a backup copy, the first copy to end
+    gives the results and the other one is ignored.
+    """
+
+    # Time in seconds between two checks of the running tasks when some of them may need a backup
+    BACKUP_CHECK_INTERVAL = 0.05
+    # Number of durations of the tasks of a job measured before starting backup copies
+    MIN_BACKUP_SAMPLES = 8
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = None,
+        partition: Optional[str | List[str]] = "pymonik",
+        environment: Dict[str, Any] = {},
+        max_workers: Optional[int] = None,
+        task_options: Optional[TaskOptions] = None,
+        use_threads: bool = False,
+    ):
+        """
+        Args:
+            endpoint (Optional[str]): Ignored, kept for signature compatibility with `Pymonik`.
+            partition (Optional[str | List[str]]): Partition written in the default task options.
+            environment (Dict[str, Any]): Only the `env_variables` entry is applied in the workers
+                (not on a thread pool, where the tasks share the environment of this process).
+            max_workers (Optional[int]): Size of the process pool. Defaults to `os.cpu_count()`.
+            task_options (Optional[TaskOptions]): Default task options.
+            use_threads (bool): Run the tasks on a thread pool of this process instead of a process
+                pool, to run a small task graph inside a task (see `Tasks.Task._collapse`).
+        """
+        super().__init__(
+            endpoint=endpoint,
+            partition=partition,
+            environment=environment,
+            task_options=task_options,
+        )
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.use_threads: bool = use_threads
+
+        self._lock = threading.Condition()
+        self._events: queue.Queue = queue.Queue()
+        self._executor: Optional[Executor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._data_folder: str = ""
+
+        self._available: set[str] = set()
+        self._aborted: Dict[str, str] = {}
+        self._waiting: Dict[str, _LocalTask] = {}
+        self._blocked: Dict[str, List[str]] = {}
+        self._ready: Dict[str, list] = {}
+        self._shares: Dict[str, float] = {}
+        self._served: Dict[str, float] = {}
+        self._running: Dict[Future, _LocalTask] = {}
+        self._completed: List[Task] = []
+        self._created: List[Result] = []
+        self._counter = itertools.count()
+        # Task graphs submitted by the client, by root task, and the ones that were cancelled
+        self._roots: Dict[str, str] = {}
+        self._cancelled_roots: set[str] = set()
+        # Run times of the completed tasks with a backup policy, by job
+        self._durations: Dict[str, List[float]] = {}
+        self.backup_tasks: int = 0
+        self.backup_wins: int = 0
+
+    ### Session
+
+    def create(self, task_handler=None, expected_output=None) -> "LocalPymonik":
+        if self._connected:
+            return self
+        self._session_id = str(uuid.uuid4())
+        self._data_folder = tempfile.mkdtemp(prefix=f"lockcell-{self._session_id}-")
+        self._results_client = _LocalResultsClient(self)
+        executor = ThreadPoolExecutor if self.use_threads else ProcessPoolExecutor
+        self._executor = executor(max_workers=self.max_workers)
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="lockcell-local-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+        self._connected = True
+        self._session_created = True
+        return self
+
+    def close(self):
+        if not self._connected:
+            return
+        self._connected = False
+        self._session_created = False
+        self._events.put(None)
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            # Wakes up the clients still waiting for a result
+            self._lock.notify_all()
+        shutil.rmtree(self._data_folder, ignore_errors=True)
+
+    def cancel(self):
+        self.close()
+
+    ### Overrides of the PymoniK dispatch methods (client side)
+
+    def _dispatch_create_metadata(self, names: List[str]) -> Dict[str, Result]:
+        return {
+            name: Result(session_id=self._session_id, name=name, result_id=str(uuid.uuid4()))
+            for name in names
+        }
+
+    def _dispatch_create_payloads(self, payloads: Dict[str, bytes]) -> Dict[str, Result]:
+        results = {}
+        with self._lock:
+            for name, data in payloads.items():
+                result_id = str(uuid.uuid4())
+                _write(self._data_folder, result_id, data)
+                self._available.add(result_id)
+                results[name] = Result(session_id=self._session_id, name=name, result_id=result_id)
+        return results
+
+    def _dispatch_submit_tasks(
+        self, task_definitions: List[TaskDefinition], task_options: Optional[TaskOptions] = None
+    ) -> None:
+        with self._lock:
+            for definition in task_definitions:
+                options = deepcopy(definition.options if definition.options else task_options)
+                self._add_task(definition, options, None)
+        self._events.put(_WAKE)
+
+    def _wait_for_results_availability(self, session_id: str, result_ids: List[str]):
+        with self._lock:
+            while True:
+                for result_id in result_ids:
+                    if result_id in self._aborted:
+                        raise RuntimeError(
+                            f"Result {result_id} has been aborted : {self._aborted[result_id]}"
+                        )
+                if all(result_id in self._available for result_id in result_ids):
+                    return
+                if not self._connected:
+                    raise RuntimeError("The local session was closed while waiting for results")
+                self._lock.wait()
+
+    ### Queries used by the Lockcell handlers
+
+    def is_available(self, result_id: str) -> bool:
+        """
+        Non-blocking check of the availability of a result.
+
+        Raises:
+            RuntimeError: If the result was aborted
+        """
+        with self._lock:
+            if result_id in self._aborted:
+                raise RuntimeError(
+                    f"Result {result_id} has been aborted : {self._aborted[result_id]}"
+                )
+            return result_id in self._available
+
+    def cancel_results(self, result_ids: List[str]) -> List[str]:
+        """
+        Cancels the tasks producing the results `result_ids` that haven't started yet, their results
+        are aborted (and so are the tasks depending on them). The running tasks cannot be interrupted
+        and end normally.
+
+        Returns:
+            List[str]: The ids of the results whose task was cancelled.
+        """
+        targets = set(result_ids)
+        with self._lock:
+            cancelled = self._cancel_where(
+                lambda task: not targets.isdisjoint(task.definition.expected_output_ids)
+            )
+        return [
+            r
+            for task in cancelled
+            for r in targets.intersection(task.definition.expected_output_ids)
+        ]
+
+    def set_share(self, job: str, share: float):
+        """
+        Gives the job `job` its own queue, served proportionally to `share` when other jobs have tasks
+        ready (the tasks of the jobs without a share are served together, with a share of 1).
+        """
+        if share <= 0:
+            raise ValueError("share must be a positive number")
+        with self._lock:
+            self._shares[job] = share
+
+    def cancel_graphs(self, result_ids: List[str]) -> int:
+        """
+        Cancels the task graphs submitted by the client to produce `result_ids`: their tasks that haven't
+        started yet are cancelled, and so are the tasks submitted later by their running tasks.
+
+        Returns:
+            int: The number of cancelled tasks.
+        """
+        with self._lock:
+            roots = {self._roots[r] for r in result_ids if r in self._roots}
+            self._cancelled_roots |= roots
+            return len(self._cancel_where(lambda task: task.root_id in roots))
+
+    def straggler_stats(self) -> Dict[str, float]:
+        """
+        Returns the statistics of the tasks with a backup policy: the number of backup copies started,
+        the number of them that ended first, and the median, 95th percentile and longest run time
+        """
+        with self._lock:
+            durations = [d for job in self._durations.values() for d in job]
+        stats: Dict[str, float] = {
+            "backup_tasks": self.backup_tasks,
+            "backup_wins": self.backup_wins,
+            "tasks": len(durations),
+        }
+        if durations:
+            stats["p50"] = percentile(durations, 0.5)
+            stats["p95"] = percentile(durations, 0.95)
+            stats["max"] = max(durations)
+        return stats
+
+    def completed_tasks(self, start: int = 0) -> List[Task]:
+        """
+        Returns the completed tasks, in completion order, from the index `start`.
+        """
+        with self._lock:
+            return self._completed[start:]
+
+    def created_results(self, start: int = 0) -> List[Result]:
+        """
+        Returns the results created with their data by the tasks, in creation order, from the index `start`.
+        """
+        with self._lock:
+            return self._created[start:]
+
+    ### Scheduler (under self._lock)
+
+    def _cancel_where(self, predicate) -> List[_LocalTask]:
+        cancelled = [
+            task
+            for task in list(self._waiting.values())
+            + [entry[2] for queue_ in self._ready.values() for entry in queue_]
+            if predicate(task)
+        ]
+        if not cancelled:
+            return []
+        cancelled_ids = {task.task_id for task in cancelled}
+        for task in cancelled:
+            # Already aborted with a cancelled dependency
+            if any(r in self._aborted for r in task.definition.expected_output_ids):
+                continue
+            self._waiting.pop(task.task_id, None)
+            self._abort(task, "cancelled", TaskStatus.CANCELLED)
+        for job, queue_ in self._ready.items():
+            self._ready[job] = [e for e in queue_ if e[2].task_id not in cancelled_ids]
+            heapq.heapify(self._ready[job])
+        self._lock.notify_all()
+        return cancelled
+
+    def _add_task(
+        self,
+        definition: TaskDefinition,
+        options: TaskOptions,
+        parent_id: Optional[str],
+        job: str = "",
+        root_id: Optional[str] = None,
+    ):
+        job = (options.options or {}).get(LOCKCELL_JOB_TAG, job)
+        task = _LocalTask(str(uuid.uuid4()), definition, options, parent_id, job=job)
+        task.root_id = root_id or task.task_id
+        if root_id is None:
+            for result_id in definition.expected_output_ids:
+                self._roots[result_id] = task.task_id
+        if task.root_id in self._cancelled_roots:
+            self._abort(task, "cancelled", TaskStatus.CANCELLED)
+            return
+        for dependency in definition.data_dependencies:
+            if dependency in self._aborted:
+                self._abort(task, f"dependency {dependency} was aborted")
+                return
+            if dependency not in self._available:
+                task.missing += 1
+                self._blocked.setdefault(dependency, []).append(task.task_id)
+        if task.missing == 0:
+            self._push_ready(task)
+        else:
+            self._waiting[task.task_id] = task
+
+    def _push_ready(self, task: _LocalTask):
+        job = task.job if task.job in self._shares else ""
+        queue_ = self._ready.setdefault(job, [])
+        if not queue_:
+            # A job that was idle doesn't get credit for the time it didn't use the workers
+            active = [self._served.get(j, 0.0) for j, q in self._ready.items() if q]
+            if active:
+                self._served[job] = max(self._served.get(job, 0.0), min(active))
+        # Higher priority first, then FIFO
+        heapq.heappush(queue_, (-task.options.priority, next(self._counter), task))
+
+    def _pop_ready(self) -> Optional[_LocalTask]:
+        # The job that was served the least relatively to its share first
+        ready = [job for job, queue_ in self._ready.items() if queue_]
+        if not ready:
+            return None
+        job = min(ready, key=lambda j: self._served.get(j, 0.0))
+        _, _, task = heapq.heappop(self._ready[job])
+        self._served[job] = self._served.get(job, 0.0) + 1 / self._shares.get(job, 1.0)
+        return task
+
+    def _make_available(self, result_id: str):
+        self._available.add(result_id)
+        for task_id in self._blocked.pop(result_id, []):
+            task = self._waiting.get(task_id)
+            if task is None:
+                continue
+            task.missing -= 1
+            if task.missing == 0:
+                del self._waiting[task_id]
+                self._push_ready(task)
+
+    def _abort(self, task: _LocalTask, reason: str, status: TaskStatus = TaskStatus.ERROR):
+        self._completed.append(task.to_task(self._session_id, status))
+        for result_id in task.definition.expected_output_ids:
+            self._abort_result(result_id, reason)
+
+    def _abort_result(self, result_id: str, reason: str):
+        self._aborted[result_id] = reason
+        for task_id in self._blocked.pop(result_id, []):
+            blocked = self._waiting.pop(task_id, None)
+            if blocked is not None:
+                self._abort(blocked, f"dependency {result_id} was aborted")
+
+    def _launch_ready(self):
+        assert self._executor is not None
+        while len(self._running) < self.max_workers:
+            task = self._pop_ready()
+            if task is None:
+                return
+            self._start(task)
+
+    def _start(self, task: _LocalTask) -> Future:
+        assert self._executor is not None
+        future = self._executor.submit(
+            _run_local_task,
+            self._data_folder,
+            self._session_id,
+            task.task_id,
+            task.options,
+            task.definition.payload_id,
+            task.definition.data_dependencies,
+            task.definition.expected_output_ids,
+            self.remote_functions,
+            self.environment,
+            not self.use_threads,
+        )
+        if task.copies == 0:
+            task.started = time.monotonic()
+        task.copies += 1
+        self._running[future] = task
+        future.add_done_callback(self._events.put)
+        return future
+
+    def _backup_deadline(self, task: _LocalTask) -> Optional[float]:
+        """
+        Run time after which 'task' gets a backup copy, None if it has no backup policy or while too
+        few tasks of its job were measured
+        """
+        policy = (task.options.options or {}).get(LOCKCELL_BACKUP_TAG)
+        durations = self._durations.get(task.job, [])
+        if policy is None or len(durations) < self.MIN_BACKUP_SAMPLES:
+            return None
+        rank, factor, minimum = (float(value) for value in policy.split(","))
+        return max(minimum, factor * percentile(durations, rank))
+
+    def _needs_backup(self, task: _LocalTask, now: float) -> bool:
+        if task.backup is not None or task.done or task.started is None:
+            return False
+        deadline = self._backup_deadline(task)
+        return deadline is not None and now - task.started > deadline
+
+    def _launch_backups(self):
+        """
+        Starts a backup copy of the stragglers on the idle workers, when no task is ready
+        """
+        if any(self._ready.values()):
+            return
+        now = time.monotonic()
+        running = {task.task_id: task for task in self._running.values()}
+        stragglers = [task for task in running.values() if self._needs_backup(task, now)]
+        for task in sorted(stragglers, key=lambda task: task.started):  # type: ignore
+            if len(self._running) >= self.max_workers:
+                return
+            logger.info(f"Task {task.task_id} is a straggler, starting a backup copy")
+            task.backup = self._start(task)
+            self.backup_tasks += 1
+
+    def _check_interval(self) -> Optional[float]:
+        """
+        Time to wait for an event before checking the stragglers again, None if no running task may
+        need a backup
+        """
+        for task in self._running.values():
+            if task.backup is None and LOCKCELL_BACKUP_TAG in (task.options.options or {}):
+                return self.BACKUP_CHECK_INTERVAL
+        return None
+
+    def _on_done(self, future: Future):
+        task = self._running.pop(future)
+        task.copies -= 1
+        if task.done:
+            # The other copy of the task already gave the results
+            return
+        try:
+            outcome: _TaskOutcome = future.result()
+        except BaseException as e:
+            if task.copies > 0:
+                logger.warning(
+                    f"A copy of the task {task.task_id} failed, waiting for the other : {e}"
+                )
+                return
+            task.backup = None
+            if task.retries < task.options.max_retries:
+                task.retries += 1
+                logger.warning(f"Task {task.task_id} failed, retrying ({task.retries}) : {e}")
+                self._push_ready(task)
+            else:
+                reason = "".join(traceback.format_exception(e))
+                logger.error(f"Task {task.task_id} failed after {task.retries} retries : {reason}")
+                self._abort(task, reason)
+            return
+
+        task.done = True
+        if future is task.backup:
+            self.backup_wins += 1
+        if LOCKCELL_BACKUP_TAG in (task.options.options or {}):
+            self._durations.setdefault(task.job, []).append(time.monotonic() - task.started)  # type: ignore
+        for result_id, name in outcome.created.items():
+            result = Result(session_id=self._session_id, name=name, result_id=result_id)
+            if FUNCTION_PREFIX in name:
+                self.remote_functions[name] = result
+            self._created.append(result)
+            self._make_available(result_id)
+        for definition in outcome.submitted:
+            self._add_task(definition, definition.options, task.task_id, task.job, task.root_id)  # type: ignore
+        for result_id in outcome.sent:
+            self._make_available(result_id)
+        self._completed.append(task.to_task(self._session_id, TaskStatus.COMPLETED))
+
+    def _on_event(self, event: Any):
+        if isinstance(event, Future):
+            self._on_done(event)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                interval = self._check_interval()
+            try:
+                event = self._events.get(timeout=interval)
+            except queue.Empty:
+                event = _WAKE
+            if event is None:
+                return
+            with self._lock:
+                try:
+                    self._on_event(event)
+                    self._launch_ready()
+                    self._launch_backups()
+                except Exception as e:
+                    logger.error(f"Local scheduler error : {e}\n{traceback.format_exc()}")
+                self._lock.notify_all()
+
+
+class LocalTasksFinder:
+    """
+    Equivalent of `events.TasksFinder` for the local backend: finds the completed tasks of the session
+    whose `LOCKCELL_TAG` option matches a tag.
+    """
+
+    def __init__(self, session: LocalPymonik, tag_value: str) -> None:
+        """
+        Args:
+            session (LocalPymonik): The local session to look into.
+            tag_value (str): The value of the `LOCKCELL_TAG` option to look for.
+        """
+        self._session = session
+        self._tag_value = tag_value
+        self._cursor = 0
+
+    def update(self) -> list[Task]:
+        """
+        Returns:
+            list[Task]: The tasks with the tag that completed since the last update.
+        """
+        completed = self._session.completed_tasks(self._cursor)
+        self._cursor += len(completed)
+        return [
+            task
+            for task in completed
+            if task.status == TaskStatus.COMPLETED
+            and task.options is not None
+            and task.options.options.get(LOCKCELL_TAG) == self._tag_value
+        ]
+
+    def close(self):
+        pass
+
+
+class LocalResultsFinder:
+    """
+    Equivalent of `events.ResultsFinder` for the local backend: finds the results created by the tasks
+    of the session whose name starts with a prefix.
+    """
+
+    def __init__(self, session: LocalPymonik, prefix: str) -> None:
+        """
+        Args:
+            session (LocalPymonik): The local session to look into.
+            prefix (str): The prefix of the names of the results to look for.
+        """
+        self._session = session
+        self._prefix = prefix
+        self._cursor = 0
+
+    def update(self) -> list[Result]:
+        """
+        Returns:
+            list[Result]: The results with the prefix that were created since the last update.
+        """
+        created = self._session.created_results(self._cursor)
+        self._cursor += len(created)
+        return [result for result in created if result.name.startswith(self._prefix)]
+
+    def close(self):
+        pass
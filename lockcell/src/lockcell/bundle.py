@@ -0,0 +1,155 @@
+"""
+Code bundle of Lockcell for the workers.
+
+By default, the modules holding the code of the tasks are pickled by value (see lockcell/__init__.py):
+the workers don't need Lockcell installed, but every payload carries the code of the classes it
+references (configurations, results...) and the workers execute it again for every task.
+
+A `CodeBundle` is a wheel of this version of Lockcell, named after the hash of its content, that the
+workers install once through the PymoniK environment of the session. The modules of Lockcell are then
+pickled by reference and imported normally by the workers, the payloads only carry the arguments.
+The classes of the user (like a configuration defined in a script) are still pickled by value.
+
+    bundle = build_code_bundle("/shared/lockcell-bundles")
+    with Lockcell(endpoint, config=config, code_bundle=bundle) as lock:
+        ...
+"""
+
+import base64
+import hashlib
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, List, Optional
+
+import cloudpickle
+
+# Length of the prefix of the content hash kept in the version of the bundle
+DIGEST_LENGTH = 16
+
+
+@dataclass(frozen=True)
+class CodeBundle:
+    """
+    Wheel of Lockcell shipped to the workers
+
+    Attributes:
+        path (str): The path of the wheel, it must be readable by the workers (shared storage)
+        digest (str): The hash of the content of the package
+        version (str): The version of the wheel, the version of Lockcell tagged with the digest
+    """
+
+    path: str
+    digest: str
+    version: str
+
+    def environment(self, environment: dict[str, Any]) -> dict[str, Any]:
+        """
+        Returns 'environment' with the installation of the bundle, and the configuration file of
+        Lockcell (imported with the package) in the environment variables
+        """
+        merged = dict(environment)
+        merged["pip"] = list(environment.get("pip", [])) + [self.path]
+        env_variables = {"LOCKCELL_CONFIG": os.environ["LOCKCELL_CONFIG"]}
+        env_variables.update(environment.get("env_variables", {}))
+        merged["env_variables"] = env_variables
+        return merged
+
+
+def _code_modules() -> List[ModuleType]:
+    """
+    The modules holding the code run by the tasks
+    """
+    from .config import BaseConfig, priority, TestConfig
+    from .Tasks import utils, Results, Task, TaskMaster
+    from . import VerrouConf
+
+    return [BaseConfig, priority, utils, TestConfig, VerrouConf, Results, Task, TaskMaster]
+
+
+def set_code_bundle(bundle: Optional[CodeBundle]):
+    """
+    Chooses how the code of the tasks is sent to the workers, for the whole process: pickled by
+    value with every task (None), or imported from 'bundle' by the workers
+
+    Args:
+        bundle (Optional[CodeBundle]): The bundle installed on the workers, None to send the code
+            with the tasks
+    """
+    for module in _code_modules():
+        if bundle is None:
+            cloudpickle.register_pickle_by_value(module)
+        elif module.__name__ in cloudpickle.list_registry_pickle_by_value():
+            cloudpickle.unregister_pickle_by_value(module)
+
+
+def _package_files(root: Path) -> List[Path]:
+    return sorted(
+        path
+        for path in root.rglob("*")
+        if path.is_file() and "__pycache__" not in path.parts and path.suffix != ".pyc"
+    )
+
+
+def package_digest() -> str:
+    """
+    Returns the hash of the content of the installed Lockcell package
+    """
+    root = Path(__file__).parent
+    sha = hashlib.sha256()
+    for path in _package_files(root):
+        sha.update(path.relative_to(root).as_posix().encode())
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def _record_hash(data: bytes) -> str:
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=")
+    return f"sha256={digest.decode()}"
+
+
+def build_code_bundle(folder: str) -> CodeBundle:
+    """
+    Writes the wheel of the installed Lockcell package in 'folder', unless a wheel of the same content
+    is already there
+
+    Args:
+        folder (str): The folder of the bundles, readable by the workers
+
+    Returns:
+        CodeBundle: The bundle, to give to Lockcell or JobManager
+    """
+    from . import __version__
+
+    digest = package_digest()
+    version = f"{__version__}+{digest[:DIGEST_LENGTH]}"
+    path = Path(folder) / f"lockcell-{version}-py3-none-any.whl"
+    bundle = CodeBundle(str(path), digest, version)
+    if path.is_file():
+        return bundle
+
+    root = Path(__file__).parent
+    dist_info = f"lockcell-{version}.dist-info"
+    files = {
+        f"lockcell/{file.relative_to(root).as_posix()}": file.read_bytes()
+        for file in _package_files(root)
+    }
+    files[f"{dist_info}/METADATA"] = (
+        f"Metadata-Version: 2.1\nName: lockcell\nVersion: {version}\n"
+    ).encode()
+    files[f"{dist_info}/WHEEL"] = (
+        "Wheel-Version: 1.0\nGenerator: lockcell\nRoot-Is-Purelib: true\nTag: py3-none-any\n"
+    ).encode()
+    record = [f"{name},{_record_hash(data)},{len(data)}" for name, data in files.items()]
+    record.append(f"{dist_info}/RECORD,,")
+    files[f"{dist_info}/RECORD"] = ("\n".join(record) + "\n").encode()
+
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    # Write then rename, so that a worker never installs a partially written wheel
+    with zipfile.ZipFile(f"{path}.tmp", "w", zipfile.ZIP_DEFLATED) as wheel:
+        for name, data in files.items():
+            wheel.writestr(name, data)
+    os.replace(f"{path}.tmp", path)
+    return bundle
@@ -1,13 +1,83 @@
+import math
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .priority import PolicyFunction, PriorityPolicy, clamp_level, to_policy_function
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Returns the value of 'values' below which a fraction 'rank' of them lies (nearest rank)
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(rank * len(ordered)) - 1))]
+
+
+@dataclass(frozen=True)
+class SharedConfig:
+    """
+    Reference to the configuration of a job uploaded once in the session (see
+    BaseConfig.set_share_config), pickled in the arguments of the tasks in place of the
+    configuration itself. The tasks load it back with 'Tasks.utils.load_config'
+
+    Attributes:
+        result_id (str): The result holding the pickled configuration
+        test_cost (Optional[float]): The cost of a test measured by the tasks so far
+        test_durations (Tuple[float, ...]): The last durations of a test measured by the tasks
+    """
+
+    result_id: str
+    test_cost: Optional[float] = None
+    test_durations: Tuple[float, ...] = ()
 
 
 class BaseConfig(ABC):
+    # Duration of the tests packed in a batched task when the batch size is automatic (in seconds)
+    AUTO_BATCH_DURATION = 1.0
+    MAX_AUTO_BATCH_SIZE = 64
+    # Duration of the tests of a subtree finished inside a single task when the collapse size is
+    # automatic (in seconds), a subtree on a delta of length s runs about 2 * s tests
+    AUTO_COLLAPSE_DURATION = 1.0
+    MAX_AUTO_COLLAPSE_SIZE = 64
+    # Number of measured durations of a test kept to derive the timeout of the tests
+    TEST_DURATION_SAMPLES = 32
+    MIN_TIMEOUT_SAMPLES = 3
+    # Shortest timeout of a test (in seconds), so that the noise of a cluster doesn't kill sane tests
+    MIN_TEST_TIMEOUT = 60.0
+
     def __init__(self, nbRun: Optional[int] = None):
         self.nbRun = 1
         if nbRun is not None:
             self.nbRun = nbRun
         self.mode = "default"
+        self.batch_size: Optional[int] = 1
+        self.test_cost: Optional[float] = None
+        self.test_durations: List[float] = []
+        self.straggler_percentile: Optional[float] = None
+        self.timeout_factor: float = 4.0
+        self.backup_factor: float = 2.0
+        self.backup_minimum: float = 1.0
+        self.collapse_size: Optional[int] = 0
+        self.collapse_workers: int = 1
+        self.share_search_space: bool = False
+        # Set by Lockcell when the job runs on the indices of a shared search space (SharedSpace)
+        self.shared_space = None
+        self.share_config: bool = True
+        # Set by Lockcell to the result holding this configuration once it is uploaded
+        self.shared_config: Optional[str] = None
+        self.parallelism: Optional[int] = None
+        self.speculative: bool = False
+        self.priority_policy: PolicyFunction = to_policy_function(PriorityPolicy.FIFO)
+        self.search_space_size: Optional[int] = None
+        self.namespace: Optional[str] = None
+        # The tasks of an iteration started ahead of time only use the capacity left by the others
+        self.run_ahead: bool = False
+        # Set by Lockcell when the job is journaled (see journal.py): the tasks publish the outcome of
+        # their tests, and answer the tests whose outcome was recorded before (KnownOutcomes) without
+        # running them
+        self.record_outcomes: bool = False
+        self.known_outcomes = None
         pass
 
     def set_mode(self, mode):
@@ -25,6 +95,270 @@ class BaseConfig(ABC):
         self.nbRun = nbRun
         return self
 
+    def set_batch_size(self, batch_size: Optional[int]):
+        """
+        Sets the number of subsets tested by a single task
+
+        Args:
+            batch_size (Optional[int]): The number of subsets, 1 disables the batching and None
+                chooses it from the measured cost of the tests
+        """
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be a positive integer or None")
+        self.batch_size = batch_size
+        return self
+
+    def get_batch_size(self) -> int:
+        """
+        Returns the number of subsets to test in a single task, when automatic it packs enough
+        tests to fill AUTO_BATCH_DURATION (no batching until the cost of a test is measured)
+        """
+        if self.batch_size is not None:
+            return self.batch_size
+        if self.test_cost is None:
+            return 1
+        if self.test_cost * self.MAX_AUTO_BATCH_SIZE <= self.AUTO_BATCH_DURATION:
+            return self.MAX_AUTO_BATCH_SIZE
+        return max(1, int(self.AUTO_BATCH_DURATION / self.test_cost))
+
+    def record_test_cost(self, duration: float):
+        """
+        Updates the estimated cost of a test with a measured duration (in seconds)
+        """
+        if self.test_cost is None:
+            self.test_cost = duration
+        else:
+            self.test_cost = (self.test_cost + duration) / 2
+        # A new list, the configurations loaded by the tasks of a worker share the previous one
+        self.test_durations = (self.test_durations + [duration])[-self.TEST_DURATION_SAMPLES :]
+
+    def set_straggler_policy(
+        self,
+        percentile: Optional[float] = 0.95,
+        timeout_factor: float = 4.0,
+        backup_factor: float = 2.0,
+        backup_minimum: float = 1.0,
+    ):
+        """
+        Derives the deadlines of the tests from the distribution of their measured durations. A test
+        task times out (and is retried by the cluster) after 'timeout_factor' times the 'percentile'
+        of the durations of the tests, and the local schedulers (see backends.LocalPymonik) run a
+        backup copy of a task running for more than 'backup_factor' times the 'percentile' of the
+        durations of the tasks of the job, the first copy to end gives the result
+
+        Args:
+            percentile (Optional[float]): The percentile of the durations, None disables the policy
+            timeout_factor (float, optional): Defaults to 4.0.
+            backup_factor (float, optional): Defaults to 2.0.
+            backup_minimum (float, optional): Shortest run time of a task before its backup copy is
+                started (in seconds). Defaults to 1.0.
+        """
+        if percentile is not None and not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1 or None")
+        if timeout_factor < 1 or backup_factor < 1:
+            raise ValueError("the factors must be greater than or equal to 1")
+        self.straggler_percentile = percentile
+        self.timeout_factor = timeout_factor
+        self.backup_factor = backup_factor
+        self.backup_minimum = backup_minimum
+        return self
+
+    def get_test_timeout(self) -> Optional[float]:
+        """
+        Returns the timeout of a test task in seconds, None when the straggler policy is disabled or
+        while too few durations were measured
+        """
+        if self.straggler_percentile is None or len(self.test_durations) < self.MIN_TIMEOUT_SAMPLES:
+            return None
+        duration = percentile(self.test_durations, self.straggler_percentile)
+        return max(self.MIN_TEST_TIMEOUT, self.timeout_factor * duration)
+
+    def get_backup_policy(self) -> Optional[str]:
+        """
+        Returns the backup policy of the test tasks as "percentile,factor,minimum", the value of their
+        LOCKCELL_BACKUP_TAG option read by the local schedulers (None when the policy is disabled)
+        """
+        if self.straggler_percentile is None:
+            return None
+        return f"{self.straggler_percentile},{self.backup_factor},{self.backup_minimum}"
+
+    def set_collapse_size(self, collapse_size: Optional[int], workers: int = 1):
+        """
+        Sets the length under which a failing delta is minimized inside the task that tested it,
+        instead of submitting a task for each of its splits
+
+        Args:
+            collapse_size (Optional[int]): The length of the deltas, 0 disables the collapsing and
+                None chooses it from the measured cost of the tests
+            workers (int, optional): Number of tests run at the same time inside the task.
+                Defaults to 1.
+        """
+        if collapse_size is not None and collapse_size < 0:
+            raise ValueError("collapse_size must be a non-negative integer or None")
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        self.collapse_size = collapse_size
+        self.collapse_workers = workers
+        return self
+
+    def get_collapse_size(self) -> int:
+        """
+        Returns the length under which a failing delta is minimized inside a single task, when
+        automatic the subtree must fit in AUTO_COLLAPSE_DURATION (no collapsing until the cost of a
+        test is measured)
+        """
+        if self.collapse_size is not None:
+            return self.collapse_size
+        if self.test_cost is None:
+            return 0
+        if self.test_cost == 0:
+            return self.MAX_AUTO_COLLAPSE_SIZE
+        size = int(self.AUTO_COLLAPSE_DURATION / (2 * self.test_cost))
+        return min(self.MAX_AUTO_COLLAPSE_SIZE, size)
+
+    def set_share_search_space(self, share: bool = True):
+        """
+        Uploads the search space once per job, the tasks then carry the indices of the elements of
+        their deltas rather than the elements themselves (worth it for large elements, like the
+        source lines of ConfigVerrou). The results are given back as elements
+        """
+        self.share_search_space = share
+        return self
+
+    def set_share_config(self, share: bool = True):
+        """
+        Uploads the configuration once per job, the tasks then carry a reference to it rather than
+        the pickled configuration with the code of its class (enabled by default)
+        """
+        self.share_config = share
+        return self
+
+    def set_parallelism(self, parallelism: Optional[int]):
+        """
+        Sets the number of tests that can run at the same time, used to shape the split tree
+
+        Args:
+            parallelism (Optional[int]): The width of the cluster, None keeps binary splits
+        """
+        if parallelism is not None and parallelism < 1:
+            raise ValueError("parallelism must be a positive integer or None")
+        self.parallelism = parallelism
+        return self
+
+    def get_root_granularity(self, size: int) -> int:
+        """
+        Returns the number of subsets the search space (of length 'size') is first split into, so
+        that the first wave fills the cluster
+        Only the "Analyse" mode widens the split tree : the "default" mode recurses on every failing
+        complement with a granularity n - 1, which grows factorially with n
+        """
+        if self.parallelism is None or self.mode != "Analyse":
+            return 2
+        return max(2, min(self.parallelism, size))
+
+    def get_growth_factor(self, n: int) -> int:
+        """
+        Returns the number of parts each of the 'n' subsets is split into when the granularity
+        increases, more than 2 while the next wave wouldn't fill the cluster ("Analyse" mode only)
+        """
+        if self.parallelism is None or self.mode != "Analyse" or 2 * n >= self.parallelism:
+            return 2
+        return math.ceil(self.parallelism / n)
+
+    def set_speculative(self, speculative: bool = True):
+        """
+        Enables the speculative mode, where the complements of a subdivision are tested in the same
+        wave as its subsets, trading spare cluster capacity for a shorter critical path
+        """
+        self.speculative = speculative
+        return self
+
+    def should_speculate(self, n: int) -> bool:
+        """
+        Asserts if the complements of a subdivision in 'n' subsets must be tested speculatively, which
+        requires the room for both waves in the cluster (granularity 2 never tests the complements)
+        """
+        if not self.speculative or n <= 2:
+            return False
+        return self.parallelism is None or 2 * n <= self.parallelism
+
+    def set_priority_policy(self, policy: "str | PriorityPolicy | PolicyFunction"):
+        """
+        Sets the order in which the tests are run by the cluster
+
+        Args:
+            policy (str | PriorityPolicy | PolicyFunction): A policy (or its name), or a function
+                taking the size of the delta of a task and the size of the search space, and
+                returning a priority level (higher runs first, see priority.PRIORITY_LEVELS)
+        """
+        self.priority_policy = to_policy_function(policy)
+        return self
+
+    def set_search_space_size(self, search_space_size: Optional[int]):
+        """
+        Sets the size of the search space of the job, used by the priority policies
+        """
+        self.search_space_size = search_space_size
+        return self
+
+    def get_priority_level(self, size: int) -> int:
+        """
+        Returns the priority level of a task working on a delta of length 'size', following the
+        priority policy
+        """
+        return clamp_level(self.priority_policy(size, self.search_space_size or size))
+
+    def set_namespace(self, namespace: Optional[str]):
+        """
+        Sets the namespace of the job, that tells its tasks and published results apart from the ones
+        of the other jobs running in the same session (see JobManager)
+
+        Args:
+            namespace (Optional[str]): A name unique in the session, None when the job is alone
+        """
+        if namespace is not None and (not namespace or "__" in namespace):
+            raise ValueError("namespace must be a non-empty str without '__' or None")
+        self.namespace = namespace
+        return self
+
+    def _copy_settings(self, copy_: "BaseConfig") -> "BaseConfig":
+        """
+        Copies the settings shared by every configuration into 'copy_', to use in '__copy__'
+        """
+        copy_.nbRun = self.nbRun
+        copy_.mode = self.mode
+        copy_.batch_size = self.batch_size
+        copy_.test_cost = self.test_cost
+        copy_.test_durations = list(self.test_durations)
+        copy_.straggler_percentile = self.straggler_percentile
+        copy_.timeout_factor = self.timeout_factor
+        copy_.backup_factor = self.backup_factor
+        copy_.backup_minimum = self.backup_minimum
+        copy_.collapse_size = self.collapse_size
+        copy_.collapse_workers = self.collapse_workers
+        copy_.share_search_space = self.share_search_space
+        copy_.shared_space = self.shared_space
+        # The copy is not uploaded yet, it may be changed
+        copy_.share_config = self.share_config
+        copy_.parallelism = self.parallelism
+        copy_.speculative = self.speculative
+        copy_.priority_policy = self.priority_policy
+        copy_.search_space_size = self.search_space_size
+        copy_.namespace = self.namespace
+        copy_.run_ahead = self.run_ahead
+        copy_.record_outcomes = self.record_outcomes
+        copy_.known_outcomes = self.known_outcomes
+        return copy_
+
+    def __reduce_ex__(self, protocol):
+        # Once uploaded, the configuration is sent to the tasks as a reference
+        if self.shared_config is not None:
+            return (
+                SharedConfig,
+                (self.shared_config, self.test_cost, tuple(self.test_durations)),
+            )
+        return super().__reduce_ex__(protocol)
+
     @abstractmethod
     def __copy__(self) -> "BaseConfig":
         raise NotImplementedError("Cannot copy the abstract class BaseConfig")
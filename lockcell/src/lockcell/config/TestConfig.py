@@ -86,7 +86,7 @@ class TestConfig(BaseConfig):
             problems=copy.deepcopy(self.Pb),
             nbRun=self.nbRun,
         )
-        copy_.mode = self.mode
+        self._copy_settings(copy_)
         return copy_
 
     # ------------------------
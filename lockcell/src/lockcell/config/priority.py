@@ -0,0 +1,91 @@
+import math
+from enum import Enum
+from typing import Callable
+
+
+class PriorityPolicy(Enum):
+    """
+    Order in which the cluster runs the tests of a job, the priority of a task is computed from the
+    size of the delta it works on (and from the size of the search space for the depth)
+    """
+
+    # Every test has the same priority, they run in submission order
+    FIFO = "fifo"
+    # The deepest branches of the split tree first, relatively to the search space of the job
+    DEPTH_FIRST = "depth_first"
+    # The smallest deltas first, whatever the job they belong to
+    SMALLEST_DELTA_FIRST = "smallest_delta_first"
+    # The largest deltas first, their branch has the longest chain of splits left
+    CRITICAL_PATH_FIRST = "critical_path_first"
+
+
+# Number of priority levels a policy can use, from 0 (lowest) to PRIORITY_LEVELS - 1
+# (the message queues of ArmoniK only handle a few priorities)
+PRIORITY_LEVELS = 5
+
+# A policy takes the size of the delta of a task and the size of the search space, and returns a level
+PolicyFunction = Callable[[int, int], int]
+
+
+def _depth(size: int, space_size: int) -> float:
+    """
+    Depth of a delta of length 'size' in the split tree, relatively to the depth of the leaves (0 for
+    the root, 1 for the leaves)
+    """
+    if space_size <= 1:
+        return 1.0
+    return math.log2(max(space_size, size) / max(size, 1)) / math.log2(space_size)
+
+
+def _fifo(size: int, space_size: int) -> int:
+    return 0
+
+
+def _depth_first(size: int, space_size: int) -> int:
+    return round((PRIORITY_LEVELS - 1) * _depth(size, space_size))
+
+
+def _smallest_delta_first(size: int, space_size: int) -> int:
+    return PRIORITY_LEVELS - 1 - int(math.log2(max(size, 1)))
+
+
+def _critical_path_first(size: int, space_size: int) -> int:
+    return round((PRIORITY_LEVELS - 1) * (1 - _depth(size, space_size)))
+
+
+# Register that makes the correspondence between the policies and their functions
+_POLICY_TO_FUNCTION: dict[PriorityPolicy, PolicyFunction] = {}
+
+_POLICY_TO_FUNCTION[PriorityPolicy.FIFO] = _fifo
+_POLICY_TO_FUNCTION[PriorityPolicy.DEPTH_FIRST] = _depth_first
+_POLICY_TO_FUNCTION[PriorityPolicy.SMALLEST_DELTA_FIRST] = _smallest_delta_first
+_POLICY_TO_FUNCTION[PriorityPolicy.CRITICAL_PATH_FIRST] = _critical_path_first
+
+
+def to_policy_function(policy: "str | PriorityPolicy | PolicyFunction") -> PolicyFunction:
+    """
+    Returns the function of a policy, given by name, by PriorityPolicy or directly as a function
+
+    Raises:
+        ValueError: If the name doesn't match any implemented policy
+        TypeError: If the argument is neither a str, a PriorityPolicy nor a callable
+    """
+    if isinstance(policy, PriorityPolicy):
+        return _POLICY_TO_FUNCTION[policy]
+    if isinstance(policy, str):
+        key = policy.strip().lower()
+        for test_policy in _POLICY_TO_FUNCTION:
+            if test_policy.value == key:
+                return _POLICY_TO_FUNCTION[test_policy]
+        valid = ", ".join(p.value for p in _POLICY_TO_FUNCTION)
+        raise ValueError(f"Unknown PriorityPolicy : {policy!r}. Valid policy names are : {valid}.")
+    if callable(policy):
+        return policy
+    raise TypeError("policy must be a str, a PriorityPolicy or a callable.")
+
+
+def clamp_level(level: int) -> int:
+    """
+    Brings the level returned by a policy back between 0 and PRIORITY_LEVELS - 1
+    """
+    return max(0, min(PRIORITY_LEVELS - 1, int(level)))
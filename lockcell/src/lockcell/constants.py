@@ -10,6 +10,12 @@ import yaml
 from pathlib import Path
 
 LOCKCELL_TAG = "lockcelltag"
+# Option carrying the namespace of the job that submitted a task, when several jobs share a session
+LOCKCELL_JOB_TAG = "lockcelljob"
+# Option carrying the backup policy of a task for the local schedulers (see BaseConfig.set_straggler_policy)
+LOCKCELL_BACKUP_TAG = "lockcellbackup"
+# Module holding the data cached by a worker process across its tasks (see Tasks.utils.worker_cache)
+WORKER_CACHE_MODULE = "lockcell_worker_cache"
 
 # Load configuration file path from environment variable
 env_config_path = os.getenv("LOCKCELL_CONFIG")
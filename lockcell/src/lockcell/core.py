@@ -1,18 +1,30 @@
+import os
 from enum import Enum
 from copy import copy
 from typing import Any
 
+import grpc
+from armonik.client import ArmoniKPartitions
 from pymonik import Pymonik
 
-from .delta_algorithms import DeltaDebugHandler, RDDMin, DDMin
-from .Tasks.utils import AminusB
+from .backends import CoordinatorPymonik, LocalPymonik
+from .bundle import CodeBundle, set_code_bundle
+from .delta_algorithms import DeltaDebugHandler, RDDMin, DDMin, PipelinedRDDMin
+from .Tasks.utils import AminusB, KnownOutcomes, SharedSpace
 from .config.BaseConfig import BaseConfig
+from .journal import Journal
 from .utils import Status, StatusClass
 
 
 class Job(Enum):
     DDMin = "ddmin"
     RDDMIN = "rddmin"
+    PIPELINED_RDDMIN = "pipelined_rddmin"
+
+
+class Backend(Enum):
+    ARMONIK = "armonik"
+    LOCAL = "local"
 
 
 class Lockcell:
@@ -28,6 +40,13 @@ class Lockcell:
 
     _JOB_TO_CLASS[Job.RDDMIN] = RDDMin
     _JOB_TO_CLASS[Job.DDMin] = DDMin
+    _JOB_TO_CLASS[Job.PIPELINED_RDDMIN] = PipelinedRDDMin
+
+    # Register that makes the correspondence between the execution backends and the PymoniK clients
+    _BACKEND_TO_CLASS: dict[Backend, type[Pymonik]] = {}
+
+    _BACKEND_TO_CLASS[Backend.ARMONIK] = Pymonik
+    _BACKEND_TO_CLASS[Backend.LOCAL] = LocalPymonik
 
     def __init__(
         self,
@@ -36,20 +55,81 @@ class Lockcell:
         config: BaseConfig,
         partition: str = "pymonik",
         environnement: dict[str, Any] = {},
+        backend: str | Backend = Backend.ARMONIK,
+        max_workers: int | None = None,
+        use_events: bool = True,
+        parallelism: int | None = None,
+        fuse_aggregators: bool = False,
+        code_bundle: CodeBundle | None = None,
+        session: Pymonik | None = None,
+        journal: str | None = None,
     ) -> None:
+        """
+        Args:
+            endpoint (str | None): The ArmoniK control plane endpoint (ignored by the local backend).
+            config (BaseConfig): The configuration of the test to debug.
+            partition (str, optional): The ArmoniK partition. Defaults to "pymonik".
+            environnement (dict[str, Any], optional): The PymoniK environment of the tasks. Defaults to {}.
+            backend (str | Backend, optional): Where the tasks are executed, "armonik" for an ArmoniK
+                cluster or "local" for a process pool on this machine. Defaults to Backend.ARMONIK.
+            max_workers (int | None, optional): Number of worker processes of the local backend.
+                Defaults to the number of CPUs.
+            use_events (bool, optional): Track the progress of the job with the ArmoniK events stream,
+                if False or if the stream fails, the tasks are found by polling. Defaults to True.
+            parallelism (int | None, optional): Number of tests that can run at the same time, the
+                first waves of the split tree are widened to fill it. Defaults to the capacity of
+                the partition (or to max_workers for the local backend).
+            fuse_aggregators (bool, optional): Run the aggregators on this machine and only the tests
+                on the backend, so that the critical path doesn't pay a scheduling hop for every
+                aggregation (see CoordinatorPymonik). Defaults to False.
+            code_bundle (CodeBundle | None, optional): A bundle of Lockcell installed by the workers,
+                the code of the tasks is then imported rather than sent with every task (see
+                build_code_bundle, it applies to the whole process). Defaults to None.
+            session (Pymonik | None, optional): A session of the backend shared with other instances
+                (see JobManager), it is opened and closed by its owner. Defaults to a new session.
+            journal (str | None, optional): The path of a journal where the progress of the job is
+                recorded, to resume it after a crash of the client (see journal.py and 'resume'), not
+                with fused aggregators.
+                Defaults to None.
+
+        Raises:
+            ValueError: If the backend name doesn't match any implemented backend, or if a journal
+                is given with fused aggregators
+        """
+        # A worker forked by a local session gets a copy of this instance, that it must not close
+        self._pid: int = os.getpid()
         # Configuration
         self._endpoint: str | None = endpoint
         self._config: BaseConfig = copy(config)
         self._search_space: list = self._config.generate_search_space()
+        # The elements of the search space when the job runs on their indices
+        self._elements: list | None = None
         self._environnement: dict[str, Any] = environnement
-
-        self._session = Pymonik(
-            endpoint=self._endpoint, partition=partition, environment=self._environnement
-        )
+        self._backend: Backend = self._to_backend(backend)
+        self._use_events: bool = use_events
+        self._partition: str = partition
+        self._parallelism: int | None = parallelism
+
+        self._owns_session: bool = session is None
+        if session is None:
+            session = self._new_session(
+                self._backend,
+                endpoint,
+                partition,
+                environnement,
+                max_workers,
+                fuse_aggregators,
+                code_bundle,
+            )
+        self._session = session
+        if journal is not None:
+            self._check_journaled()
 
         # Data of the delta Debug
         self._result: list[list] = []
         self._handler: DeltaDebugHandler | None = None
+        self._job: Job | None = None
+        self._journal: Journal | None = Journal(journal) if journal is not None else None
 
         # Status
         self._job_status: StatusClass = StatusClass(Status.NO_JOB)
@@ -59,7 +139,9 @@ class Lockcell:
         self.INTERNAL_SP = None
 
     def __del__(self):
-        self.close()
+        # The session doesn't exist if the constructor failed
+        if hasattr(self, "_session") and os.getpid() == self._pid:
+            self.close()
 
     ### User functions
 
@@ -79,7 +161,30 @@ class Lockcell:
             raise RuntimeError(
                 "Cannot run a job if there is not job, please use Lockcell.run_[JOB_NAME] instead or use Lockcell.set_job before the run call"
             )
+        self._config.set_parallelism(self._parallelism or self._cluster_parallelism())
+        self._config.set_search_space_size(len(self._search_space))
+        if self._config.share_search_space and self._elements is None:
+            self._share_search_space()
+        if self._journal is not None:
+            self._open_journal()
+        self._share_config(self._config)
         self._handler.start()
+        # The failing sets restored from the journal are the first update
+        if self._handler._result_buffer:
+            self._handler._update_status(Status.UPDATED)
+
+    def resume(self, journal: str):
+        """
+        Resumes the job recorded in the journal at 'journal': the failing sets it found are reported
+        again, the tests whose outcome is recorded are not run again, and a RDDMin restarts from its
+        last iteration. The progress of the job keeps being recorded in the journal
+
+        Raises:
+            ValueError: If the journal holds no job, or a job on another search space, or if the
+                aggregators are fused
+        """
+        self._set_resumed(journal)
+        self.run()
 
     def run_rddmin(self):
         """
@@ -88,6 +193,13 @@ class Lockcell:
         self.set_job(Job.RDDMIN)
         self.run()
 
+    def run_pipelined_rddmin(self):
+        """
+        Shortcut to run a rddmin whose iterations start before the end of the previous one
+        """
+        self.set_job(Job.PIPELINED_RDDMIN)
+        self.run()
+
     def run_ddmin(self):
         """
         Shortcut to run a ddmin
@@ -132,7 +244,7 @@ class Lockcell:
         """
         if self._handler is None:
             raise RuntimeError("Cannot get the update of the job : no job is running")
-        return self._handler.get_update()
+        return self._to_elements(self._handler.get_update())
 
     def get_status(self):
         """
@@ -160,7 +272,7 @@ class Lockcell:
             self.update()
             if not self._handler.is_done:
                 raise RuntimeError("Tried to retrieve the result when is wasn't ready")
-        return self._handler.get_result()
+        return self._to_elements(self._handler.get_result())
 
     def set_job(self, job: str | Job) -> None:
         """
@@ -189,6 +301,9 @@ class Lockcell:
             raise TypeError("job must be a str or a Job.")
 
         handler_class = self._JOB_TO_CLASS[job_enum]
+        if self._handler is not None:
+            self._handler.close()
+        self._job = job_enum
         self._handler = handler_class(self)
 
     ### Attribute Manager
@@ -203,12 +318,53 @@ class Lockcell:
 
     @property
     def search_space(self) -> list:
+        if self._elements is not None:
+            return self._to_elements([self._search_space])[0]
         return self._search_space
 
     @property
     def environnement(self) -> dict[str, Any]:
         return self._environnement
 
+    @property
+    def backend(self) -> Backend:
+        return self._backend
+
+    @property
+    def use_events(self) -> bool:
+        return self._use_events
+
+    @property
+    def parallelism(self) -> int | None:
+        return self._parallelism
+
+    @property
+    def cancelled_tasks(self) -> int:
+        """
+        Number of tasks of the job cancelled because their result couldn't change the outcome anymore
+        """
+        return self._handler.cancelled_tasks if self._handler is not None else 0
+
+    @property
+    def saved_task_seconds(self) -> float:
+        """
+        Estimated computing time (in task-seconds) saved by the cancelled tasks of the job
+        """
+        return self._handler.saved_task_seconds if self._handler is not None else 0.0
+
+    @property
+    def straggler_stats(self) -> dict[str, float]:
+        """
+        Statistics of the backup copies of the stragglers started by the session running the tests
+        (see BaseConfig.set_straggler_policy), empty on ArmoniK where the stragglers time out
+        """
+        session = self._session
+        if isinstance(session, CoordinatorPymonik):
+            session = session.remote
+        if isinstance(session, LocalPymonik):
+            return session.straggler_stats()
+        return {}
+
     @property
     def is_open(self) -> bool:
         return self._open
@@ -225,6 +381,7 @@ class Lockcell:
             )
         self._config = copy(config)
         self._search_space = self._config.generate_search_space()
+        self._elements = None
 
     @environnement.setter
     def environnement(self, environnement: dict[str, Any]):
@@ -249,9 +406,133 @@ class Lockcell:
                 "Please close the current session before trying to change the endpoint, use Lockcell.close() (then you can reopen it with Lockcell.open())"
             )
         self._search_space = search_space
+        self._elements = None
 
     # Helpers
 
+    @classmethod
+    def _to_backend(cls, backend: str | Backend) -> Backend:
+        if isinstance(backend, Backend):
+            return backend
+        if isinstance(backend, str):
+            key = backend.strip().lower()
+            for test_backend in cls._BACKEND_TO_CLASS:
+                if test_backend.value == key:
+                    return test_backend
+            valid = ", ".join(b.value for b in cls._BACKEND_TO_CLASS)
+            raise ValueError(f"Unknown Backend : {backend!r}. Valid backend names are : {valid}.")
+        raise TypeError("backend must be a str or a Backend.")
+
+    @classmethod
+    def _new_session(
+        cls,
+        backend: Backend,
+        endpoint: str | None,
+        partition: str,
+        environnement: dict[str, Any],
+        max_workers: int | None,
+        fuse_aggregators: bool = False,
+        code_bundle: CodeBundle | None = None,
+    ) -> Pymonik:
+        if code_bundle is not None:
+            set_code_bundle(code_bundle)
+            environnement = code_bundle.environment(environnement)
+        backend_options = {"max_workers": max_workers} if backend is Backend.LOCAL else {}
+        session = cls._BACKEND_TO_CLASS[backend](
+            endpoint=endpoint,
+            partition=partition,
+            environment=environnement,
+            **backend_options,
+        )
+        if fuse_aggregators:
+            return CoordinatorPymonik(session)
+        return session
+
+    def _cluster_parallelism(self) -> int | None:
+        """
+        Number of tasks the backend can run at the same time, None if it is unknown
+        """
+        session = self._session
+        if isinstance(session, CoordinatorPymonik):
+            session = session.remote
+        if isinstance(session, LocalPymonik):
+            return session.max_workers
+        try:
+            partition = ArmoniKPartitions(session._channel).get_partition(self._partition)
+        except grpc.RpcError:
+            return None
+        return partition.pod_max or None
+
+    def _share_search_space(self):
+        """
+        Uploads the search space in the session, the job then runs on the indices of its elements
+        """
+        handle = self._session.put(self._search_space, name="search_space")
+        self._config.shared_space = SharedSpace(handle.result_id)
+        self._elements = self._search_space
+        self._search_space = list(range(len(self._elements)))
+
+    def _share_config(self, config: BaseConfig):
+        """
+        Uploads 'config' in the session if it is shared, the tasks it is given to then only carry
+        a reference to it (see SharedConfig)
+        """
+        config.shared_config = None
+        if config.share_config:
+            config.shared_config = self._session.put(config, name="config").result_id
+
+    def _check_journaled(self):
+        """
+        Raises a ValueError if the job can't be journaled: with fused aggregators, the `nTask`s
+        minimizing a delta run whole on the remote session and the outcomes of their tests are lost
+        """
+        if isinstance(self._session, CoordinatorPymonik):
+            raise ValueError("A journaled job can't run with fused aggregators (fuse_aggregators)")
+
+    def _set_resumed(self, journal: str):
+        """
+        Records the job to the journal at 'journal', and sets the job it holds
+        """
+        self._check_journaled()
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = Journal(journal)
+        if self._journal.job is None:
+            raise ValueError(f"The journal {journal} holds no job to resume")
+        self.set_job(self._journal.job)
+
+    def _open_journal(self):
+        """
+        Records the job in the journal, or restores the progress it holds if the job was already
+        recorded. The tasks then publish the outcomes of their tests, and answer the recorded ones
+        """
+        journal: Journal = self._journal  # type: ignore
+        resumed = journal.job is not None
+        elements = self._search_space if self._elements is None else self._elements
+        journal.start(self._job.value, elements, self._elements is not None)  # type: ignore
+        self._config.record_outcomes = True
+        self._config.known_outcomes = None
+        outcomes = journal.outcomes()
+        if outcomes:
+            handle = self._session.put(outcomes, name="known_outcomes")
+            self._config.known_outcomes = KnownOutcomes(handle.result_id)
+        if resumed:
+            self._handler.restore(journal)  # type: ignore
+
+    def _to_elements(self, failing_sets: list[list]) -> list[list]:
+        """
+        Turns sets of indices of the shared search space back into sets of elements (the updates
+        can also be the list of the failing sets of a whole iteration)
+        """
+        if self._elements is None:
+            return failing_sets
+        return [self._set_to_elements(failing_set) for failing_set in failing_sets]
+
+    def _set_to_elements(self, indices: list) -> list:
+        if indices and isinstance(indices[0], list):
+            return [self._set_to_elements(failing_set) for failing_set in indices]
+        return [self._elements[idx] for idx in indices]  # type: ignore
+
     def _reduce_search_space(self, to_subtract: list):
         self._search_space = AminusB(self._search_space, to_subtract)
 
@@ -259,17 +540,21 @@ class Lockcell:
 
     def open(self):
         """
-        Open the PymoniK session
+        Open the PymoniK session (a shared session is opened by its owner)
         """
         self._open = True
-        self._session = self._session.create()
+        if self._owns_session:
+            self._session = self._session.create()
 
     def close(self):
         """
-        Close the PymoniK session
+        Close the PymoniK session (a shared session is closed by its owner)
         """
         self._open = False
-        self._session.close()
+        if self._handler is not None:
+            self._handler.close()
+        if self._owns_session:
+            self._session.close()
 
     # For usage with context : with
 
@@ -1,5 +1,6 @@
 from .algo_base import DeltaDebugHandler
 from .rddmin import RDDMin
 from .ddmin import DDMin
+from .pipelined_rddmin import PipelinedRDDMin
 
-__all__ = ["DeltaDebugHandler", "RDDMin", "DDMin"]
+__all__ = ["DeltaDebugHandler", "RDDMin", "DDMin", "PipelinedRDDMin"]
@@ -1,23 +1,30 @@
 from __future__ import annotations
 
+import asyncio
 import time
 import warnings
 from abc import ABC, abstractmethod
+from copy import deepcopy
+from datetime import datetime, timezone
 from typing import Any, TYPE_CHECKING, Type, TypeVar
+
+import grpc
 from grpc._channel import _MultiThreadedRendezvous
 
 
-from armonik.common import Task
+from armonik.common import Result, Task, TaskOptions, ResultStatus, TaskStatus
 from pymonik import ResultHandle
 
-from ..Tasks.utils import TaskTag
-from ..constants import LOCKCELL_TAG
+from ..Tasks.utils import TaskTag, published_prefix, tag_value
+from ..constants import LOCKCELL_TAG, LOCKCELL_JOB_TAG
 from ..utils import StatusClass, Status
-from ..events import TasksFinder
+from ..events import TasksFinder, TasksListener, ResultsFinder, ResultsListener
+from ..backends import LocalPymonik, LocalTasksFinder, LocalResultsFinder
 
 
 if TYPE_CHECKING:
     from ..core import Lockcell
+    from ..journal import Journal
 
 
 # Interface for a way to execute Delta Debug (like DDMin, RDDMin, SRDDMin, ...)
@@ -36,8 +43,15 @@ class DeltaDebugHandler(ABC):
         self._lockcell._job_status = StatusClass(Status.JOB_CREATED)
         self._result_buffer: list[list] = []
 
-        self._metadata_buffers: dict[TaskTag, list[Task]] = {}
-        self._tag_finder: dict[TaskTag, TasksFinder] = {}
+        self._metadata_buffers: dict[TaskTag, list[Task | Result]] = {}
+        self._tag_finder: dict[TaskTag, TasksFinder | TasksListener] = {}
+
+        # Tasks cancelled because their result couldn't change the outcome anymore
+        self.cancelled_tasks: int = 0
+        self.saved_task_seconds: float = 0.0
+        self._link_published(TaskTag.CANCEL)
+        if self._lockcell._journal is not None:
+            self._link_published(TaskTag.OUTCOME)
 
     @abstractmethod
     def start(self):
@@ -65,6 +79,17 @@ class DeltaDebugHandler(ABC):
         """
         pass
 
+    async def update_async(self) -> bool:
+        """
+        Non-blocking version of 'update()', the requests to ArmoniK are made in a worker thread so
+        that the event loop can drive other jobs in the meantime
+        The results that were found are also downloaded, so that 'get_update_async()' returns at once
+
+        Returns:
+            bool: True if it updated things
+        """
+        return await asyncio.to_thread(self._update_and_flush)
+
     def get_update(self) -> list[list]:
         """
         Return the new updates found by update, set the status to running if it isn't COMPLETED
@@ -79,6 +104,15 @@ class DeltaDebugHandler(ABC):
             return self._clear_buffer()
         return []
 
+    async def get_update_async(self) -> list[list]:
+        """
+        Non-blocking version of 'get_update()', the results are downloaded in a worker thread
+
+        Returns:
+            list[list]: the updates
+        """
+        return await asyncio.to_thread(self.get_update)
+
     @property
     def is_done(self):
         return self._lockcell._job_status == Status.COMPLETED
@@ -95,6 +129,13 @@ class DeltaDebugHandler(ABC):
             Any: self
         """
 
+    @abstractmethod
+    def restore(self, journal: Journal):
+        """
+        Restores the progress recorded in 'journal' by a previous run of the job, to call before
+        'start()' (see Lockcell.resume)
+        """
+
     @abstractmethod
     def get_result(self) -> list[list]:
         """
@@ -107,6 +148,13 @@ class DeltaDebugHandler(ABC):
             list[list]: The result of the computation
         """
 
+    def close(self):
+        """
+        Stops looking for the tasks of the job, to call when the job is dropped
+        """
+        for finder in self._tag_finder.values():
+            finder.close()
+
     # Helpers
 
     T = TypeVar("T")
@@ -126,6 +174,48 @@ class DeltaDebugHandler(ABC):
 
         return raw_result
 
+    def _get_published(self, result: Result) -> Any:
+        """
+        Downloads the data published by a task (see 'Tasks.utils.publish')
+        """
+        return self._get_result_handle(
+            ResultHandle(
+                result.result_id,
+                self._lockcell._session._session_id,
+                self._lockcell._session,
+            )
+        )
+
+    def _is_result_ready(self, to_check: ResultHandle) -> bool:
+        """
+        Non-blocking check of the availability of a result
+
+        Raises:
+            RuntimeError: If the result was aborted
+
+        Returns:
+            bool: True if the result can be downloaded without waiting
+        """
+        session = self._lockcell._session
+        if isinstance(session, LocalPymonik):
+            return session.is_available(to_check.result_id)
+        status = session._results_client.get_result(to_check.result_id).status  # type: ignore
+        if status == ResultStatus.ABORTED:
+            raise RuntimeError(f"Result {to_check.result_id} has been aborted")
+        return status == ResultStatus.COMPLETED
+
+    # Time between two checks of a result in 'wait()' (in seconds)
+    WAIT_INTERVAL = 0.1
+
+    def _wait_for(self, to_wait: ResultHandle):
+        """
+        Blocks until a result is available, cancelling the obsolete tasks in the meantime
+        """
+        while not self._is_result_ready(to_wait):
+            self._cancel_obsolete()
+            self._record_outcomes()
+            time.sleep(self.WAIT_INTERVAL)
+
     MAX_TRY = 5
 
     def _get_result_handle(self, to_get: ResultHandle, max_try=MAX_TRY):
@@ -160,6 +250,9 @@ class DeltaDebugHandler(ABC):
         if isinstance(status, Status):
             status = StatusClass(status)
         self._lockcell._job_status.phase = status.phase
+        # The tests of the end of the job published their outcomes before its result
+        if status.phase is Status.COMPLETED:
+            self._record_outcomes()
 
     @abstractmethod
     def _flush_metadata_buffers_into_result_buffer(self):
@@ -170,17 +263,71 @@ class DeltaDebugHandler(ABC):
         """
         pass
 
+    def _update_and_flush(self) -> bool:
+        updated = self.update()
+        if updated:
+            self._flush_metadata_buffers_into_result_buffer()
+        return updated
+
     # Tag result helpers
 
+    def _tag_value(self, tag: TaskTag) -> str:
+        """
+        Returns the value of the LOCKCELL_TAG option of the tasks of this job tagged with 'tag'
+        """
+        return tag_value(tag, self._lockcell._config.namespace)
+
+    def _root_options(self, tag: TaskTag, priority: int) -> TaskOptions:
+        """
+        Builds the options of a task submitted by the client, tagged with 'tag' in the namespace of the
+        job (the default options of the session are shared with the other jobs, they are left untouched)
+        """
+        options = deepcopy(self._lockcell._session.task_options)
+        options.options = dict(options.options or {})
+        options.options[LOCKCELL_TAG] = self._tag_value(tag)
+        if self._lockcell._config.namespace is not None:
+            options.options[LOCKCELL_JOB_TAG] = self._lockcell._config.namespace
+        options.priority = priority
+        return options
+
     def _link_tag(self, tag: TaskTag):
         if tag not in self._tag_finder:
-            self._tag_finder[tag] = TasksFinder(
-                self._lockcell._session._endpoint,
-                self._lockcell._session._session_id,
-                Task.options[LOCKCELL_TAG] == tag.value,
-            )  # type: ignore
+            session = self._lockcell._session
+            if isinstance(session, LocalPymonik):
+                self._tag_finder[tag] = LocalTasksFinder(session, self._tag_value(tag))  # type: ignore
+            else:
+                finder_class = TasksListener if self._lockcell.use_events else TasksFinder
+                self._tag_finder[tag] = finder_class(
+                    session._endpoint,
+                    session._session_id,
+                    Task.options[LOCKCELL_TAG] == self._tag_value(tag),
+                )  # type: ignore
             self._metadata_buffers[tag] = []  # initialize buffer for this tag
 
+    def _link_published(self, tag: TaskTag):
+        """
+        Same as '_link_tag' for the results published by the tasks with 'tag' (see 'Tasks.utils.publish')
+        """
+        if tag not in self._tag_finder:
+            self._tag_finder[tag] = self._published_finder(tag, self._lockcell._config.namespace)
+            self._metadata_buffers[tag] = []
+
+    def _published_finder(
+        self, tag: TaskTag, namespace: str | None
+    ) -> LocalResultsFinder | ResultsFinder | ResultsListener:
+        """
+        Returns a finder of the results published with 'tag' by the tasks of 'namespace'
+        """
+        session = self._lockcell._session
+        if isinstance(session, LocalPymonik):
+            return LocalResultsFinder(session, published_prefix(tag, namespace))
+        finder_class = ResultsListener if self._lockcell.use_events else ResultsFinder
+        return finder_class(
+            session._endpoint,  # type: ignore
+            session._session_id,  # type: ignore
+            Result.name.startswith(published_prefix(tag, namespace)),
+        )
+
     def _update_tag(self, tag: TaskTag):
         if tag not in self._tag_finder:
             raise ValueError(f"tag : {tag}, is not linked, cannot search for it")
@@ -196,16 +343,90 @@ class DeltaDebugHandler(ABC):
             raise ValueError(f"tag : {tag}, is not linked, cannot add metadata for it")
         self._metadata_buffers[tag].extend(data)
 
+    # Cancellation helpers
+
+    def _cancel_obsolete(self) -> int:
+        """
+        Cancels the tasks that the tasks tagged CANCEL asked for (see 'Task._cancel'), should be used
+        in 'update()'
+
+        Returns:
+            int: The number of cancelled tasks
+        """
+        return self._cancel_requested(self._tag_finder[TaskTag.CANCEL])
+
+    def _cancel_requested(
+        self, finder: LocalResultsFinder | ResultsFinder | ResultsListener
+    ) -> int:
+        """
+        Cancels the tasks that the new CANCEL publications found by 'finder' asked for
+
+        Returns:
+            int: The number of cancelled tasks
+        """
+        cancelled = 0
+        for request in finder.update():
+            cancelled += self._cancel_results(self._get_published(request))  # type: ignore
+        return cancelled
+
+    # Status of the tasks that didn't produce their result yet
+    _CANCELLABLE = (
+        TaskStatus.CREATING,
+        TaskStatus.SUBMITTED,
+        TaskStatus.DISPATCHED,
+        TaskStatus.PENDING,
+        TaskStatus.PAUSED,
+        TaskStatus.PROCESSING,
+    )
+
+    def _cancel_results(self, costs: dict[str, float]) -> int:
+        """
+        Cancels the tasks producing the results of 'costs', and counts the time saved with the
+        estimated duration (in seconds) of each of them
+
+        Returns:
+            int: The number of cancelled tasks
+        """
+        session = self._lockcell._session
+        if isinstance(session, LocalPymonik):
+            cancelled = session.cancel_results(list(costs))
+            self.cancelled_tasks += len(cancelled)
+            self.saved_task_seconds += sum(costs[result_id] for result_id in cancelled)
+            return len(cancelled)
+
+        saved: dict[str, float] = {}
+        try:
+            for result_id, cost in costs.items():
+                owner = session._results_client.get_result(result_id).owner_task_id  # type: ignore
+                task = session._tasks_client.get_task(owner)  # type: ignore
+                if task.status not in self._CANCELLABLE:
+                    continue
+                elapsed = 0.0
+                if task.status == TaskStatus.PROCESSING and task.started_at is not None:
+                    elapsed = (datetime.now(timezone.utc) - task.started_at).total_seconds()
+                saved[owner] = max(0.0, cost - elapsed)
+            session._tasks_client.cancel_tasks(list(saved))  # type: ignore
+        except grpc.RpcError as e:
+            warnings.warn(RuntimeWarning(f"Failed to cancel obsolete tasks : {e}"))
+            return 0
+        self.cancelled_tasks += len(saved)
+        self.saved_task_seconds += sum(saved.values())
+        return len(saved)
+
     # Result buffer helpers
 
     def _add_result_to_buffer(self, data: list):
         """
         Add data to the buffer to resituate them during the 'get_update()' call, should be used in 'update()'
+        The data is recorded in the journal of the job, if any
 
         Args:
             data (list[list]): The data to add
         """
         self._result_buffer.append(data)
+        if self._lockcell._journal is not None:
+            step = getattr(self._lockcell._job_status, "step", 0)
+            self._lockcell._journal.record_failing_sets([data], step)
 
     def _clear_buffer(self):
         """
@@ -217,3 +438,39 @@ class DeltaDebugHandler(ABC):
         tmp = self._result_buffer
         self._result_buffer = []
         return tmp
+
+    # Journal helpers
+
+    def _outcome_finders(self) -> list[LocalResultsFinder | ResultsFinder | ResultsListener]:
+        """
+        Returns the finders of the outcomes of the tests published by the tasks of the job
+        """
+        return [self._tag_finder[TaskTag.OUTCOME]]  # type: ignore
+
+    def _record_outcomes(
+        self, finders: list[LocalResultsFinder | ResultsFinder | ResultsListener] | None = None
+    ):
+        """
+        Records the outcomes of the tests published since the last call in the journal of the job,
+        should be used in 'update()'
+
+        Args:
+            finders (list | None, optional): The finders to read. Defaults to '_outcome_finders()'.
+        """
+        journal = self._lockcell._journal
+        if journal is None:
+            return
+        for finder in self._outcome_finders() if finders is None else finders:
+            for published in finder.update():
+                journal.record_outcomes(self._get_published(published))
+
+    def _restore_failing_sets(self, journal: Journal) -> list[list]:
+        """
+        Puts the failing sets recorded in 'journal' back in the buffer, to report them again
+
+        Returns:
+            list[list]: The failing sets
+        """
+        failing_sets = journal.failing_sets()
+        self._result_buffer.extend(failing_sets)
+        return failing_sets
@@ -3,16 +3,16 @@ from typing import TYPE_CHECKING
 from ..Tasks.utils import TaskTag
 from pymonik import ResultHandle
 
-from ..constants import LOCKCELL_TAG
 from .algo_base import DeltaDebugHandler
 from ..utils import Status, is_running
 from ..graph import Node
-from ..Tasks.Task import nTask
+from ..Tasks.Task import nTask, task_priority
 from ..Tasks.Results import TaskResult
 
 
 if TYPE_CHECKING:
     from ..core import Lockcell
+    from ..journal import Journal
 
 
 class DDMin(DeltaDebugHandler):
@@ -32,22 +32,26 @@ class DDMin(DeltaDebugHandler):
         self._expected_result: ResultHandle[TaskResult] | None = None
         self._result: list[list] = []
         self._graph_root = graph_root
-        self._link_tag(TaskTag.THROWN)
-        self._link_tag(TaskTag.END_ROOT)
+        self._link_published(TaskTag.THROWN)
 
     def start(self):
         """
         Start the DDMin process by invoking the root task and updating the status.
         """
-        options = self._lockcell._session.task_options
-        options.options = options.options.copy()
-        options.options[LOCKCELL_TAG] = TaskTag.ROOT.value
+        options = self._root_options(
+            TaskTag.ROOT, task_priority(self._lockcell._config, self._lockcell._search_space)
+        )
 
+        # The root subsets have no conjugate when the search space isn't split in two
+        n = self._lockcell._config.get_root_granularity(len(self._lockcell._search_space))
         self._expected_result = nTask.invoke(  # type: ignore
             self._lockcell._search_space,
-            2,
+            n,
             self._lockcell._config,
             self._graph_root,
+            True,
+            None,
+            list(range(n)) if n > 2 else [],
             pymonik=self._lockcell._session,
             task_options=options,
         )
@@ -69,12 +73,16 @@ class DDMin(DeltaDebugHandler):
         if not self._expected_result:
             raise RuntimeError("Cannot update a result that is not started")
 
+        self._cancel_obsolete()
+        self._record_outcomes()
         test = False
         if self._update_tag(TaskTag.THROWN):
             self._update_status(Status.UPDATED)
             test = True
 
-        if self._update_tag(TaskTag.END_ROOT):
+        # The root result is only available once every delegated subtask has ended
+        if self._is_result_ready(self._expected_result):
+            self._collect_root_result()
             self._update_status(Status.COMPLETED)
             test = True
         return test
@@ -95,33 +103,45 @@ class DDMin(DeltaDebugHandler):
             )
         if not self._expected_result:
             raise AttributeError("Tried to wait for a non existing result")
-        self._expected_result.wait()
+        self._wait_for(self._expected_result)
+        self._collect_root_result()
         self._update_status(Status.COMPLETED)
         return self
 
+    def restore(self, journal: "Journal"):
+        """
+        Reports the failing sets recorded again, the tests recorded are answered by the tasks
+        """
+        self._result = self._restore_failing_sets(journal)
+
+    def _collect_root_result(self):
+        """
+        Download the result of the root task and add the failing subsets that were not thrown yet.
+        """
+        if self._expected_result is None:
+            raise AttributeError("Tried to collect a non existing result")
+        root_result = self._get_result_handle(self._expected_result)
+
+        # TODO: Remove when good implem of Task.py (currently returning a tuple and not a TaskResult)
+        root_result_bis: TaskResult = TaskResult(*root_result)  # type: ignore
+
+        for failing_set in root_result_bis.failing_subset_list:
+            if not _already_contains(self._result, failing_set):
+                self._add_result_to_buffer(failing_set)
+                self._result.append(failing_set)
+
     def _flush_metadata_buffers_into_result_buffer(self):
         """
         Retrieve the result associated to metadata from the tag buffers and put them into the main result buffer, avoiding duplicates.
         """
         for thrown in self._metadata_buffers[TaskTag.THROWN]:
-            thrown_result: list = self._get_task_result(thrown, list)
-            if not _already_contains(self._result, thrown_result):
-                self._add_result_to_buffer(thrown_result)
-                self._result.append(thrown_result)
+            thrown_results: list[list] = self._get_published(thrown)  # type: ignore
+            for thrown_result in thrown_results:
+                if not _already_contains(self._result, thrown_result):
+                    self._add_result_to_buffer(thrown_result)
+                    self._result.append(thrown_result)
         self._metadata_buffers[TaskTag.THROWN] = []
 
-        for root in self._metadata_buffers[TaskTag.END_ROOT]:
-            root_result: tuple[list[list], bool] = self._get_task_result(root, tuple)
-
-            # TODO: Remove when good implem of Task.py (currently returning a tuple and not a TaskResult)
-            root_result_bis: TaskResult = TaskResult(*root_result)  # type: ignore
-
-            for failing_set in root_result_bis.failing_subset_list:
-                if not _already_contains(self._result, failing_set):
-                    self._add_result_to_buffer(failing_set)
-                    self._result.append(failing_set)
-        self._metadata_buffers[TaskTag.END_ROOT] = []
-
     def get_result(self) -> list[list]:
         """
         Get the result of the DDMin process.
@@ -148,6 +168,6 @@ def _already_contains(all: list[list], item: list):
     """
     item_set = set(item)
     for x in all:
-        if set(x) == item_set:
+        if len(x) >= len(item_set) and set(x) == item_set:
             return True
     return False
@@ -0,0 +1,312 @@
+import time
+from copy import copy
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from pymonik import ResultHandle
+
+from ..config.BaseConfig import BaseConfig
+from ..events import ResultsFinder, ResultsListener
+from ..backends import LocalPymonik, LocalResultsFinder
+from ..Tasks.utils import AminusB, TaskTag, concat
+from ..Tasks.Task import nTask, task_priority
+from ..Tasks.Results import TaskResult
+from ..utils import Status, RDDMinStatus, is_running
+from .algo_base import DeltaDebugHandler
+from .rddmin import _already_contains
+
+if TYPE_CHECKING:
+    from ..core import Lockcell
+    from ..journal import Journal
+
+
+@dataclass
+class _Iteration:
+    """
+    A DDMin run of a pipelined RDDMin
+
+    Attributes:
+        space (list): The search space of the iteration
+        result (ResultHandle): The result of the root task of the iteration
+        finders (dict): The finders of the results published by the tasks of the iteration, by tag
+        exact (bool): True once the space is known to be the one of the sequential RDDMin
+        known (list[list]): The failing sets thrown by the iteration so far
+    """
+
+    space: list
+    result: ResultHandle
+    finders: dict[TaskTag, LocalResultsFinder | ResultsFinder | ResultsListener]
+    exact: bool = False
+    known: list[list] = field(default_factory=list)
+
+
+class PipelinedRDDMin(DeltaDebugHandler):
+    """
+    Handler for a pipelined version of RDDMin, where the next iteration doesn't wait for the end of the
+    previous one.
+
+    As soon as an iteration throws failing sets, the next iteration is started speculatively on the
+    search space without them. When the iteration ends, its speculative successor is kept if it runs on
+    the search space of the sequential RDDMin (every failing set was thrown before the end), otherwise
+    it is discarded and the next iteration is started on the right search space. Only the failing sets of
+    the iterations on the right search space are reported, so the result is the same as RDDMin's.
+    """
+
+    # Number of iterations that can run ahead of the first unfinished iteration
+    MAX_SPECULATIVE_ITERATIONS = 2
+
+    def __init__(self, lock: "Lockcell"):
+        super().__init__(lock)
+        self._lockcell._job_status = RDDMinStatus(Status.JOB_CREATED, step=0)
+        # The first unfinished iteration, followed by the ones running ahead of it
+        self._iterations: list[_Iteration] = []
+        self._final_result: list[list] = []
+        self._launched: int = 0
+        self.discarded_iterations: int = 0
+
+    def start(self):
+        """
+        Start the first iteration on the whole search space
+        """
+        self._iterations = [self._launch(self._lockcell._search_space, False)]
+        self._iterations[0].exact = True
+        self._update_status(Status.RUNNING)
+        self._new_step()
+
+    def update(self) -> bool:
+        """
+        Collects the failing sets thrown by the iterations, starts the next iterations ahead and
+        reconciles the iterations that ended
+
+        Raises:
+            RuntimeError: If the process has not been started.
+
+        Returns:
+            bool: True if new failing sets were found or if an iteration ended
+        """
+        if self.is_done:
+            return False
+        if not self._iterations:
+            raise RuntimeError("Cannot update a result that is not started")
+
+        self._cancel_obsolete()
+        self._record_outcomes()
+        updated = False
+        for iteration in self._iterations:
+            for thrown in iteration.finders[TaskTag.THROWN].update():
+                for failing_set in self._get_published(thrown):  # type: ignore
+                    if _already_contains(iteration.known, failing_set):
+                        continue
+                    iteration.known.append(failing_set)
+                    if iteration.exact:
+                        updated |= self._report(failing_set)
+
+        updated |= self._reconcile()
+        if not self.is_done:
+            self._run_ahead()
+        if updated and not self.is_done:
+            self._update_status(Status.UPDATED)
+        return updated
+
+    def wait(self):
+        """
+        Wait for the end of the last iteration
+
+        Raises:
+            RuntimeError: If the job status is invalid.
+
+        Returns:
+            self
+        """
+        if not (is_running(self._lockcell._job_status) or self.is_done):
+            raise RuntimeError(
+                f"Tried to wait for a result with {self._lockcell._job_status} status"
+            )
+        while not self.is_done:
+            if not self.update():
+                time.sleep(self.WAIT_INTERVAL)
+        return self
+
+    def get_result(self) -> list[list]:
+        """
+        Get the final result of the pipelined RDDMin process.
+
+        Raises:
+            RuntimeError: If the result is not ready.
+
+        Returns:
+            list[list]: The minimized failing subsets.
+        """
+        if not self.is_done:
+            raise RuntimeError(
+                "get_result can only be used when the result is ready (use the DeltaDebugHandler.done property to verify it)"
+            )
+        return self._final_result
+
+    def close(self):
+        super().close()
+        for iteration in self._iterations:
+            self._close_iteration(iteration)
+        # Closing again (from Lockcell.__del__) must not read the results of the closed session
+        self._iterations = []
+
+    def _flush_metadata_buffers_into_result_buffer(self):
+        """
+        The failing sets are already downloaded by 'update()'
+        """
+        pass
+
+    def restore(self, journal: "Journal"):
+        """
+        Reports the failing sets recorded again, and restarts from the last iteration recorded
+        """
+        self._final_result = self._restore_failing_sets(journal)
+        last = journal.last_iteration()
+        if last is not None:
+            step, self._lockcell._search_space = last
+            # 'start()' counts the restored iteration again
+            self._lockcell._job_status.step = step - 1  # type: ignore
+
+    def _outcome_finders(self):
+        return super()._outcome_finders() + [
+            iteration.finders[TaskTag.OUTCOME]
+            for iteration in self._iterations
+            if TaskTag.OUTCOME in iteration.finders
+        ]
+
+    def _cancel_obsolete(self) -> int:
+        cancelled = super()._cancel_obsolete()
+        for iteration in self._iterations:
+            cancelled += self._cancel_requested(iteration.finders[TaskTag.CANCEL])
+        return cancelled
+
+    # Pipeline helpers
+
+    def _launch(self, space: list, ahead: bool) -> _Iteration:
+        """
+        Starts a DDMin iteration on 'space', in its own namespace so that its failing sets are told apart
+        from the ones of the other iterations. The iterations started 'ahead' of the end of the previous
+        one only use the workers left by the others
+        """
+        namespace = self._lockcell._config.namespace
+        self._launched += 1
+        iteration_namespace = f"{namespace}.{self._launched}" if namespace else str(self._launched)
+        config: BaseConfig = copy(self._lockcell._config).set_namespace(iteration_namespace)
+        config.run_ahead = ahead
+        self._lockcell._share_config(config)
+
+        # The root subsets have no conjugate when the search space isn't split in two
+        n = config.get_root_granularity(len(space))
+        result = nTask.invoke(  # type: ignore
+            space,
+            n,
+            config,
+            None,
+            True,
+            None,
+            list(range(n)) if n > 2 else [],
+            pymonik=self._lockcell._session,
+            task_options=self._root_options(TaskTag.ROOT, task_priority(config, space)),
+        )
+        tags = [TaskTag.THROWN, TaskTag.CANCEL]
+        if self._lockcell._journal is not None:
+            tags.append(TaskTag.OUTCOME)
+        finders = {tag: self._published_finder(tag, iteration_namespace) for tag in tags}
+        return _Iteration(space, result, finders)
+
+    def _reconcile(self) -> bool:
+        """
+        Ends the first iterations if they are done: their successor is kept if it runs on the search
+        space of the sequential RDDMin, otherwise the next iteration is started again
+
+        Returns:
+            bool: True if an iteration ended
+        """
+        ended = False
+        while self._iterations and self._is_result_ready(self._iterations[0].result):
+            ended = True
+            head = self._iterations.pop(0)
+            outcome = TaskResult(*self._get_result_handle(head.result))  # type: ignore
+            self._close_iteration(head)
+            for failing_set in outcome.failing_subset_list:
+                self._report(failing_set)
+
+            if outcome.test_of_delta:
+                self._discard(self._iterations)
+                self._iterations = []
+                self._update_status(Status.COMPLETED)
+                return True
+
+            space = AminusB(head.space, concat(outcome.failing_subset_list))
+            self._lockcell._search_space = space
+            if not self._iterations or self._iterations[0].space != space:
+                self._discard(self._iterations)
+                self._iterations = [self._launch(space, False)]
+            successor = self._iterations[0]
+            successor.exact = True
+            for failing_set in successor.known:
+                self._report(failing_set)
+            self._new_step()
+        return ended
+
+    def _run_ahead(self):
+        """
+        Starts the successor of the iterations that threw failing sets, on the search space without them
+        (and starts it again when other failing sets were thrown since)
+        """
+        for position, iteration in enumerate(self._iterations):
+            if not iteration.known or position >= self.MAX_SPECULATIVE_ITERATIONS:
+                return
+            space = AminusB(iteration.space, concat(iteration.known))
+            successors = self._iterations[position + 1 :]
+            if successors and successors[0].space == space:
+                continue
+            self._discard(successors)
+            del self._iterations[position + 1 :]
+            self._iterations.append(self._launch(space, True))
+
+    def _discard(self, iterations: list[_Iteration]):
+        """
+        Drops iterations that run on a wrong search space, with their tasks that didn't start (only the
+        root task on ArmoniK)
+        """
+        session = self._lockcell._session
+        for iteration in iterations:
+            if isinstance(session, LocalPymonik):
+                self.cancelled_tasks += session.cancel_graphs([iteration.result.result_id])
+            else:
+                self._cancel_results({iteration.result.result_id: 0.0})
+            self._close_iteration(iteration)
+            self.discarded_iterations += 1
+
+    def _close_iteration(self, iteration: _Iteration):
+        # The outcomes of the tests of a discarded iteration are still right
+        if TaskTag.OUTCOME in iteration.finders:
+            self._record_outcomes([iteration.finders[TaskTag.OUTCOME]])
+        for finder in iteration.finders.values():
+            finder.close()
+
+    def _report(self, failing_set: list) -> bool:
+        """
+        Adds a failing set of an iteration on the right search space to the result
+
+        Returns:
+            bool: True if the failing set is new
+        """
+        if _already_contains(self._final_result, failing_set):
+            return False
+        self._add_result_to_buffer(failing_set)
+        self._final_result.append(failing_set)
+        return True
+
+    def _new_step(self):
+        """
+        Increment the step counter in the job status, and records the search space of the new
+        iteration in the journal of the job
+        """
+        self._lockcell._job_status.step += 1  # type: ignore
+        if self._lockcell._journal is not None:
+            self._lockcell._journal.record_iteration(
+                self._lockcell._job_status.step,  # type: ignore
+                self._iterations[0].space,
+            )
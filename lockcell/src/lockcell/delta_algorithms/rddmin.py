@@ -1,12 +1,14 @@
 from typing import TYPE_CHECKING
-from ..Tasks.utils import TaskTag
+from ..Tasks.utils import AminusB, TaskTag, concat
 from ..utils import Status, RDDMinStatus, is_running
 from ..Tasks.Results import RDDMinResult, unfake_result, TaskResult
 from ..Tasks.TaskMaster import running_rddmin_task
+from ..Tasks.Task import TOP_PRIORITY
 from .algo_base import DeltaDebugHandler
 
 if TYPE_CHECKING:
     from ..core import Lockcell
+    from ..journal import Journal
 
 
 class RDDMin(DeltaDebugHandler):
@@ -27,18 +29,23 @@ class RDDMin(DeltaDebugHandler):
         self._last_known_iteration: RDDMinResult | None = None
         self._result_per_iteration: list[list[list]] = []
         self._final_result: list[list] = []
-        self._link_tag(TaskTag.THROWN)
+        # The search space of the last known iteration
+        self._space: list | None = None
+        self._link_published(TaskTag.THROWN)
         self._link_tag(TaskTag.RDDMIN_CHAIN)
 
     def start(self):
         """
         Start the RDDMin process by invoking the initial RDDMin task and updating the status.
         """
+        if self._space is None:
+            self._space = self._lockcell._search_space
         self._last_known_iteration = unfake_result(
             running_rddmin_task.invoke(  # type: ignore
-                self._lockcell._search_space,
+                self._space,
                 self._lockcell._config,
                 pymonik=self._lockcell._session,
+                task_options=self._root_options(TaskTag.CLASSIC, TOP_PRIORITY),
             )
             .wait()
             .get(),
@@ -59,6 +66,8 @@ class RDDMin(DeltaDebugHandler):
         if not self._last_known_iteration:
             raise RuntimeError("Cannot update a result that is not started")
 
+        self._cancel_obsolete()
+        self._record_outcomes()
         test = False
 
         if self._update_tag(TaskTag.THROWN):
@@ -89,17 +98,9 @@ class RDDMin(DeltaDebugHandler):
         # Can give the impression that we dont take into account the last iteration but actually the last one only asses that the previous one terminated with true testing the global delta so no need to compute it
         while self._last_known_iteration.next is not None:
             # Wait for the result of the last iteration
-            intermediate_result: TaskResult = (
-                self._last_known_iteration.iteration_result.wait().get()
-            )
-            # TODO: Remove when good implem of Task.py (currently returning a tuple and not a TaskResult)
-            intermediate_result = TaskResult(*intermediate_result)  # type: ignore
-
-            # Add it to the buffer (for update), the final result, and updates the lockcell search_space
-            self._add_result_to_buffer(intermediate_result.failing_subset_list)
-            self._final_result.extend(intermediate_result.failing_subset_list)
-            # sum(list, []) concatenate a list of list of elt to make it a giant list of elt
-            self._lockcell._reduce_search_space(sum(intermediate_result.failing_subset_list, []))
+            self._wait_for(self._last_known_iteration.iteration_result)
+            # Add its failing sets to the buffer (for update) and the final result, and reduces the search space
+            self._end_iteration()
 
             # goes to the next iteration
             self._last_known_iteration = unfake_result(
@@ -116,10 +117,11 @@ class RDDMin(DeltaDebugHandler):
         Handles both THROWN and RDDMIN_CHAIN tags.
         """
         for thrown in self._metadata_buffers[TaskTag.THROWN]:
-            thrown_result: list = self._get_task_result(thrown, tuple)[0][0]
-            if not _already_contains(self._final_result, thrown_result):
-                self._add_result_to_buffer(thrown_result)
-                self._final_result.append(thrown_result)
+            thrown_results: list[list] = self._get_published(thrown)  # type: ignore
+            for thrown_result in thrown_results:
+                if not _already_contains(self._final_result, thrown_result):
+                    self._add_result_to_buffer(thrown_result)
+                    self._final_result.append(thrown_result)
         self._metadata_buffers[TaskTag.THROWN] = []
 
         for _ in self._metadata_buffers[TaskTag.RDDMIN_CHAIN]:
@@ -153,13 +155,10 @@ class RDDMin(DeltaDebugHandler):
             raise AttributeError("Cannot retrieve the next_iteration of a non existing result")
 
         try:
-            iteration_result = self._get_result_handle(self._last_known_iteration.iteration_result)
+            iteration_result = self._end_iteration()
         except RuntimeError as e:
             raise RuntimeError(f"Error while retrieving the last iteration : {e}")
 
-        # TODO: Remove when good implem of Task.py (currently returning a tuple and not a TaskResult)
-        iteration_result = TaskResult(*iteration_result)  # type: ignore
-
         if iteration_result.test_of_delta:
             self._update_status(Status.COMPLETED)
             return
@@ -176,11 +175,50 @@ class RDDMin(DeltaDebugHandler):
         print(f"\n*** ITERATION {self._lockcell._job_status.step} DONE ***")  # type: ignore
         print("Summary : ", self._result_per_iteration[-1].__str__()[1:-1])
 
+    def restore(self, journal: "Journal"):
+        """
+        Reports the failing sets recorded again, and restarts from the last iteration recorded
+        """
+        self._final_result = self._restore_failing_sets(journal)
+        last = journal.last_iteration()
+        if last is not None:
+            step, self._space = last
+            # 'start()' counts the restored iteration again
+            self._lockcell._job_status.step = step - 1  # type: ignore
+
+    def _end_iteration(self) -> TaskResult:
+        """
+        Downloads the result of the last known iteration, reports its failing sets that were not
+        thrown and reduces the search space for the next iteration
+
+        Returns:
+            TaskResult: The result of the iteration
+        """
+        iteration_result = self._get_result_handle(self._last_known_iteration.iteration_result)  # type: ignore
+
+        # TODO: Remove when good implem of Task.py (currently returning a tuple and not a TaskResult)
+        iteration_result = TaskResult(*iteration_result)  # type: ignore
+
+        for failing_set in iteration_result.failing_subset_list:
+            if not _already_contains(self._final_result, failing_set):
+                self._add_result_to_buffer(failing_set)
+                self._final_result.append(failing_set)
+        if not iteration_result.test_of_delta:
+            self._space = AminusB(self._space, concat(iteration_result.failing_subset_list))  # type: ignore
+            self._lockcell._search_space = self._space  # type: ignore
+        return iteration_result
+
     def _new_step(self):
         """
-        Increment the step counter in the job status.
+        Increment the step counter in the job status, and records the search space of the new
+        iteration in the journal of the job
         """
         self._lockcell._job_status.step += 1  # type: ignore
+        if self._lockcell._journal is not None:
+            self._lockcell._journal.record_iteration(
+                self._lockcell._job_status.step,  # type: ignore
+                self._space,  # type: ignore
+            )
 
 
 def _already_contains(all: list[list], item: list):
@@ -192,7 +230,8 @@ def _already_contains(all: list[list], item: list):
     Returns:
         bool: True if item is present, False otherwise.
     """
+    item_set = set(item)
     for x in all:
-        if set(x) == set(item):
+        if len(x) >= len(item_set) and set(x) == item_set:
             return True
     return False
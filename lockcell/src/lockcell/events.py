@@ -1,8 +1,17 @@
+import threading
+import warnings
+from typing import cast
+
 import grpc
 
-from armonik.client import ArmoniKTasks
-from armonik.common import Task
+from armonik.client import ArmoniKResults, ArmoniKTasks
+from armonik.common import Result, ResultStatus, Task
 from armonik.common import TaskStatus
+from armonik.common import EventTypes
+from armonik.protogen.client.events_service_pb2_grpc import EventsStub
+from armonik.protogen.common.events_common_pb2 import EventSubscriptionRequest
+from armonik.protogen.common.results_filters_pb2 import Filters as rawResultFilters
+from armonik.protogen.common.tasks_filters_pb2 import Filters as rawTaskFilters
 
 
 class TasksFinder:
@@ -38,18 +47,24 @@ class TasksFinder:
         """
         self._channel.close()
 
-    def _load_next_page(self) -> bool:
+    def _list(self) -> tuple[int, list]:
         """
-        Load the next page of tasks from the ArmoniK API and extend the internal task list.
-        Returns:
-            bool: True if new tasks were loaded, False otherwise.
+        Requests the current page, returns the total number of matching items and the page
         """
-        size, tasks = self._task_handler.list_tasks(
+        return self._task_handler.list_tasks(
             task_filter=self._filter,
             sort_field=Task.created_at,
             page=self._page,
             page_size=TasksFinder.PAGE_SIZE,
         )  # type: ignore
+
+    def _load_next_page(self) -> bool:
+        """
+        Load the next page of tasks from the ArmoniK API and extend the internal task list.
+        Returns:
+            bool: True if new tasks were loaded, False otherwise.
+        """
+        size, tasks = self._list()
         if len(tasks) == TasksFinder.PAGE_SIZE:
             self._page += 1
         if size > len(self._tasks):
@@ -74,3 +89,218 @@ class TasksFinder:
         Close the gRPC channel explicitly.
         """
         self._channel.close()
+
+
+class ResultsFinder(TasksFinder):
+    """
+    Same as TasksFinder for the completed results of a session, used to find the results published
+    by the tasks (see 'Tasks.utils.publish')
+    """
+
+    def __init__(self, endpoint: str, session_id, filter) -> None:
+        """
+        Initialize the ResultsFinder with a gRPC endpoint, session ID, and filter.
+        Args:
+            endpoint (str): The gRPC endpoint to connect to.
+            session_id: The session ID to filter results.
+            filter: Additional filter to apply to results.
+        """
+        self._channel = grpc.insecure_channel(endpoint)
+        self._result_handler: ArmoniKResults = ArmoniKResults(self._channel)
+
+        self._tasks: list[Result] = []  # type: ignore
+        self._filter = (
+            (Result.session_id == session_id) & (Result.status == ResultStatus.COMPLETED) & filter
+        )
+
+        self._page: int = 0
+
+    def _list(self) -> tuple[int, list]:
+        return self._result_handler.list_results(
+            result_filter=self._filter,
+            sort_field=Result.created_at,
+            page=self._page,
+            page_size=TasksFinder.PAGE_SIZE,
+        )  # type: ignore
+
+
+class TasksListener:
+    """
+    Helper class to find ArmoniK tasks for a given session and filter, pushed by the events service.
+
+    A background thread subscribes to the task status updates of the session and collects the tasks
+    that complete, so that 'update()' costs no request to the control plane.
+    If the event stream fails or ends, it falls back to polling with a TasksFinder.
+    Same interface as TasksFinder.
+    """
+
+    def __init__(self, endpoint: str, session_id, filter) -> None:
+        """
+        Initialize the TasksListener with a gRPC endpoint, session ID, and filter and starts listening.
+        Args:
+            endpoint (str): The gRPC endpoint to connect to.
+            session_id: The session ID to filter tasks.
+            filter: Additional filter to apply to tasks.
+        """
+        self._endpoint = endpoint
+        self._session_id = session_id
+        self._filter = filter
+
+        self._channel = grpc.insecure_channel(endpoint)
+        self._events_stub: EventsStub = EventsStub(self._channel)
+        self._task_handler: ArmoniKTasks = ArmoniKTasks(self._channel)
+        self._result_handler: ArmoniKResults = ArmoniKResults(self._channel)
+
+        self._lock = threading.Lock()
+        self._news: list = []
+        self._seen: set[str] = set()
+        self._fallback: TasksFinder | None = None
+        self._call = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._listen, daemon=True)
+        self._thread.start()
+
+    def __del__(self):
+        """
+        Destructor to stop listening and close the gRPC channel when the object is deleted.
+        """
+        self.close()
+
+    @property
+    def is_polling(self) -> bool:
+        """
+        True if the event stream failed and the tasks are found by polling
+        """
+        return self._fallback is not None
+
+    # What is listened to, overridden by ResultsListener
+    _FINDER: type[TasksFinder] = TasksFinder
+
+    def _subscription(self) -> EventSubscriptionRequest:
+        return EventSubscriptionRequest(
+            session_id=self._session_id,
+            returned_events=[EventTypes.TASK_STATUS_UPDATE],
+            tasks_filters=cast(rawTaskFilters, self._filter.to_disjunction().to_message()),
+            results_filters=rawResultFilters(),
+        )
+
+    def _completed_id(self, message) -> str | None:
+        """
+        Returns the id of the task if the event is its completion, None otherwise
+        """
+        if message.WhichOneof("update") != "task_status_update":
+            return None
+        event = message.task_status_update
+        return event.task_id if event.status == TaskStatus.COMPLETED else None
+
+    def _get(self, id: str):
+        return self._task_handler.get_task(id)
+
+    @staticmethod
+    def _id(found) -> str:
+        return found.id
+
+    def _listen(self):
+        """
+        Body of the listening thread, streams the events of the session until the stream is closed
+        """
+        try:
+            self._call = self._events_stub.GetEvents(self._subscription())
+            if self._closed:
+                self._call.cancel()
+                return
+            # Once the subscription is acknowledged, recovers what completed before it
+            self._call.initial_metadata()
+            catch_up = self._FINDER(self._endpoint, self._session_id, self._filter)
+            self._add_tasks(catch_up.update())
+            catch_up.close()
+
+            for message in self._call:
+                completed = self._completed_id(message)
+                if completed is not None and completed not in self._seen:
+                    self._add_tasks([self._get(completed)])
+        except grpc.RpcError as e:
+            self._fall_back(f"Event stream failed, falling back to polling : {e}")
+            return
+        # The server ended the stream, nothing would be found anymore
+        self._fall_back("Event stream ended, falling back to polling")
+
+    def _fall_back(self, reason: str):
+        """
+        Finds the tasks by polling from now on, unless the listener was closed (the tasks already
+        found are not returned again)
+        """
+        if self._closed:
+            return
+        warnings.warn(RuntimeWarning(reason))
+        with self._lock:
+            self._fallback = self._FINDER(self._endpoint, self._session_id, self._filter)
+
+    def _add_tasks(self, tasks: list):
+        with self._lock:
+            for task in tasks:
+                if self._id(task) not in self._seen:
+                    self._seen.add(self._id(task))
+                    self._news.append(task)
+
+    def update(self):
+        """
+        Retrieve the tasks that completed since the last update.
+        Returns:
+            list[Task]: The list of newly completed tasks.
+        """
+        with self._lock:
+            fallback = self._fallback
+        if fallback is not None:
+            self._add_tasks(fallback.update())
+        with self._lock:
+            news = self._news
+            self._news = []
+        return news
+
+    def close(self):
+        """
+        Stop listening and close the gRPC channel explicitly.
+        """
+        self._closed = True
+        if self._call is not None:
+            self._call.cancel()
+        if self._fallback is not None:
+            self._fallback.close()
+        self._channel.close()
+
+
+class ResultsListener(TasksListener):
+    """
+    Same as TasksListener for the completed results of a session, used to find the results published
+    by the tasks (see 'Tasks.utils.publish'). Falls back to polling with a ResultsFinder.
+    """
+
+    _FINDER = ResultsFinder
+
+    def _subscription(self) -> EventSubscriptionRequest:
+        return EventSubscriptionRequest(
+            session_id=self._session_id,
+            returned_events=[EventTypes.NEW_RESULT, EventTypes.RESULT_STATUS_UPDATE],
+            tasks_filters=rawTaskFilters(),
+            results_filters=cast(rawResultFilters, self._filter.to_disjunction().to_message()),
+        )
+
+    def _completed_id(self, message) -> str | None:
+        """
+        Returns the id of the result if the event is its completion, None otherwise
+        (a result created with its data is completed as soon as it is created)
+        """
+        kind = message.WhichOneof("update")
+        if kind not in ("new_result", "result_status_update"):
+            return None
+        event = getattr(message, kind)
+        return event.result_id if event.status == ResultStatus.COMPLETED else None
+
+    def _get(self, id: str):
+        return self._result_handler.get_result(id)
+
+    @staticmethod
+    def _id(found) -> str:
+        return found.result_id
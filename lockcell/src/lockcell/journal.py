@@ -0,0 +1,194 @@
+"""
+Checkpoint journal of a Lockcell job.
+
+A multi-hour RDDMin only keeps its progress in the memory of the client: if the client dies or the
+session is closed, every test already run is lost. A `Journal` is an append-only SQLite database where
+the job records, as it goes:
+
+    - the outcome of every test run by the workers (published with the OUTCOME tag),
+    - the failing sets found,
+    - the search space of every RDDMin iteration.
+
+`Lockcell.resume(path)` reads it back: the failing sets are reported again, an RDDMin restarts from its
+last iteration, and the tests whose outcome is known are answered without being run (the outcomes
+are uploaded once in the session, see Tasks.utils.KnownOutcomes), so the tasks replay the decided
+part of the job in a few seconds. A journaled job can't run with fused aggregators.
+
+    with Lockcell(endpoint, config=config, journal="rddmin.journal") as lock:
+        lock.run_rddmin()
+        ...
+    # After a crash
+    with Lockcell(endpoint, config=config) as lock:
+        lock.resume("rddmin.journal")
+        lock.wait()
+"""
+
+import sqlite3
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import cloudpickle
+
+from .Tasks.utils import outcome_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (key TEXT PRIMARY KEY, value BLOB);
+CREATE TABLE IF NOT EXISTS outcomes (delta BLOB, outcome INTEGER);
+CREATE TABLE IF NOT EXISTS failing_sets (iteration INTEGER, failing_set BLOB);
+CREATE TABLE IF NOT EXISTS iterations (iteration INTEGER PRIMARY KEY, space BLOB);
+"""
+
+
+class Journal:
+    """
+    Append-only journal of the progress of a job, in a SQLite database
+
+    Every record is written in its own transaction, in the write-ahead log of the database without
+    waiting for the disk (a crash of the client loses nothing, a crash of the machine the last records
+    at most), so that it can be written at every update of the job.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens the journal at 'path', created if it doesn't exist
+
+        Args:
+            path (str): The path of the database
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._known: set[FrozenSet] = {
+            outcome_key(cloudpickle.loads(delta))
+            for (delta,) in self._db.execute("SELECT delta FROM outcomes")
+        }
+
+    ### Job
+
+    @property
+    def job(self) -> Optional[str]:
+        """
+        The name of the job recorded in the journal, None if it is empty
+        """
+        return self._get("job")
+
+    @property
+    def search_space(self) -> Optional[list]:
+        """
+        The search space of the job (its elements when the job runs on a shared search space)
+        """
+        return self._get("search_space")
+
+    @property
+    def indexed(self) -> bool:
+        """
+        True if the job runs on the indices of a shared search space (see BaseConfig.set_share_search_space)
+        """
+        return bool(self._get("indexed"))
+
+    def start(self, job: str, search_space: list, indexed: bool):
+        """
+        Records the job, or checks that it is the one already recorded when it is resumed
+
+        Raises:
+            ValueError: If the journal holds another job
+        """
+        if self.job is None:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO job VALUES (?, ?)",
+                    [
+                        (key, cloudpickle.dumps(value))
+                        for key, value in (
+                            ("job", job),
+                            ("search_space", search_space),
+                            ("indexed", indexed),
+                        )
+                    ],
+                )
+            return
+        if self.job != job or self.search_space != search_space or self.indexed != indexed:
+            raise ValueError(
+                f"The journal {self.path} holds another job ({self.job} on a search space of "
+                f"{len(self.search_space or [])} elements)"
+            )
+
+    ### Records
+
+    def record_outcomes(self, outcomes: Iterable[Tuple[list, bool]]):
+        """
+        Records the outcomes of tests, the ones already known are skipped
+        """
+        rows = []
+        for delta, outcome in outcomes:
+            key = outcome_key(delta)
+            if key not in self._known:
+                self._known.add(key)
+                rows.append((cloudpickle.dumps(delta), int(outcome)))
+        if rows:
+            with self._db:
+                self._db.executemany("INSERT INTO outcomes VALUES (?, ?)", rows)
+
+    def record_failing_sets(self, failing_sets: List[list], iteration: int = 0):
+        """
+        Records failing sets found by the iteration 'iteration' of the job
+        """
+        if failing_sets:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO failing_sets VALUES (?, ?)",
+                    [(iteration, cloudpickle.dumps(failing_set)) for failing_set in failing_sets],
+                )
+
+    def record_iteration(self, iteration: int, space: list):
+        """
+        Records the search space of the iteration 'iteration' of a RDDMin, once it is started
+        """
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO iterations VALUES (?, ?)",
+                (iteration, cloudpickle.dumps(space)),
+            )
+
+    ### Reading
+
+    def outcomes(self) -> Dict[FrozenSet, bool]:
+        """
+        Returns the outcome of the tests recorded, by set of elements tested (see Tasks.utils.outcome_key)
+        """
+        return {
+            outcome_key(cloudpickle.loads(delta)): bool(outcome)
+            for delta, outcome in self._db.execute("SELECT delta, outcome FROM outcomes")
+        }
+
+    def failing_sets(self) -> List[list]:
+        """
+        Returns the failing sets recorded, in order
+        """
+        return [
+            cloudpickle.loads(failing_set)
+            for (failing_set,) in self._db.execute(
+                "SELECT failing_set FROM failing_sets ORDER BY rowid"
+            )
+        ]
+
+    def last_iteration(self) -> Optional[Tuple[int, list]]:
+        """
+        Returns the last iteration of a RDDMin recorded, with its search space
+        """
+        row = self._db.execute(
+            "SELECT iteration, space FROM iterations ORDER BY iteration DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], cloudpickle.loads(row[1])
+
+    def close(self):
+        self._db.close()
+
+    # Helpers
+
+    def _get(self, key: str):
+        row = self._db.execute("SELECT value FROM job WHERE key = ?", (key,)).fetchone()
+        return None if row is None else cloudpickle.loads(row[0])
@@ -0,0 +1,316 @@
+import time
+from copy import copy
+from enum import Enum
+from typing import Any
+
+from pymonik import Pymonik
+
+from .backends import LocalPymonik
+from .bundle import CodeBundle
+from .config.BaseConfig import BaseConfig
+from .core import Backend, Job, Lockcell
+from .utils import Status, StatusClass
+
+
+class SharePolicy(Enum):
+    """
+    How the workers are shared between the jobs of a JobManager
+    """
+
+    # The tasks of every job are dispatched by priority only, like in a session with a single job
+    NONE = "none"
+    # Every job gets the same share of the workers, whatever its size
+    FAIR = "fair"
+    # Every job gets a share of the workers proportional to its weight
+    WEIGHTED = "weighted"
+
+
+class JobManager:
+    """
+    Runs many independent delta debugging jobs in a single PymoniK session.
+
+    Every job has its own configuration, namespace (so that its tasks and failing sets are told apart
+    from the ones of the other jobs), status and results. The jobs are driven by a single update loop,
+    and the workers are shared between them following a SharePolicy so that a huge job cannot starve
+    the small ones (only the local backend enforces the shares, ArmoniK dispatches the tasks of a session
+    by priority):
+
+        with JobManager(endpoint, share="weighted") as manager:
+            for case, config in cases.items():
+                manager.add_job(config, Job.RDDMIN, name=case, weight=len(config.Pb))
+            manager.run()
+            manager.wait()
+            results = manager.get_results()
+    """
+
+    def __init__(
+        self,
+        endpoint: str | None,
+        *,
+        partition: str = "pymonik",
+        environnement: dict[str, Any] = {},
+        backend: str | Backend = Backend.ARMONIK,
+        max_workers: int | None = None,
+        use_events: bool = True,
+        parallelism: int | None = None,
+        share: str | SharePolicy = SharePolicy.FAIR,
+        poll_interval: float = 0.1,
+        fuse_aggregators: bool = False,
+        code_bundle: CodeBundle | None = None,
+    ) -> None:
+        """
+        Args:
+            endpoint (str | None): The ArmoniK control plane endpoint (ignored by the local backend).
+            partition (str, optional): The ArmoniK partition. Defaults to "pymonik".
+            environnement (dict[str, Any], optional): The PymoniK environment of the tasks. Defaults to {}.
+            backend (str | Backend, optional): Where the tasks are executed. Defaults to Backend.ARMONIK.
+            max_workers (int | None, optional): Number of worker processes of the local backend.
+                Defaults to the number of CPUs.
+            use_events (bool, optional): Track the progress of the jobs with the ArmoniK events stream.
+                Defaults to True.
+            parallelism (int | None, optional): Number of tests that can run at the same time, for
+                every job. Defaults to the capacity of the partition.
+            share (str | SharePolicy, optional): How the workers are shared between the jobs.
+                Defaults to SharePolicy.FAIR.
+            poll_interval (float, optional): Time in seconds between two updates in 'wait()' when
+                nothing new was found. Defaults to 0.1.
+            fuse_aggregators (bool, optional): Run the aggregators on this machine and only the tests
+                on the backend (see CoordinatorPymonik). Defaults to False.
+            code_bundle (CodeBundle | None, optional): A bundle of Lockcell installed by the workers
+                (see build_code_bundle). Defaults to None.
+
+        Raises:
+            ValueError: If the backend or the share policy name doesn't match any implemented one
+        """
+        self._endpoint: str | None = endpoint
+        self._partition: str = partition
+        self._backend: Backend = Lockcell._to_backend(backend)
+        self._use_events: bool = use_events
+        self._parallelism: int | None = parallelism
+        self._share: SharePolicy = self._to_share_policy(share)
+        self.poll_interval: float = poll_interval
+
+        self._session: Pymonik = Lockcell._new_session(
+            self._backend,
+            endpoint,
+            partition,
+            environnement,
+            max_workers,
+            fuse_aggregators,
+            code_bundle,
+        )
+        self._environnement: dict[str, Any] = environnement
+
+        self._jobs: dict[str, Lockcell] = {}
+        self._job_types: dict[str, Job | str] = {}
+        self._weights: dict[str, float] = {}
+        self._open: bool = False
+
+    def __del__(self):
+        # The session doesn't exist if the constructor failed
+        if hasattr(self, "_session"):
+            self.close()
+
+    ### User functions
+
+    def add_job(
+        self,
+        config: BaseConfig,
+        job: str | Job,
+        *,
+        name: str | None = None,
+        weight: float = 1.0,
+    ) -> str:
+        """
+        Adds a job to the manager, it is started by the next 'run()'
+
+        Args:
+            config (BaseConfig): The configuration of the test to debug.
+            job (str | Job): The job to run on it, like Job.RDDMIN or "rddmin".
+            name (str | None, optional): The name of the job, used as its namespace in the session.
+                Defaults to "job<index>".
+            weight (float, optional): Share of the workers given to the job by the WEIGHTED policy.
+                Defaults to 1.0.
+
+        Raises:
+            ValueError: If the name is already used, or if the weight isn't positive
+
+        Returns:
+            str: The name of the job
+        """
+        if name is None:
+            name = f"job{len(self._jobs)}"
+        if name in self._jobs:
+            raise ValueError(f"A job named {name!r} already exists")
+        if weight <= 0:
+            raise ValueError("weight must be a positive number")
+
+        config = copy(config).set_namespace(name)
+        lock = Lockcell(
+            self._endpoint,
+            config=config,
+            partition=self._partition,
+            environnement=self._environnement,
+            backend=self._backend,
+            use_events=self._use_events,
+            parallelism=self._parallelism,
+            session=self._session,
+        )
+        if self._open:
+            lock.open()
+        self._jobs[name] = lock
+        self._job_types[name] = job
+        self._weights[name] = weight
+        return name
+
+    def run(self):
+        """
+        Launch the jobs that are not started yet
+
+        Raises:
+            RuntimeError: If the session is not open
+        """
+        if not self._open:
+            raise RuntimeError(
+                "Cannot run jobs on a closed session, please use JobManager.open() before running anything"
+            )
+        for name, lock in self._jobs.items():
+            if lock._handler is not None:
+                continue
+            self._set_share(name)
+            lock.set_job(self._job_types[name])
+            lock.run()
+
+    def update(self) -> list[str]:
+        """
+        Checks for updates in every running job, the failing sets that were found are downloaded so that
+        'get_update()' returns at once
+
+        Returns:
+            list[str]: The names of the jobs that found new updates
+        """
+        updated = []
+        for name, lock in self._jobs.items():
+            handler = lock._handler
+            if handler is None or handler.is_done:
+                continue
+            if handler._update_and_flush():
+                updated.append(name)
+        return updated
+
+    def get_update(self, name: str) -> list[list]:
+        """
+        Retrieve the updates of the job 'name' that were already found (to call after 'update()')
+
+        Returns:
+            list[list]: The new updates ([] if no updates)
+        """
+        return self[name].get_update()
+
+    def get_status(self, name: str) -> StatusClass:
+        """
+        Returns the actual status of the job 'name' (no request done)
+        """
+        return self[name].get_status()
+
+    def get_result(self, name: str) -> list[list]:
+        """
+        Returns the result of the job 'name'
+
+        Raises:
+            RuntimeError: If the computation isn't ready
+        """
+        return self[name].get_result()
+
+    def get_results(self) -> dict[str, list[list]]:
+        """
+        Returns the result of every job, by name
+
+        Raises:
+            RuntimeError: If a computation isn't ready
+        """
+        return {name: self.get_result(name) for name in self._jobs}
+
+    def wait(self):
+        """
+        Wait until the end of every job, with a single update loop
+        """
+        while not self.is_done:
+            if not self.update():
+                time.sleep(self.poll_interval)
+
+    ### Attribute Manager
+
+    @property
+    def jobs(self) -> list[str]:
+        return list(self._jobs)
+
+    @property
+    def share(self) -> SharePolicy:
+        return self._share
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    @property
+    def is_done(self) -> bool:
+        return all(lock.get_status() == Status.COMPLETED for lock in self._jobs.values())
+
+    def __getitem__(self, name: str) -> Lockcell:
+        if name not in self._jobs:
+            raise KeyError(f"Unknown job : {name!r}")
+        return self._jobs[name]
+
+    # Helpers
+
+    @classmethod
+    def _to_share_policy(cls, share: str | SharePolicy) -> SharePolicy:
+        if isinstance(share, SharePolicy):
+            return share
+        if isinstance(share, str):
+            key = share.strip().lower()
+            for test_share in SharePolicy:
+                if test_share.value == key:
+                    return test_share
+            valid = ", ".join(s.value for s in SharePolicy)
+            raise ValueError(f"Unknown SharePolicy : {share!r}. Valid policy names are : {valid}.")
+        raise TypeError("share must be a str or a SharePolicy.")
+
+    def _set_share(self, name: str):
+        """
+        Gives its share of the workers to the job 'name'
+        """
+        if self._share is SharePolicy.NONE or not isinstance(self._session, LocalPymonik):
+            return
+        weight = self._weights[name] if self._share is SharePolicy.WEIGHTED else 1.0
+        self._session.set_share(name, weight)
+
+    # To handle PymoniK session
+
+    def open(self):
+        """
+        Open the PymoniK session shared by the jobs
+        """
+        self._open = True
+        self._session = self._session.create()
+        for lock in self._jobs.values():
+            lock.open()
+
+    def close(self):
+        """
+        Close the jobs and the PymoniK session
+        """
+        self._open = False
+        for lock in self._jobs.values():
+            lock.close()
+        self._session.close()
+
+    # For usage with context : with
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
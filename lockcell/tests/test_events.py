@@ -0,0 +1,238 @@
+import os
+from pathlib import Path
+
+os.environ["LOCKCELL_CONFIG"] = str(Path(__file__).parent / "config.yaml")
+
+import time
+import queue
+import threading
+from concurrent import futures
+
+import grpc
+import pytest
+
+from armonik.common import Result, Task, TaskStatus
+from armonik.protogen.client.events_service_pb2_grpc import (
+    EventsServicer,
+    add_EventsServicer_to_server,
+)
+from armonik.protogen.client.tasks_service_pb2_grpc import (
+    TasksServicer,
+    add_TasksServicer_to_server,
+)
+from armonik.protogen.client.results_service_pb2_grpc import (
+    ResultsServicer,
+    add_ResultsServicer_to_server,
+)
+from armonik.protogen.common.events_common_pb2 import EventSubscriptionResponse
+from armonik.protogen.common.objects_pb2 import TaskOptions
+from armonik.protogen.common.results_common_pb2 import (
+    GetResultResponse,
+    ListResultsResponse,
+    ResultRaw,
+)
+from armonik.protogen.common.result_status_pb2 import RESULT_STATUS_COMPLETED
+from armonik.protogen.common.tasks_common_pb2 import (
+    GetTaskResponse,
+    ListTasksDetailedResponse,
+    TaskDetailed,
+)
+
+from lockcell.constants import LOCKCELL_TAG
+from lockcell.events import ResultsListener, TasksListener
+from lockcell.Tasks.utils import TaskTag, published_prefix
+
+SESSION = "session"
+
+
+class FakeArmoniK(EventsServicer, TasksServicer, ResultsServicer):
+    """
+    Minimal control plane, serving the tasks, results and events of a single session
+    """
+
+    def __init__(self, events_available: bool = True, events_end: bool = False):
+        self.events_available = events_available
+        # The stream ends normally as soon as it is acknowledged
+        self.events_end = events_end
+        self.list_calls = 0
+        self._lock = threading.Lock()
+        self._completed: list[TaskDetailed] = []
+        self._results: list[ResultRaw] = []
+        self._subscribers: list[queue.Queue] = []
+
+    def complete(self, task_id: str, tag: TaskTag):
+        task = TaskDetailed(
+            id=task_id,
+            session_id=SESSION,
+            status=TaskStatus.COMPLETED,
+            expected_output_ids=[f"{task_id}-output"],
+            options=TaskOptions(options={LOCKCELL_TAG: tag.value}),
+        )
+        with self._lock:
+            self._completed.append(task)
+            for subscriber in self._subscribers:
+                subscriber.put(task)
+
+    def publish(self, result_id: str, tag: TaskTag):
+        result = ResultRaw(
+            result_id=result_id,
+            session_id=SESSION,
+            name=f"{published_prefix(tag)}{result_id}",
+            status=RESULT_STATUS_COMPLETED,
+        )
+        with self._lock:
+            self._results.append(result)
+            for subscriber in self._subscribers:
+                subscriber.put(result)
+
+    def GetEvents(self, request, context):
+        if not self.events_available:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "no events service")
+        subscriber: queue.Queue = queue.Queue()
+        with self._lock:
+            self._subscribers.append(subscriber)
+        context.send_initial_metadata(())
+        if self.events_end:
+            return
+        while context.is_active():
+            try:
+                found = subscriber.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if isinstance(found, ResultRaw):
+                yield EventSubscriptionResponse(
+                    session_id=SESSION,
+                    new_result=EventSubscriptionResponse.NewResult(
+                        result_id=found.result_id, status=found.status
+                    ),
+                )
+                continue
+            yield EventSubscriptionResponse(
+                session_id=SESSION,
+                task_status_update=EventSubscriptionResponse.TaskStatusUpdate(
+                    task_id=found.id, status=found.status
+                ),
+            )
+
+    def GetResult(self, request, context):
+        with self._lock:
+            result = next(r for r in self._results if r.result_id == request.result_id)
+        return GetResultResponse(result=result)
+
+    def ListResults(self, request, context):
+        self.list_calls += 1
+        with self._lock:
+            results = list(self._results)
+        return ListResultsResponse(results=results, total=len(results))
+
+    def GetTask(self, request, context):
+        with self._lock:
+            task = next(t for t in self._completed if t.id == request.task_id)
+        return GetTaskResponse(task=task)
+
+    def ListTasksDetailed(self, request, context):
+        self.list_calls += 1
+        with self._lock:
+            tasks = list(self._completed)
+        return ListTasksDetailedResponse(tasks=tasks, total=len(tasks))
+
+
+@pytest.fixture
+def control_plane(request):
+    fake = FakeArmoniK(**getattr(request, "param", {}))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    add_EventsServicer_to_server(fake, server)
+    add_TasksServicer_to_server(fake, server)
+    add_ResultsServicer_to_server(fake, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield fake, f"127.0.0.1:{port}"
+    server.stop(None)
+
+
+def _wait_for(listener: TasksListener, expected: int, timeout: float = 5) -> list:
+    found: list = []
+    start = time.time()
+    while len(found) < expected and time.time() - start < timeout:
+        found.extend(listener.update())
+        time.sleep(0.01)
+    return found
+
+
+def test_listener_streams_completed_tasks(control_plane):
+    fake, endpoint = control_plane
+    fake.complete("before", TaskTag.THROWN)
+
+    listener = TasksListener(endpoint, SESSION, Task.options[LOCKCELL_TAG] == TaskTag.THROWN.value)
+    try:
+        # The task completed before the subscription is recovered once
+        assert [t.id for t in _wait_for(listener, 1)] == ["before"]
+        calls = fake.list_calls
+
+        fake.complete("after_1", TaskTag.THROWN)
+        fake.complete("after_2", TaskTag.THROWN)
+        found = _wait_for(listener, 2)
+        assert [t.id for t in found] == ["after_1", "after_2"]
+        assert found[0].expected_output_ids == ["after_1-output"]
+
+        # Nothing new : no request to the control plane
+        assert listener.update() == []
+        assert fake.list_calls == calls
+        assert not listener.is_polling
+    finally:
+        listener.close()
+
+
+@pytest.mark.parametrize("control_plane", [{"events_available": False}], indirect=True)
+def test_listener_falls_back_to_polling(control_plane):
+    fake, endpoint = control_plane
+
+    with pytest.warns(RuntimeWarning):
+        listener = TasksListener(
+            endpoint, SESSION, Task.options[LOCKCELL_TAG] == TaskTag.THROWN.value
+        )
+        listener._thread.join(timeout=5)
+    try:
+        assert listener.is_polling
+        fake.complete("polled", TaskTag.THROWN)
+        assert [t.id for t in _wait_for(listener, 1)] == ["polled"]
+        assert listener.update() == []
+    finally:
+        listener.close()
+
+
+@pytest.mark.parametrize("control_plane", [{"events_end": True}], indirect=True)
+def test_listener_polls_when_the_stream_ends(control_plane):
+    fake, endpoint = control_plane
+    fake.complete("before", TaskTag.THROWN)
+
+    with pytest.warns(RuntimeWarning):
+        listener = TasksListener(
+            endpoint, SESSION, Task.options[LOCKCELL_TAG] == TaskTag.THROWN.value
+        )
+        listener._thread.join(timeout=5)
+    try:
+        assert listener.is_polling
+        fake.complete("polled", TaskTag.THROWN)
+        # The task recovered by the subscription is not returned again
+        assert sorted(t.id for t in _wait_for(listener, 2)) == ["before", "polled"]
+        assert listener.update() == []
+    finally:
+        listener.close()
+
+
+def test_listener_streams_published_results(control_plane):
+    fake, endpoint = control_plane
+    fake.publish("before", TaskTag.THROWN)
+
+    prefix = published_prefix(TaskTag.THROWN)
+    listener = ResultsListener(endpoint, SESSION, Result.name.startswith(prefix))
+    try:
+        assert [r.result_id for r in _wait_for(listener, 1)] == ["before"]
+
+        fake.publish("after", TaskTag.THROWN)
+        assert [r.result_id for r in _wait_for(listener, 1)] == ["after"]
+        assert listener.update() == []
+        assert not listener.is_polling
+    finally:
+        listener.close()
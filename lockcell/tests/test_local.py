@@ -0,0 +1,603 @@
+import os
+import zipfile
+from pathlib import Path
+
+os.environ["LOCKCELL_CONFIG"] = str(Path(__file__).parent / "config.yaml")
+
+import time
+from copy import copy
+import asyncio
+from datetime import timedelta
+import pytest
+import logging
+
+from armonik.common import TaskDefinition, TaskOptions
+from pymonik import task
+
+from lockcell import (
+    Lockcell,
+    AsyncLockcell,
+    JobManager,
+    TestConfig,
+    Status,
+    PriorityPolicy,
+    SharePolicy,
+    build_code_bundle,
+    set_code_bundle,
+)
+from lockcell.backends import CoordinatorPymonik, LocalPymonik
+from lockcell.constants import LOCKCELL_JOB_TAG
+from lockcell.Tasks.Task import _planned_tests, _task_options
+from lockcell.Tasks.utils import AminusB, complement, concat, merge_failing_sets, split_list
+
+logger = logging.getLogger(__name__)
+
+
+def _assert_same_elements(res, expected):
+    assert {tuple(sorted(x)) for x in res} == {tuple(sorted(pb)) for pb, _ in expected}
+
+
+def _run_until_completed(lock: Lockcell):
+    start = time.time()
+    status = lock.get_status()
+    while status != Status.COMPLETED:
+        if status == Status.UPDATED:
+            logger.info(f"\nUpdate at {(time.time() - start):.2f}s ---> {lock.get_update()}")
+        lock.update()
+        status = lock.get_status()
+        time.sleep(0.05)
+    return lock.get_result()
+
+
+@pytest.mark.parametrize(
+    "N, one_sized_failing_set, two_sized_failing_set, three_sized_failing_set, mode_ddmin",
+    [
+        (2**5, 2, 2, 1, "default"),
+        (2**6, 3, 2, 1, "default"),
+        (2**7, 3, 3, 2, "Analyse"),
+    ],
+)
+def test_local_random(
+    N, one_sized_failing_set, two_sized_failing_set, three_sized_failing_set, mode_ddmin
+):
+    config = TestConfig(N=N)
+    config.set_mode(mode_ddmin)
+    config.generate_problems(
+        (one_sized_failing_set, 1, 0, 0),
+        (two_sized_failing_set, 2, 3, 1),
+        (three_sized_failing_set, 3, 2, 1),
+        non_overlapping=True,
+        seed=N,
+    )
+
+    with Lockcell(None, config=config, backend="local", max_workers=4) as lock:
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+        logger.info("Found result : " + str(result))
+    _assert_same_elements(result, config.Pb)
+
+
+def test_local_robust():
+    config = TestConfig(
+        N=2**7,
+        problems=[
+            ([56], 0.3),
+            ([94], 0.3),
+            ([42, 40], 0.5),
+            ([118, 114, 115], 0.5),
+            ([76, 80, 78, 82], 0.5),
+        ],
+    )
+    config.set_mode("Analyse")
+
+    with Lockcell(None, config=config, backend="local", max_workers=4) as lock:
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+    _assert_same_elements(result, config.Pb)
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+def test_local_batched(mode_ddmin):
+    def run(batch_size):
+        config = TestConfig(N=2**7).set_batch_size(batch_size)
+        config.set_mode(mode_ddmin)
+        config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=7)
+        with Lockcell(None, config=config, backend="local", max_workers=4) as lock:
+            lock.run_rddmin()
+            result = _run_until_completed(lock)
+            nb_tasks = len(lock._session.completed_tasks())
+        _assert_same_elements(result, config.Pb)
+        return nb_tasks
+
+    unbatched = run(1)
+    assert run(8) < unbatched
+    assert run(None) < unbatched
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+@pytest.mark.parametrize("parallelism", [3, 16])
+def test_local_parallelism(mode_ddmin, parallelism):
+    config = TestConfig(N=2**7)
+    config.set_mode(mode_ddmin)
+    config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=3)
+
+    with Lockcell(
+        None, config=config, backend="local", max_workers=4, parallelism=parallelism
+    ) as lock:
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+        assert lock.config.parallelism == parallelism
+    _assert_same_elements(result, config.Pb)
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+def test_local_speculative(mode_ddmin):
+    config = TestConfig(N=2**7).set_speculative()
+    config.set_mode(mode_ddmin)
+    config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=5)
+
+    with Lockcell(None, config=config, backend="local", max_workers=4, parallelism=16) as lock:
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+    _assert_same_elements(result, config.Pb)
+
+
+@pytest.mark.parametrize("policy", list(PriorityPolicy) + [lambda size, space_size: size % 3])
+def test_local_priority_policy(policy):
+    config = TestConfig(N=2**7).set_priority_policy(policy)
+    config.set_mode("Analyse")
+    config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=3)
+
+    with Lockcell(None, config=config, backend="local", max_workers=2) as lock:
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+    _assert_same_elements(result, config.Pb)
+
+
+def test_priority_levels():
+    config = TestConfig(N=2**7).set_search_space_size(2**7)
+    assert config.get_priority_level(2**7) == config.get_priority_level(1) == 0
+
+    config.set_priority_policy("depth_first")
+    assert config.get_priority_level(2**7) < config.get_priority_level(2**3)
+    config.set_priority_policy(PriorityPolicy.SMALLEST_DELTA_FIRST)
+    assert config.get_priority_level(2**7) < config.get_priority_level(2**3)
+    config.set_priority_policy("critical_path_first")
+    assert config.get_priority_level(2**7) > config.get_priority_level(2**3)
+
+    with pytest.raises(ValueError):
+        config.set_priority_policy("random")
+
+
+def test_subset_algebra():
+    space = list(range(37))
+    subdiv = split_list(space, 5)
+    assert concat(subdiv) == space
+    for idx in range(5):
+        assert complement(subdiv, idx) == AminusB(space, subdiv[idx])
+        for j in range(idx + 1, 5):
+            expected = AminusB(AminusB(space, subdiv[idx]), subdiv[j])
+            assert complement(subdiv, idx, j) == complement(subdiv, j, idx) == expected
+
+    answers = [([[1, 2], [3]], False), (None, True), ([[3], [4, 5]], False)]
+    assert merge_failing_sets(answers) == [[1, 2], [3], [4, 5]]
+
+
+class SlowTestConfig(TestConfig):
+    """
+    TestConfig whose tests take some time, so that the tasks are still queued when they become obsolete
+    """
+
+    def test_(self, subspace):
+        time.sleep(0.02)
+        return super().test_(subspace)
+
+    def __copy__(self):
+        copy_ = SlowTestConfig(N=self.N, problems=list(self.Pb), nbRun=self.nbRun)
+        self._copy_settings(copy_)
+        return copy_
+
+
+class StragglerConfig(TestConfig):
+    """
+    TestConfig whose first test on a delta of length 'straggler_size' hangs, like on a slow node
+    """
+
+    def __init__(self, marker: str, straggler_size: int, **kwargs):
+        super().__init__(**kwargs)
+        self.marker = marker
+        self.straggler_size = straggler_size
+
+    def test_(self, subspace):
+        subspace = list(subspace)
+        time.sleep(0.01)
+        if len(subspace) == self.straggler_size:
+            try:
+                os.close(os.open(self.marker, os.O_CREAT | os.O_EXCL))
+                time.sleep(5)
+            except FileExistsError:
+                pass
+        return super().test_(subspace)
+
+    def __copy__(self):
+        copy_ = StragglerConfig(
+            self.marker, self.straggler_size, N=self.N, problems=list(self.Pb), nbRun=self.nbRun
+        )
+        self._copy_settings(copy_)
+        return copy_
+
+
+def test_local_straggler_backup(tmp_path):
+    config = StragglerConfig(str(tmp_path / "hung"), 2, N=2**6, problems=[([37], 1)])
+    config.set_straggler_policy(0.9, backup_minimum=0.2)
+
+    with Lockcell(None, config=config, backend="local", max_workers=4) as lock:
+        start = time.time()
+        lock.run_ddmin()
+        result = _run_until_completed(lock)
+        elapsed = time.time() - start
+        stats = lock.straggler_stats
+    _assert_same_elements(result, config.Pb)
+    assert stats["backup_tasks"] >= 1 and stats["backup_wins"] >= 1
+    assert elapsed < 5
+
+
+def test_straggler_policy():
+    config = TestConfig(N=2**6)
+    assert config.get_test_timeout() is None and config.get_backup_policy() is None
+    config.set_straggler_policy(0.5, timeout_factor=2.0)
+    for duration in (100.0, 200.0, 400.0, 800.0):
+        config.record_test_cost(duration)
+    assert config.get_test_timeout() == 2.0 * 200.0
+    assert copy(config).get_backup_policy() == "0.5,2.0,1.0"
+
+    with pytest.raises(ValueError):
+        config.set_straggler_policy(1.5)
+
+
+def test_multi_test_timeout():
+    # A batch of 16 tests of 10s runs longer than the 60s deadline of a single test
+    config = TestConfig(N=2**6).set_straggler_policy(0.5, timeout_factor=2.0).set_collapse_size(2)
+    for _ in range(4):
+        config.record_test_cost(10.0)
+    single = _task_options(0, config=config).max_duration
+    assert single == timedelta(seconds=config.get_test_timeout())
+
+    batch = [([idx], 2, config, None) for idx in range(16)]
+    assert _planned_tests(config, batch) == 16
+    assert _task_options(0, config=config, tests=16).max_duration == 16 * single
+    assert 16 * timedelta(seconds=10.0) > single
+
+    # A failing pair is minimized inside its task, a known answer isn't tested again
+    assert _planned_tests(config, [([1, 2], 2, config, None)]) == 1 + 2 * 2
+    assert _planned_tests(config, [([1, 2], 2, config, None, False, True)]) == 0
+
+
+def test_local_cancel_obsolete_speculation():
+    # The cluster is wider than the search space : the root subsets are tested with their complements
+    config = SlowTestConfig(N=16, problems=[([3], 1), ([9, 12], 1)]).set_speculative()
+    config.set_mode("Analyse")
+
+    with Lockcell(None, config=config, backend="local", max_workers=2, parallelism=64) as lock:
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+        assert lock.cancelled_tasks > 0
+        assert lock.saved_task_seconds > 0
+    _assert_same_elements(result, config.Pb)
+
+
+def test_local_ddmin():
+    config = TestConfig(N=2**6, problems=[([12], 1), ([40, 41], 1)])
+
+    with Lockcell(None, config=config, backend="local", max_workers=4) as lock:
+        lock.run_ddmin()
+        result = _run_until_completed(lock)
+    _assert_same_elements(result, config.Pb)
+
+
+def test_async_concurrent_jobs():
+    configs = []
+    for seed in range(3):
+        config = TestConfig(N=2**6)
+        config.set_mode("Analyse")
+        config.generate_problems((2, 1, 0, 0), (1, 2, 3, 1), non_overlapping=True, seed=seed)
+        configs.append(config)
+
+    async def run(config):
+        async with AsyncLockcell(
+            None, config=config, backend="local", max_workers=2, poll_interval=0.01
+        ) as lock:
+            await lock.run_rddmin()
+            found = [failing_set async for failing_set in lock.results()]
+            assert found == await lock.get_result()
+        return found
+
+    async def main():
+        return await asyncio.gather(*(run(config) for config in configs))
+
+    for found, config in zip(asyncio.run(main()), configs):
+        _assert_same_elements(found, config.Pb)
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+def test_local_pipelined_rddmin(mode_ddmin):
+    config = TestConfig(N=2**6)
+    config.set_mode(mode_ddmin)
+    config.generate_problems((3, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), non_overlapping=True, seed=7)
+
+    results = []
+    for job in ["rddmin", "pipelined_rddmin"]:
+        with Lockcell(None, config=config, backend="local", max_workers=4) as lock:
+            lock.set_job(job)
+            lock.run()
+            results.append(_run_until_completed(lock))
+    # Same failing sets as the sequential RDDMin
+    _assert_same_elements(results[1], config.Pb)
+    assert {tuple(sorted(x)) for x in results[0]} == {tuple(sorted(x)) for x in results[1]}
+
+
+class LinesConfig(TestConfig):
+    """
+    TestConfig whose elements are long lines, like the source lines of ConfigVerrou
+    """
+
+    def generate_search_space(self) -> list:
+        return [f"{idx:06d}:" + "x" * 1000 for idx in range(self.N)]
+
+    def test_(self, subspace) -> bool:
+        return super().test_(int(line.split(":")[0]) for line in subspace)
+
+    def __copy__(self) -> "LinesConfig":
+        copy_ = LinesConfig(N=self.N, problems=self.Pb, nbRun=self.nbRun)
+        self._copy_settings(copy_)
+        return copy_
+
+
+def _payload_bytes(session: LocalPymonik) -> int:
+    folder = Path(session._data_folder)
+    return sum(path.stat().st_size for path in folder.iterdir())
+
+
+@pytest.mark.parametrize("fuse_aggregators", [False, True])
+def test_local_shared_search_space(fuse_aggregators):
+    def run(share):
+        config = LinesConfig(N=2**7).set_share_search_space(share)
+        config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=7)
+        with Lockcell(
+            None, config=config, backend="local", max_workers=4, fuse_aggregators=fuse_aggregators
+        ) as lock:
+            lock.run_rddmin()
+            result = _run_until_completed(lock)
+            space = lock.search_space
+            stored = _payload_bytes(lock._session)
+        lines = config.generate_search_space()
+        expected = {tuple(sorted(lines[idx] for idx in pb)) for pb, _ in config.Pb}
+        assert {tuple(sorted(x)) for x in result} == expected
+        assert set(space) <= set(lines)
+        return stored
+
+    assert run(True) < run(False) / 2
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+@pytest.mark.parametrize("fuse_aggregators", [False, True])
+def test_local_shared_config(mode_ddmin, fuse_aggregators):
+    def run(share):
+        config = TestConfig(N=2**7).set_share_config(share).set_batch_size(None)
+        config.set_mode(mode_ddmin)
+        config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=7)
+        with Lockcell(
+            None, config=config, backend="local", max_workers=4, fuse_aggregators=fuse_aggregators
+        ) as lock:
+            lock.run_pipelined_rddmin()
+            result = _run_until_completed(lock)
+            stored = _payload_bytes(lock._session)
+        _assert_same_elements(result, config.Pb)
+        return stored
+
+    assert run(True) < run(False) / 2
+
+
+def test_local_code_bundle(tmp_path):
+    def run(code_bundle):
+        config = TestConfig(N=2**7)
+        config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=7)
+        with Lockcell(
+            None, config=config, backend="local", max_workers=4, code_bundle=code_bundle
+        ) as lock:
+            lock.run_rddmin()
+            result = _run_until_completed(lock)
+            stored = _payload_bytes(lock._session)
+        _assert_same_elements(result, config.Pb)
+        return stored
+
+    bundle = build_code_bundle(str(tmp_path))
+    assert build_code_bundle(str(tmp_path)) == bundle
+    with zipfile.ZipFile(bundle.path) as wheel:
+        names = wheel.namelist()
+    assert "lockcell/Tasks/Task.py" in names
+    assert f"lockcell-{bundle.version}.dist-info/RECORD" in names
+    assert bundle.environment({})["pip"] == [bundle.path]
+
+    pickled_by_value = run(None)
+    try:
+        assert run(bundle) < pickled_by_value / 2
+    finally:
+        set_code_bundle(None)
+
+
+class CountingConfig(TestConfig):
+    """
+    TestConfig that appends a line to the file 'log' for every test it runs
+    """
+
+    def __init__(self, log: str, **kwargs):
+        super().__init__(**kwargs)
+        self.log = log
+
+    def test_(self, subspace):
+        with open(self.log, "a") as log:
+            log.write("test\n")
+        return super().test_(subspace)
+
+    def __copy__(self):
+        copy_ = CountingConfig(self.log, N=self.N, problems=list(self.Pb), nbRun=self.nbRun)
+        self._copy_settings(copy_)
+        return copy_
+
+
+@pytest.mark.parametrize(
+    "job,batch_size", [("rddmin", None), ("pipelined_rddmin", None), ("ddmin", None), ("rddmin", 4)]
+)
+def test_local_resume(tmp_path, job, batch_size):
+    journal = str(tmp_path / "job.journal")
+    log = tmp_path / "tests.log"
+
+    def tests_run():
+        count = len(log.read_text().splitlines()) if log.exists() else 0
+        log.unlink(missing_ok=True)
+        return count
+
+    def lockcell(**options):
+        config = CountingConfig(str(log), N=2**6, problems=[([5], 1), ([17, 40], 1), ([50], 1)])
+        config.set_share_search_space().set_batch_size(batch_size)
+        return Lockcell(None, config=config, backend="local", max_workers=2, **options)
+
+    # The client stops as soon as the first failing set is found
+    with lockcell(journal=journal) as lock:
+        lock.set_job(job)
+        lock.run()
+        while not lock.update() or not lock.get_update():
+            time.sleep(0.05)
+    assert tests_run() > 0
+
+    with lockcell() as lock:
+        lock.resume(journal)
+        result = _run_until_completed(lock)
+    resumed = tests_run()
+
+    with lockcell() as lock:
+        lock.set_job(job)
+        lock.run()
+        expected = _run_until_completed(lock)
+    assert resumed < tests_run()
+    assert sorted(result) == sorted(expected)
+
+    # Every test of a finished job is recorded
+    with lockcell() as lock:
+        lock.resume(journal)
+        result = _run_until_completed(lock)
+    assert tests_run() == 0
+    assert sorted(result) == sorted(expected)
+
+    with pytest.raises(ValueError):
+        with Lockcell(None, config=TestConfig(N=2**5), backend="local") as lock:
+            lock.resume(journal)
+    with pytest.raises(ValueError):
+        lockcell(journal=journal, fuse_aggregators=True)
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+@pytest.mark.parametrize("collapse_size", [8, None])
+def test_local_collapsed_leaves(mode_ddmin, collapse_size):
+    def run(collapse_size, **options):
+        config = TestConfig(N=2**7).set_collapse_size(collapse_size, workers=2)
+        config.set_mode(mode_ddmin)
+        config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=7)
+        with Lockcell(None, config=config, backend="local", max_workers=4, **options) as lock:
+            lock.run_rddmin()
+            result = _run_until_completed(lock)
+            nb_tasks = len(lock._session.completed_tasks())
+        _assert_same_elements(result, config.Pb)
+        return nb_tasks
+
+    assert run(collapse_size) < run(0)
+    # The collapsed subtrees are sent whole to the cluster
+    run(collapse_size, fuse_aggregators=True)
+
+
+@pytest.mark.parametrize("mode_ddmin", ["default", "Analyse"])
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_local_fused_aggregators(mode_ddmin, batch_size):
+    config = TestConfig(N=2**7).set_batch_size(batch_size)
+    config.set_mode(mode_ddmin)
+    config.generate_problems((2, 1, 0, 0), (2, 2, 3, 1), (1, 3, 2, 1), seed=7)
+
+    with Lockcell(
+        None, config=config, backend="local", max_workers=4, fuse_aggregators=True
+    ) as lock:
+        assert isinstance(lock._session, CoordinatorPymonik)
+        lock.run_rddmin()
+        result = _run_until_completed(lock)
+        remote_tasks = lock._session.remote.completed_tasks()
+        local_tasks = lock._session.completed_tasks()
+    _assert_same_elements(result, config.Pb)
+    # Only the tests were sent to the remote session
+    assert len(remote_tasks) == lock._session.remote_tests
+    assert len(remote_tasks) < len(local_tasks)
+
+
+@pytest.mark.parametrize("share", list(SharePolicy))
+def test_job_manager(share):
+    configs = {}
+    for seed, (N, mode) in enumerate([(2**7, "Analyse"), (2**4, "default")]):
+        config = TestConfig(N=N)
+        config.set_mode(mode)
+        config.generate_problems((1, 1, 0, 0), (1, 2, 1, 1), non_overlapping=True, seed=seed)
+        configs[f"rddmin{seed}"] = (config, "rddmin")
+    configs["ddmin"] = (TestConfig(N=2**5, problems=[([12], 1), ([20, 21], 1)]), "ddmin")
+
+    with JobManager(None, backend="local", max_workers=2, share=share) as manager:
+        for name, (config, job) in configs.items():
+            manager.add_job(config, job, name=name, weight=1 + len(config.Pb))
+        manager.run()
+        manager.wait()
+        results = manager.get_results()
+
+    # Every job only sees its own failing sets
+    for name, (config, _) in configs.items():
+        _assert_same_elements(results[name], config.Pb)
+
+
+def test_local_weighted_share():
+    session = LocalPymonik(max_workers=1)
+    session.set_share("small", 2)
+    session.set_share("huge", 1)
+
+    def submit(job, nb):
+        for _ in range(nb):
+            options = TaskOptions(
+                max_duration=timedelta(seconds=1),
+                priority=1,
+                max_retries=1,
+                options={LOCKCELL_JOB_TAG: job},
+            )
+            session._add_task(TaskDefinition("payload", ["out"], []), options, None)
+
+    submit("huge", 30)
+    submit("small", 6)
+    order = [session._pop_ready().job for _ in range(9)]  # type: ignore
+    # The small job isn't queued behind the huge one, and gets twice its share
+    assert order.count("small") == 6
+    assert order.count("huge") == 3
+
+
+@task
+def _read_env(name):
+    return os.environ.get(name)
+
+
+@pytest.mark.parametrize("use_threads", [False, True])
+def test_local_environment(use_threads):
+    environment = {"env_variables": {"LOCKCELL_TEST_VARIABLE": "set"}}
+    session = LocalPymonik(max_workers=1, environment=environment, use_threads=use_threads)
+    with session.create():
+        value = _read_env.invoke("LOCKCELL_TEST_VARIABLE", pymonik=session).wait().get()  # type: ignore
+    # The tasks running on threads would set it for the whole process
+    assert value == (None if use_threads else "set")
+    assert "LOCKCELL_TEST_VARIABLE" not in os.environ
+
+
+def test_local_unknown_backend():
+    with pytest.raises(ValueError):
+        Lockcell(None, config=TestConfig(N=4), backend="mars")